@@ -0,0 +1,178 @@
+"""
+JWT authentication without a database query per request.
+
+simplejwt's ``JWTAuthentication`` verifies the token signature and then loads
+the ``User`` row on every request. ``CachedJWTAuthentication`` keeps the
+tokens it has verified in a bounded LRU keyed by a hash of the token, so a
+client repeating its token skips the signature check until the token's
+``exp``. The user is built from the claims ``JWTLoginView`` puts in the token
+(see auth/tokens.py) instead of being read from the database.
+
+Claims are a snapshot taken at login or at the last refresh, which re-reads
+the user: a user deactivated, deleted or demoted keeps the access it had until
+the access token expires (``ACCESS_TOKEN_LIFETIME``).
+Views where that matters set ``require_database_user = True`` and get the
+``User`` row, checked on every request, as before.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .tokens import USER_CLAIMS
+
+
+class ClaimsUser(TokenUser):
+    """
+    A ``TokenUser`` that also knows the email claim. It has no database row:
+    query related objects by ``user_id=request.user.id``.
+    """
+
+    @cached_property
+    def email(self):
+        return self.token.get("email", "")
+
+
+class VerifiedTokenCache:
+    """
+    Thread safe LRU of validated tokens, keyed by the SHA-256 of the raw
+    token. Entries are dropped at the token's ``exp``.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def key(raw_token):
+        return hashlib.sha256(raw_token).digest()
+
+    def get(self, raw_token):
+        key = self.key(raw_token)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires, token = entry
+                if expires > time.time():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return token
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, raw_token, token):
+        key = self.key(raw_token)
+        with self.lock:
+            self.entries[key] = (token["exp"], token)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "max_entries": self.max_entries}
+
+
+verified_tokens = VerifiedTokenCache(settings.JWT_TOKEN_CACHE["MAX_ENTRIES"])
+
+
+def requires_database_user(request):
+    view = request.parser_context.get("view")
+    return getattr(view, "require_database_user", False)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` backed by the verified token LRU, returning a
+    ``ClaimsUser`` unless the view sets ``require_database_user`` or the token
+    was issued without the user claims.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if requires_database_user(request) or not self.has_user_claims(validated_token):
+            return self.get_user(validated_token), validated_token
+        return self.get_claims_user(validated_token), validated_token
+
+    def get_validated_token(self, raw_token):
+        token = verified_tokens.get(raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            verified_tokens.put(raw_token, token)
+        return token
+
+    @staticmethod
+    def has_user_claims(validated_token):
+        return all(claim in validated_token for claim in USER_CLAIMS)
+
+    def get_claims_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        return ClaimsUser(validated_token)
+
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    """
+    ``CachedJWTAuthentication`` for async views. Tokens are checked in memory
+    as before; when the user has to come from the database it is loaded with
+    the async ORM so the event loop is never blocked.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if requires_database_user(request) or not self.has_user_claims(validated_token):
+            return await self.aget_user(validated_token), validated_token
+        return self.get_claims_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
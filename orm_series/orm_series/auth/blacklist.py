@@ -0,0 +1,164 @@
+"""
+In-process bloom filter of blacklisted refresh token JTIs.
+
+With simplejwt's token_blacklist app every refresh runs an indexed lookup on
+``BlacklistedToken``. ``BlacklistFilter`` answers "certainly not blacklisted"
+from memory for almost every token and only lets probable hits through to that
+query, so a false positive costs one query and never rejects a valid token.
+
+Each process loads the filter from the database on first use, adds the JTIs
+it blacklists itself at logout, and picks up the ones blacklisted by other
+workers with an incremental query at most every ``SYNC_INTERVAL`` seconds.
+Until then a token logged out on another worker can still be refreshed here;
+``SYNC_INTERVAL = 0`` closes that window at the cost of the small query on
+every refresh. Size and false positive rate come from
+``settings.JWT_BLACKLIST_FILTER``.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    A bloom filter sized for ``capacity`` items at ``false_positive_rate``,
+    using double hashing over one BLAKE2b digest.
+    """
+
+    def __init__(self, capacity, false_positive_rate):
+        self.capacity = max(1, capacity)
+        self.false_positive_rate = false_positive_rate
+        self.size = max(8, math.ceil(-self.capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(item))
+
+    def estimated_false_positive_rate(self):
+        # for the number of items added so far, not the capacity
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+class BlacklistFilter:
+    """
+    The blacklisted JTIs of one process, with counters of how often the
+    database still had to be asked.
+    """
+
+    def __init__(self, capacity, false_positive_rate, sync_interval):
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.sync_interval = sync_interval
+        self.lock = threading.Lock()
+        self.filter = None
+        self.last_id = 0
+        self.synced_at = 0.0
+        self.checks = self.database_checks = self.false_positives = 0
+
+    def load(self):
+        """
+        Rebuild the filter from every blacklisted token, doubling its capacity
+        until they fit.
+        """
+        with self.lock:
+            rows = list(BlacklistedToken.objects.values_list('id', 'token__jti'))
+            while len(rows) > self.capacity:
+                self.capacity *= 2
+            self.filter = BloomFilter(self.capacity, self.false_positive_rate)
+            for _, jti in rows:
+                self.filter.add(jti)
+            self.last_id = max((id for id, _ in rows), default=0)
+            self.synced_at = time.monotonic()
+        logger.info("Loaded %d blacklisted tokens into a %d KiB bloom filter", len(rows), len(self.filter.bits) // 1024)
+
+    def sync(self):
+        """
+        Add the tokens blacklisted since the last load or sync, by any worker.
+        """
+        rows = list(
+            BlacklistedToken.objects.filter(id__gt=self.last_id).order_by('id').values_list('id', 'token__jti')
+        )
+        with self.lock:
+            for _, jti in rows:
+                self.filter.add(jti)
+            if rows:
+                self.last_id = max(self.last_id, rows[-1][0])
+            self.synced_at = time.monotonic()
+            grown = self.filter.count > self.capacity
+        if grown:
+            self.load()
+
+    def ensure_current(self):
+        if self.filter is None:
+            self.load()
+        elif time.monotonic() - self.synced_at >= self.sync_interval:
+            self.sync()
+
+    def add(self, jti):
+        """
+        Record a token this process has just blacklisted.
+        """
+        self.ensure_current()
+        with self.lock:
+            self.filter.add(jti)
+
+    def is_blacklisted(self, jti):
+        self.ensure_current()
+        self.checks += 1
+        if jti not in self.filter:
+            return False
+        self.database_checks += 1
+        if BlacklistedToken.objects.filter(token__jti=jti).exists():
+            return True
+        self.false_positives += 1
+        return False
+
+    def clear(self):
+        with self.lock:
+            self.filter = None
+            self.last_id = 0
+            self.checks = self.database_checks = self.false_positives = 0
+
+    def stats(self):
+        self.ensure_current()
+        bloom = self.filter
+        return {
+            "tokens": bloom.count,
+            "capacity": bloom.capacity,
+            "memory_bytes": len(bloom.bits),
+            "bits": bloom.size,
+            "hashes": bloom.hashes,
+            "configured_false_positive_rate": bloom.false_positive_rate,
+            "estimated_false_positive_rate": bloom.estimated_false_positive_rate(),
+            "checks": self.checks,
+            "database_checks": self.database_checks,
+            "false_positives": self.false_positives,
+            "sync_interval": self.sync_interval,
+        }
+
+
+blacklist_filter = BlacklistFilter(
+    settings.JWT_BLACKLIST_FILTER['CAPACITY'],
+    settings.JWT_BLACKLIST_FILTER['FALSE_POSITIVE_RATE'],
+    settings.JWT_BLACKLIST_FILTER['SYNC_INTERVAL'],
+)
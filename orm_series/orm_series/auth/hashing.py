@@ -0,0 +1,113 @@
+"""
+Bounded pool for password hashing.
+
+PBKDF2 is slow on purpose (a million iterations by default). ``authenticate()``
+at login and ``create_user()`` at registration used to hash on the request
+thread, so a login storm ran one hash per request thread and took every core
+away from the other endpoints. ``PooledPBKDF2PasswordHasher`` takes the place
+of Django's PBKDF2 hasher in ``PASSWORD_HASHERS`` and hands the hashing to
+``HashingPool``, a few threads with a bounded queue. Everything that hashes
+goes through it without changing its code: ``authenticate()``,
+``create_user()``, ``set_password()``, and the dummy hash ``ModelBackend``
+runs for unknown usernames.
+
+Threads are enough because ``hashlib.pbkdf2_hmac`` releases the GIL. Once
+``WORKERS + MAX_QUEUE`` hashes are waiting, further ones raise
+``PasswordHashingBusy``, which the views answer with ``503``. Async code
+awaits ``acheck_password`` and ``amake_password`` instead of blocking the
+event loop.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, make_password
+
+
+class PasswordHashingBusy(Exception):
+    """
+    The hashing queue is full; the request should be retried later.
+    """
+
+
+class HashingPool:
+    """
+    ``workers`` hashing threads and room for ``max_queue`` waiting hashes.
+    """
+
+    def __init__(self, workers=2, max_queue=32):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.local = threading.local()
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hashing", initializer=self._mark_worker,
+        )
+        self.slots = threading.BoundedSemaphore(workers + max_queue)
+        self.rejected = 0
+
+    def _mark_worker(self):
+        self.local.worker = True
+
+    def in_worker(self):
+        return getattr(self.local, "worker", False)
+
+    def submit(self, func, *args):
+        if not self.slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHashingBusy(f"{self.workers + self.max_queue} password hashes are already queued")
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def run(self, func, *args):
+        # already on a hashing thread: queueing again could wait on itself
+        if self.in_worker():
+            return func(*args)
+        return self.submit(func, *args).result()
+
+    async def arun(self, func, *args):
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def hashing_pool():
+    """
+    The process-wide pool configured by ``settings.PASSWORD_HASHING_POOL``.
+    """
+    global _pool
+    with _pool_lock:
+        # created on first use, so every forked worker process has its own threads
+        if _pool is None:
+            config = getattr(settings, 'PASSWORD_HASHING_POOL', {})
+            _pool = HashingPool(workers=config.get('WORKERS', 2), max_queue=config.get('MAX_QUEUE', 32))
+    return _pool
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    ``PBKDF2PasswordHasher`` running on the hashing pool. It keeps the
+    ``pbkdf2_sha256`` algorithm name, so existing hashes verify unchanged.
+    """
+
+    def encode(self, password, salt, iterations=None):
+        return hashing_pool().run(super().encode, password, salt, iterations)
+
+
+async def acheck_password(password, encoded):
+    """
+    ``check_password`` for async views: awaits the pool without blocking the
+    event loop. Hashes that need upgrading are not rewritten.
+    """
+    return await hashing_pool().arun(check_password, password, encoded)
+
+
+async def amake_password(password):
+    return await hashing_pool().arun(make_password, password)
@@ -0,0 +1,126 @@
+import time
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from auth.authentication import VerifiedTokenCache, verified_tokens
+from core.models import Rating, Restaurant
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    """
+    Test suite for the verified token LRU and the claims user.
+    """
+
+    def setUp(self):
+        verified_tokens.clear()
+        self.user = User.objects.create_user(username="claims", password="pass12345", email="claims@example.com")
+
+    def login(self, username="claims", password="pass12345"):
+        response = self.client.post(reverse('jwt-login'), {"username": username, "password": password}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def authorize(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_login_embeds_user_claims(self):
+        access = RefreshToken(self.login()["refresh"]).access_token
+        self.assertEqual(access["username"], "claims")
+        self.assertEqual(access["email"], "claims@example.com")
+        self.assertIs(access["is_staff"], False)
+
+    def test_profile_without_queries(self):
+        self.authorize(self.login()["access"])
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.data, {"username": "claims", "email": "claims@example.com", "is_staff": False})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('dashboard')).data["message"], "Welcome claims!")
+
+    def test_repeated_token_is_not_verified_again(self):
+        self.authorize(self.login()["access"])
+        self.client.get(reverse('profile'))
+        with mock.patch.object(JWTAuthentication, 'get_validated_token') as verify:
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        verify.assert_not_called()
+        self.assertEqual(verified_tokens.stats()["hits"], 1)
+
+    def test_invalid_token_is_not_cached(self):
+        self.authorize("not.a.token")
+        self.assertEqual(self.client.get(reverse('profile')).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(verified_tokens.stats()["size"], 0)
+
+    def test_tokens_without_claims_load_the_user(self):
+        self.authorize(str(RefreshToken.for_user(self.user).access_token))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.data["email"], "claims@example.com")
+
+    def test_claims_user_lists_own_ratings(self):
+        restaurant = Restaurant.objects.create(
+            name="Rated", date_opened=date(2024, 1, 1), latitude=40.0, longitude=22.0,
+            restaurant_type=Restaurant.TypeChoices.GREEK,
+        )
+        Rating.objects.create(user=self.user, restaurant=restaurant, rating=5)
+        self.authorize(self.login()["access"])
+        response = self.client.get(reverse('my-ratings'))
+        self.assertEqual([r["rating"] for r in response.data["results"]], [5])
+
+    def test_sensitive_views_check_the_database(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.authorize(self.login()["access"])
+        self.assertEqual(self.client.get(reverse('response-cache-stats')).status_code, status.HTTP_200_OK)
+
+        # the token still says is_staff, the database no longer does
+        User.objects.filter(pk=self.user.pk).update(is_staff=False)
+        self.assertEqual(self.client.get(reverse('response-cache-stats')).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertIs(self.client.get(reverse('profile')).data["is_staff"], True)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get('/core/export/sales').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_cannot_write_ratings(self):
+        restaurant = Restaurant.objects.create(
+            name="Gone", date_opened=date(2024, 1, 1), latitude=40.0, longitude=22.0,
+            restaurant_type=Restaurant.TypeChoices.GREEK,
+        )
+        self.authorize(self.login()["access"])
+        self.user.delete()
+        rating = {"restaurant_id": restaurant.id, "rating": 4}
+        self.assertEqual(self.client.post('/core/ratings/submit/', rating, format='json').status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.post('/core/ratings/submit/batch/', [rating], format='json').status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(Rating.objects.exists())
+
+
+class VerifiedTokenCacheTest(APITestCase):
+    """
+    Test suite for VerifiedTokenCache bounds and expiry.
+    """
+
+    def test_least_recently_used_is_evicted(self):
+        cache = VerifiedTokenCache(max_entries=2)
+        expires = time.time() + 60
+        for raw in (b"a", b"b"):
+            cache.put(raw, {"exp": expires, "raw": raw})
+        cache.get(b"a")
+        cache.put(b"c", {"exp": expires, "raw": b"c"})
+        self.assertIsNone(cache.get(b"b"))
+        self.assertEqual(cache.get(b"a")["raw"], b"a")
+        self.assertEqual(cache.stats()["size"], 2)
+
+    def test_entries_expire_with_the_token(self):
+        cache = VerifiedTokenCache(max_entries=2)
+        cache.put(b"old", {"exp": time.time() - 1})
+        self.assertIsNone(cache.get(b"old"))
+        self.assertEqual(cache.stats(), {"hits": 0, "misses": 1, "size": 0, "max_entries": 2})
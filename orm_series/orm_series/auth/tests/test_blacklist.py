@@ -0,0 +1,122 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from auth.blacklist import BlacklistFilter, BloomFilter, blacklist_filter
+
+
+class BlacklistFilterTest(APITestCase):
+    """
+    Test suite for logout, refresh and the blacklisted token bloom filter.
+    """
+
+    def setUp(self):
+        blacklist_filter.clear()
+        self.user = User.objects.create_user(username="session", password="pass12345", email="session@example.com")
+
+    def login(self):
+        response = self.client.post(reverse('jwt-login'), {"username": "session", "password": "pass12345"}, format='json')
+        return response.data
+
+    def refresh(self, token):
+        return self.client.post(reverse('jwt-refresh'), {"refresh": token}, format='json')
+
+    def logout(self, tokens):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        response = self.client.post(reverse('logout'), {"refresh": tokens["refresh"]}, format='json')
+        self.client.credentials()
+        return response
+
+    def blacklist_queries(self, context):
+        return [q for q in context.captured_queries if 'token_blacklist_blacklistedtoken' in q['sql']]
+
+    def test_logout_blacklists_the_refresh_token(self):
+        tokens = self.login()
+        self.assertEqual(self.refresh(tokens["refresh"]).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.logout(tokens).status_code, status.HTTP_205_RESET_CONTENT)
+
+        response = self.refresh(tokens["refresh"])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.logout(tokens).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(blacklist_filter.stats()["tokens"], 1)
+
+    def test_refreshed_access_token_keeps_the_claims(self):
+        access = self.refresh(self.login()["refresh"]).data["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('profile')).data["email"], "session@example.com")
+
+    def test_refresh_picks_up_changed_claims(self):
+        tokens = self.login()
+        User.objects.filter(pk=self.user.pk).update(is_staff=True, email="staff@example.com")
+        access = self.refresh(tokens["refresh"]).data["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        with self.assertNumQueries(0):
+            profile = self.client.get(reverse('profile')).data
+        self.assertEqual(profile["email"], "staff@example.com")
+        self.assertIs(profile["is_staff"], True)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.refresh(tokens["refresh"]).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_skips_the_blacklist_query(self):
+        self.logout(self.login())
+        tokens = self.login()
+        self.refresh(tokens["refresh"])
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.refresh(tokens["refresh"]).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.blacklist_queries(context), [])
+        self.assertEqual(blacklist_filter.database_checks, 0)
+
+    def test_false_positive_falls_through_to_the_database(self):
+        tokens = self.login()
+        with mock.patch.object(BloomFilter, '__contains__', return_value=True):
+            self.assertEqual(self.refresh(tokens["refresh"]).status_code, status.HTTP_200_OK)
+        stats = blacklist_filter.stats()
+        self.assertEqual((stats["database_checks"], stats["false_positives"]), (1, 1))
+
+    def test_tokens_blacklisted_by_other_workers_are_synced(self):
+        tokens = self.login()
+        self.refresh(tokens["refresh"])
+        # another worker logs the session out
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(user=self.user))
+
+        with mock.patch.object(blacklist_filter, 'sync_interval', 0):
+            self.assertEqual(self.refresh(tokens["refresh"]).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_load_grows_the_capacity(self):
+        for i in range(5):
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.create(jti=f"jti-{i}", token="t", expires_at="2030-01-01T00:00Z"))
+        small = BlacklistFilter(capacity=2, false_positive_rate=0.01, sync_interval=30)
+        self.assertEqual(small.stats()["capacity"], 8)
+        self.assertTrue(small.is_blacklisted("jti-3"))
+
+    def test_stats_are_staff_only(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login()['access']}")
+        self.assertEqual(self.client.get(reverse('blacklist-filter-stats')).status_code, status.HTTP_403_FORBIDDEN)
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        response = self.client.get(reverse('blacklist-filter-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["configured_false_positive_rate"], 0.001)
+
+
+class BloomFilterTest(APITestCase):
+    """
+    Test suite for BloomFilter sizing and accuracy.
+    """
+
+    def test_false_positive_rate_at_capacity(self):
+        bloom = BloomFilter(capacity=1000, false_positive_rate=0.01)
+        self.assertEqual(bloom.hashes, 7)
+        for i in range(1000):
+            bloom.add(f"member-{i}")
+        self.assertTrue(all(f"member-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+        self.assertLess(false_positives / 10_000, 0.02)
+        self.assertAlmostEqual(bloom.estimated_false_positive_rate(), 0.01, delta=0.002)
@@ -0,0 +1,73 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, make_password
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from auth.hashing import HashingPool, PasswordHashingBusy, acheck_password, amake_password, hashing_pool
+
+
+class HashingPoolTest(SimpleTestCase):
+    """
+    Test suite for the bounded password hashing pool.
+    """
+
+    def test_hashes_on_the_pool(self):
+        threads = []
+        encode = PBKDF2PasswordHasher.encode
+
+        def record(hasher, *args):
+            threads.append(threading.current_thread().name)
+            return encode(hasher, *args)
+
+        with mock.patch.object(PBKDF2PasswordHasher, 'encode', record):
+            encoded = make_password("secret123")
+        self.assertTrue(encoded.startswith("pbkdf2_sha256$"))
+        self.assertTrue(threads[0].startswith("password-hashing"))
+        # the plain hasher verifies it: the stored format did not change
+        self.assertTrue(PBKDF2PasswordHasher().verify("secret123", encoded))
+
+    def test_full_queue_is_rejected(self):
+        pool = HashingPool(workers=1, max_queue=1)
+        release = threading.Event()
+        busy = [pool.submit(release.wait), pool.submit(release.wait)]
+        with self.assertRaises(PasswordHashingBusy):
+            pool.submit(release.wait)
+        self.assertEqual(pool.rejected, 1)
+        release.set()
+        for future in busy:
+            future.result()
+        # the slots are free again
+        self.assertTrue(pool.submit(lambda: True).result())
+
+    async def test_awaitable(self):
+        encoded = await amake_password("secret123")
+        self.assertTrue(await acheck_password("secret123", encoded))
+        self.assertFalse(await acheck_password("wrong", encoded))
+        self.assertTrue(check_password("secret123", encoded))
+
+
+class HashingBusyViewsTest(APITestCase):
+    """
+    Test suite for login and registration when the hashing queue is full.
+    """
+
+    def setUp(self):
+        User.objects.create_user(username="storm", password="pass12345")
+
+    def test_login_and_register_answer_503(self):
+        with mock.patch.object(hashing_pool(), 'submit', side_effect=PasswordHashingBusy):
+            response = self.client.post(reverse('jwt-login'), {"username": "storm", "password": "pass12345"}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(response["Retry-After"], "1")
+
+            response = self.client.post(reverse('register'), {"username": "new", "password": "pass12345"}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(User.objects.filter(username="new").exists())
+
+        response = self.client.post(reverse('jwt-login'), {"username": "storm", "password": "pass12345"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .blacklist import blacklist_filter
+
+# copied into the access token, where CachedJWTAuthentication reads them
+USER_CLAIMS = ("username", "email", "is_staff")
+
+
+class LoginRefreshToken(RefreshToken):
+    """
+    A refresh token carrying the user's username, email and staff flag, so
+    its access tokens authenticate without a database query. Its blacklist
+    check goes through the bloom filter in auth/blacklist.py.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+    def check_blacklist(self):
+        if blacklist_filter.is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
+
+
+class LoginTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    ``TokenRefreshSerializer`` that stamps the claims afresh from the user
+    row it loads, so a refreshed access token does not carry the username,
+    email or staff flag of the login for the whole refresh lifetime.
+    """
+
+    token_class = LoginRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        user = get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+        for claim in USER_CLAIMS:
+            refresh[claim] = getattr(user, claim)
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+
+        return data
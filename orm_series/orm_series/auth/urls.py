@@ -1,10 +1,12 @@
 from django.urls import path
-from .views import RegisterView, JWTLoginView, LogoutView, DashboardView, ProfileView
+from .views import RegisterView, JWTLoginView, JWTRefreshView, LogoutView, DashboardView, ProfileView, BlacklistFilterStats
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', JWTLoginView.as_view(), name='jwt-login'),
+    path('refresh/', JWTRefreshView.as_view(), name='jwt-refresh'),
     path('logout/', LogoutView.as_view(), name='logout'),
+    path('blacklist/stats/', BlacklistFilterStats.as_view(), name='blacklist-filter-stats'),
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
     path('profile/', ProfileView.as_view(), name='profile'),
 ]
@@ -1,10 +1,22 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenRefreshView
+
+from .blacklist import blacklist_filter
+from .hashing import PasswordHashingBusy
+from .tokens import LoginRefreshToken, LoginTokenRefreshSerializer
+
+def hashing_busy():
+    # the password hashing pool is full (auth/hashing.py)
+    return Response(
+        {"error": "Too many logins in progress, try again shortly."},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+    )
 
 # Register
 class RegisterView(APIView):
@@ -30,6 +42,8 @@ class RegisterView(APIView):
             # For now, we'll pass it as is.
             user = User.objects.create_user(username=username, password=password, email=email)
             return Response({"message": "User created successfully"}, status=status.HTTP_201_CREATED)
+        except PasswordHashingBusy:
+            return hashing_busy()
         except Exception as e:
             # Catch any other unexpected errors during user creation (e.g., database issues)
             # In a real application, you might log 'e' for debugging.
@@ -49,10 +63,14 @@ class JWTLoginView(APIView):
             return Response({"error": "Username and password are required."}, status=status.HTTP_400_BAD_REQUEST)
         # --- END ADDED VALIDATION CHECKS ---
 
-        user = authenticate(username=username, password=password)
+        try:
+            user = authenticate(username=username, password=password)
+        except PasswordHashingBusy:
+            return hashing_busy()
 
         if user:
-            refresh = RefreshToken.for_user(user)
+            # the access token carries username, email and is_staff, see auth/authentication.py
+            refresh = LoginRefreshToken.for_user(user)
             return Response({
                 "refresh": str(refresh),
                 "access": str(refresh.access_token),
@@ -62,11 +80,13 @@ class JWTLoginView(APIView):
 # Logout
 class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
+    require_database_user = True
 
     def post(self, request):
         try:
             refresh_token = request.data["refresh"]
-            token = RefreshToken(refresh_token)
+            # blacklisting also adds the token to this process's bloom filter
+            token = LoginRefreshToken(refresh_token)
             token.blacklist()
             return Response(status=status.HTTP_205_RESET_CONTENT)
         except Exception:
@@ -75,6 +95,19 @@ class LogoutView(APIView):
             # and return more specific error messages/status codes.
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
+# Refresh
+class JWTRefreshView(TokenRefreshView):
+    # blacklisted tokens are ruled out by the bloom filter in auth/blacklist.py
+    serializer_class = LoginTokenRefreshSerializer
+
+# Blacklist filter statistics
+class BlacklistFilterStats(APIView):
+    permission_classes = [IsAdminUser]
+    require_database_user = True
+
+    def get(self, request):
+        return Response(blacklist_filter.stats())
+
 # Dashboard
 class DashboardView(APIView):
     permission_classes = [IsAuthenticated]
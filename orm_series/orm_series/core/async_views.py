@@ -0,0 +1,189 @@
+"""
+Async variants of the read endpoints, served under ``/core/async/``.
+
+DRF's ``APIView`` is synchronous, so under ASGI (orm_series/asgi.py) every
+request to it holds a thread for its whole lifetime. These are Django async
+views that return the same JSON as their counterparts in core/views.py and
+reuse their serializers, paginators, response cache and ETags, but query with
+the async ORM (``aget``, ``acount``, ``async for``) and authenticate with
+``AsyncJWTAuthentication``, which loads the user without blocking.
+
+Django's async ORM still runs each query on a worker thread (the database
+drivers are synchronous); the event loop is only tied up while a query runs,
+not while a client is slow to send or read. They only render JSON.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from auth.authentication import AsyncJWTAuthentication
+
+from .caching import acached_data
+from .conditional import conditional_get
+from .filters import filter_restaurant
+from .models import Rating, Restaurant, RestaurantCount, Staff
+from .pagination import RatingPagination, RestaurantPagination
+from .serializers import RatingSerializer, RestaurantSerializer, StaffSerializer
+from .views import ListAllRestaurants, apaginated_data, restaurant_list_context, values_serializer
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    # the same bytes as a DRF Response rendered by JSONRenderer
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type=JSONRenderer.media_type)
+
+
+class AsyncAPIView(View):
+    """
+    The parts of ``APIView`` the read endpoints need, for async handlers:
+    handlers get a DRF ``Request`` (query_params, user) and API exceptions
+    become JSON error responses.
+    """
+    http_method_names = ['get', 'head', 'options']
+    authentication_class = AsyncJWTAuthentication
+    # the async counterpart of permission_classes = [IsAuthenticated]
+    authentication_required = False
+    # see auth/authentication.py
+    require_database_user = False
+    # see core.views.paginated_data
+    values_fast_path = False
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request, parser_context={'view': self, 'args': args, 'kwargs': kwargs})
+        request.accepted_renderer = JSONRenderer()
+        request.accepted_media_type = JSONRenderer.media_type
+        try:
+            await self.authenticate(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            return self.handle_exception(request, exc)
+
+    async def authenticate(self, request):
+        result = await self.authentication_class().aauthenticate(request)
+        if result is None:
+            if self.authentication_required:
+                raise NotAuthenticated()
+            request.user, request.auth = None, None
+            # DRF's default for anonymous requests
+            request._not_authenticated()
+        else:
+            request.user, request.auth = result
+
+    def handle_exception(self, request, exc):
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+        response = json_response(data, status=exc.status_code)
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            response["WWW-Authenticate"] = self.authentication_class().authenticate_header(request)
+        return response
+
+
+class AsyncListAllRestaurants(AsyncAPIView):
+    """
+    Async ``ListAllRestaurants``.
+    """
+    values_fast_path = True
+
+    @conditional_get(Restaurant, bypass=["include"])
+    async def get(self, request):
+        if "include" in request.query_params:
+            return json_response(await self.list_data(request))
+        # the pagination links point at the async URL, so it has its own entries
+        return json_response(await acached_data(
+            "async-restaurants", request, [Restaurant], lambda: self.list_data(request), versions=request.table_versions,
+        ))
+
+    async def list_data(self, request):
+        if "page" in request.query_params:
+            # the legacy page number paginator has no async API
+            return await sync_to_async(ListAllRestaurants().list_data)(request)
+        context, queryset = restaurant_list_context(request, Restaurant.objects.all())
+        paginator = RestaurantPagination()
+        data = await apaginated_data(paginator, request, queryset, RestaurantSerializer, context, values=self.values_fast_path)
+        return paginator.get_paginated_response(data).data
+
+
+class AsyncListAllRestaurantsOfGivenType(AsyncAPIView):
+    """
+    Async ``ListAllRestaurantsOfGivenType``.
+    """
+    values_fast_path = True
+
+    @conditional_get(Restaurant, bypass=["include"])
+    async def get(self, request):
+        type_code = request.query_params.get("type")
+        if not type_code:
+            return json_response({"error": "Query parameter 'type' is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        async def list_data():
+            context, restaurants = restaurant_list_context(request, Restaurant.objects.filter(restaurant_type=type_code).order_by("id"))
+            fast = values_serializer(RestaurantSerializer, context) if self.values_fast_path else None
+            if fast is None:
+                return RestaurantSerializer([r async for r in restaurants], many=True, context=context).data
+            return fast.to_representation([row async for row in fast.values(restaurants)])
+
+        if "include" in request.query_params:
+            return json_response(await list_data())
+        return json_response(await acached_data(
+            "restaurants-by-type", request, [Restaurant], list_data, versions=request.table_versions,
+        ))
+
+
+class AsyncCountTotalRestaurants(AsyncAPIView):
+    """
+    Async ``CountTotalRestaurants``.
+    """
+    @conditional_get(Restaurant)
+    async def get(self, request):
+        return json_response(await RestaurantCount.atotal())
+
+
+class AsyncStaffRestaurantListView(AsyncAPIView):
+    """
+    Async ``StaffRestaurantListView``.
+    """
+    values_fast_path = True
+
+    @conditional_get(Staff, Restaurant)
+    async def get(self, request, pk):
+        restaurants = Restaurant.objects.filter(staff__id=pk).order_by("id")
+        fast = values_serializer(RestaurantSerializer) if self.values_fast_path else None
+        if fast is None:
+            data = RestaurantSerializer([r async for r in restaurants], many=True).data
+        else:
+            data = fast.to_representation([row async for row in fast.values(restaurants)])
+        if not data and not await Staff.objects.filter(id=pk).aexists():
+            return json_response({"error": "Staff member not found"}, status=status.HTTP_404_NOT_FOUND)
+        return json_response(data)
+
+
+class AsyncRestaurantStaffListView(AsyncAPIView):
+    """
+    Async ``RestaurantStaffListView``.
+    """
+    @conditional_get(Staff, Restaurant)
+    async def get(self, request, pk):
+        # async for runs the prefetch too, still two queries
+        restaurant_staff = [
+            member async for member in
+            StaffSerializer.setup_eager_loading(Staff.objects.filter(restaurant__id=pk).order_by("id"))
+        ]
+        if not restaurant_staff and not await Restaurant.objects.filter(id=pk).aexists():
+            return json_response({"error": "Restaurant not found"}, status=status.HTTP_404_NOT_FOUND)
+        return json_response(StaffSerializer(restaurant_staff, many=True).data)
+
+
+class AsyncMyRatings(AsyncAPIView):
+    """
+    Async ``MyRatings``.
+    """
+    authentication_required = True
+    values_fast_path = True
+
+    async def get(self, request):
+        ratings = filter_restaurant(Rating.objects.filter(user_id=request.user.id), request)
+        paginator = RatingPagination()
+        data = await apaginated_data(paginator, request, ratings, RatingSerializer, values=self.values_fast_path)
+        return json_response(paginator.get_paginated_response(data).data)
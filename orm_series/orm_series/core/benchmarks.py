@@ -0,0 +1,157 @@
+"""
+Helpers shared by the ``bench_*`` management commands.
+
+Benchmarks never touch the project database: they run inside a throwaway
+test database created the same way the test runner does it.
+"""
+import http.client
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connection
+
+try:
+    import uvicorn
+except ImportError:
+    uvicorn = None
+
+
+@contextmanager
+def scratch_database(verbosity=0):
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+def timed(func, repeat):
+    """
+    Call ``func`` ``repeat`` times and return the durations in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(durations):
+    """
+    p50/p95/p99/mean in milliseconds.
+    """
+    return {
+        'p50_ms': percentile(durations, 50) * 1000,
+        'p95_ms': percentile(durations, 95) * 1000,
+        'p99_ms': percentile(durations, 99) * 1000,
+        'mean_ms': sum(durations) / len(durations) * 1000 if durations else 0.0,
+    }
+
+
+def format_summary(label, durations):
+    stats = summarize(durations)
+    return (
+        f"{label:<28} p50 {stats['p50_ms']:9.3f} ms   p95 {stats['p95_ms']:9.3f} ms   "
+        f"p99 {stats['p99_ms']:9.3f} ms   mean {stats['mean_ms']:9.3f} ms"
+    )
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_wsgi_server(app):
+    """
+    Serve ``app`` with Django's threaded WSGI server on a free local port
+    from a background thread. Stop it with ``server.shutdown()`` and
+    ``server.server_close()``.
+    """
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler, allow_reuse_address=False)
+    server.set_app(app)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, server.server_address[1]
+
+
+def start_asgi_server(app):
+    """
+    Serve ``app`` with uvicorn on a free local port from a background thread.
+    Stop it with ``server.should_exit = True`` and ``thread.join()``.
+    """
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    config = uvicorn.Config(app, lifespan='off', log_level='warning', access_log=False)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread, sock.getsockname()[1]
+
+
+def http_request(port, method, path, body=None, headers=None):
+    """
+    One request on a new connection; returns the status once the whole body
+    has been read.
+    """
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+    try:
+        headers = dict(headers or {})
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def compare_reports(old, new, threshold=0.2, min_delta_ms=1.0):
+    """
+    The regressions of report ``new`` against report ``old`` (both written by
+    ``bench_endpoints``), one line each. Latency and allocations regress when
+    they grow by more than ``threshold`` (a fraction) and latency by at least
+    ``min_delta_ms`` as well, so sub-millisecond noise is not flagged;
+    throughput when it drops by more than ``threshold``. Any extra query or
+    unexpected status is a regression.
+    """
+    regressions = []
+    for endpoint, drivers in sorted(new['results'].items()):
+        before = old['results'].get(endpoint)
+        if before is None:
+            continue
+        for driver, current in sorted(drivers.items()):
+            previous = before.get(driver)
+            if not previous or not current:
+                continue
+            label = f"{endpoint} [{driver}]"
+            p95, was = current['p95_ms'], previous['p95_ms']
+            if p95 > was * (1 + threshold) and p95 - was >= min_delta_ms:
+                regressions.append(f"{label}: p95 {was:.2f} ms -> {p95:.2f} ms")
+            if current['throughput'] < previous['throughput'] * (1 - threshold):
+                regressions.append(
+                    f"{label}: throughput {previous['throughput']:.1f} -> {current['throughput']:.1f} req/s"
+                )
+            if current['errors'] > previous['errors']:
+                regressions.append(f"{label}: unexpected statuses {previous['errors']} -> {current['errors']}")
+            if 'queries' in current and current['queries'] > previous.get('queries', current['queries']):
+                regressions.append(f"{label}: queries {previous['queries']} -> {current['queries']}")
+            peak, was_peak = current.get('alloc_peak_kib'), previous.get('alloc_peak_kib')
+            if peak is not None and was_peak is not None and peak > was_peak * (1 + threshold) and peak - was_peak >= 1:
+                regressions.append(f"{label}: peak allocations {was_peak:.1f} KiB -> {peak:.1f} KiB")
+    return regressions
@@ -0,0 +1,162 @@
+"""
+Response cache keyed on per-table versions.
+
+Every write to a cached table bumps its row in ``TableVersion`` (see
+core/signals.py), and cache keys embed the versions of the tables a response
+was built from. A write therefore makes older entries unreachable at once:
+nothing is deleted, nothing waits for a TTL, and the stale entries age out of
+the cache backend on their own. Versions live in the database rather than in
+the cache, so every worker process sees a bump even when each keeps its own
+LocMem cache.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import TableVersion
+
+
+# views using the response cache, reported by cache_stats()
+CACHED_VIEWS = ('restaurants', 'restaurants-by-type', 'async-restaurants')
+
+
+def response_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def table_name(model):
+    return model._meta.db_table
+
+
+def bump_version(*models):
+    """
+    Mark the tables of ``models`` as changed. Runs in the caller's
+    transaction, so a rolled back write does not bump anything.
+    """
+    now = timezone.now()
+    for model in models:
+        table = table_name(model)
+        if TableVersion.objects.filter(table=table).update(version=F('version') + 1, modified=now):
+            continue
+        try:
+            with transaction.atomic():
+                TableVersion.objects.create(table=table, version=1, modified=now)
+        except IntegrityError:
+            TableVersion.objects.filter(table=table).update(version=F('version') + 1, modified=now)
+
+
+def table_versions(*models):
+    """
+    ``{table: (version, modified)}`` for ``models`` in one query; a table that
+    was never written to has version 0 and no modification time.
+    """
+    tables = [table_name(model) for model in models]
+    found = {
+        row.table: (row.version, row.modified)
+        for row in TableVersion.objects.filter(table__in=tables)
+    }
+    return {table: found.get(table, (0, None)) for table in tables}
+
+
+async def atable_versions(*models):
+    tables = [table_name(model) for model in models]
+    found = {
+        row.table: (row.version, row.modified)
+        async for row in TableVersion.objects.filter(table__in=tables)
+    }
+    return {table: found.get(table, (0, None)) for table in tables}
+
+
+def version_tag(versions):
+    # the modification time keeps keys unique even if a restored database
+    # starts counting versions again from an older number
+    return ".".join(
+        f"{version}-{modified.timestamp() if modified else 0}" for version, modified in versions.values()
+    )
+
+
+def response_key(name, request, versions):
+    params = sorted((key, value) for key, values in request.query_params.lists() for value in values)
+    # pagination links are absolute, so the host is part of the response
+    digest = hashlib.sha256(repr((request.get_host(), params)).encode()).hexdigest()[:32]
+    return f"response:{name}:{version_tag(versions)}:{digest}"
+
+
+def _count(name, outcome):
+    cache = response_cache()
+    key = f"response-stats:{name}:{outcome}"
+    # add() is a no-op if the counter exists; incr() is atomic on shared backends
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # evicted between add() and incr()
+        cache.add(key, 1, timeout=None)
+
+
+async def _acount(name, outcome):
+    cache = response_cache()
+    key = f"response-stats:{name}:{outcome}"
+    await cache.aadd(key, 0, timeout=None)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 1, timeout=None)
+
+
+def cached_data(name, request, models, build, versions=None):
+    """
+    The response data of ``build()`` for this request, from the cache when
+    none of ``models`` changed since it was stored. Pass ``versions`` when the
+    caller already read them for ``models``.
+    """
+    if versions is None:
+        versions = table_versions(*models)
+    cache = response_cache()
+    key = response_key(name, request, versions)
+    data = cache.get(key)
+    if data is not None:
+        _count(name, 'hits')
+        return data
+    _count(name, 'misses')
+    data = build()
+    cache.set(key, data, timeout=None)
+    return data
+
+
+async def acached_data(name, request, models, build, versions=None):
+    """
+    ``cached_data`` for async views; ``build`` is a coroutine function.
+    Entries are shared with the sync views of the same ``name``.
+    """
+    if versions is None:
+        versions = await atable_versions(*models)
+    cache = response_cache()
+    key = response_key(name, request, versions)
+    data = await cache.aget(key)
+    if data is not None:
+        await _acount(name, 'hits')
+        return data
+    await _acount(name, 'misses')
+    data = await build()
+    await cache.aset(key, data, timeout=None)
+    return data
+
+
+def cache_stats():
+    cache = response_cache()
+    stats = {}
+    for name in CACHED_VIEWS:
+        hits = cache.get(f"response-stats:{name}:hits", 0)
+        misses = cache.get(f"response-stats:{name}:misses", 0)
+        total = hits + misses
+        stats[name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else None,
+        }
+    return stats
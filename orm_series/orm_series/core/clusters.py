@@ -0,0 +1,142 @@
+"""
+Multi-resolution restaurant counts for map viewports.
+
+At zoom ``z`` the map is cut into ``2**z`` x ``2**z`` equirectangular cells and
+RestaurantGridAggregate holds, per cell and restaurant type, how many
+restaurants fall inside plus the sums of their coordinates (for the cluster
+centroid). Every zoom level from 0 to MAX_ZOOM is updated when a restaurant is
+added, moved or removed, so a viewport costs one indexed range read whose size
+depends on the number of visible cells only.
+"""
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .caching import bump_version
+from .models import Restaurant, RestaurantGridAggregate
+from .utils import bulk_increment_or_create, increment_or_create
+
+
+MAX_ZOOM = 12
+
+# largest number of cells a single viewport request may cover
+MAX_VIEWPORT_CELLS = 4096
+
+
+def cell_of(lat, lon, zoom):
+    side = 2 ** zoom
+    x = min(side - 1, max(0, int(math.floor((lon + 180) / 360 * side))))
+    y = min(side - 1, max(0, int(math.floor((lat + 90) / 180 * side))))
+    return x, y
+
+
+def restaurant_deltas(restaurants, sign=1):
+    """
+    Sum the aggregate changes for ``(latitude, longitude, restaurant_type)``
+    tuples into one delta per row, so a batch costs one UPDATE per touched cell.
+    """
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+    for lat, lon, restaurant_type in restaurants:
+        for zoom in range(MAX_ZOOM + 1):
+            x, y = cell_of(lat, lon, zoom)
+            delta = deltas[(zoom, x, y, restaurant_type)]
+            delta[0] += sign
+            delta[1] += sign * lat
+            delta[2] += sign * lon
+    return deltas
+
+
+def apply_deltas(deltas):
+    # cells that gain restaurants are upserted together. Any other change (a
+    # removal, or a move inside one cell) is to a row that already exists, and a
+    # missing one (during a cascade) must not be created
+    gains = {}
+    for (zoom, x, y, restaurant_type), (count, lat_sum, lon_sum) in deltas.items():
+        if count > 0:
+            gains[(zoom, y, x, restaurant_type)] = {'count': count, 'latitude_sum': lat_sum, 'longitude_sum': lon_sum}
+        elif count < 0 or lat_sum or lon_sum:
+            increment_or_create(
+                RestaurantGridAggregate,
+                {'zoom': zoom, 'cell_x': x, 'cell_y': y, 'restaurant_type': restaurant_type},
+                create=False,
+                count=count,
+                latitude_sum=lat_sum,
+                longitude_sum=lon_sum,
+            )
+    bulk_increment_or_create(RestaurantGridAggregate, ('zoom', 'cell_y', 'cell_x', 'restaurant_type'), gains)
+
+
+def record_restaurants(restaurants, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) restaurants given as
+    ``(latitude, longitude, restaurant_type)`` tuples.
+    """
+    apply_deltas(restaurant_deltas(restaurants, sign))
+
+
+def rebuild_clusters(batch_size=1000):
+    """
+    Recompute every aggregate from the Restaurant table.
+    """
+    rows = Restaurant.objects.values_list('latitude', 'longitude', 'restaurant_type').iterator(chunk_size=5000)
+    deltas = restaurant_deltas(rows)
+    aggregates = [
+        RestaurantGridAggregate(
+            zoom=zoom, cell_x=x, cell_y=y, restaurant_type=restaurant_type,
+            count=count, latitude_sum=lat_sum, longitude_sum=lon_sum,
+        )
+        for (zoom, x, y, restaurant_type), (count, lat_sum, lon_sum) in deltas.items()
+    ]
+    with transaction.atomic():
+        RestaurantGridAggregate.objects.all().delete()
+        RestaurantGridAggregate.objects.bulk_create(aggregates, batch_size=batch_size)
+        # cluster responses are validated against the restaurant table version
+        bump_version(Restaurant)
+    return len(aggregates)
+
+
+def viewport_columns(min_lon, max_lon, zoom):
+    """
+    Column ranges of a viewport; one that crosses the antimeridian
+    (``min_lon > max_lon``) is split in two.
+    """
+    if min_lon <= max_lon:
+        return [(cell_of(0, min_lon, zoom)[0], cell_of(0, max_lon, zoom)[0])]
+    return [
+        (cell_of(0, min_lon, zoom)[0], 2 ** zoom - 1),
+        (0, cell_of(0, max_lon, zoom)[0]),
+    ]
+
+
+def viewport_cell_count(min_lat, min_lon, max_lat, max_lon, zoom):
+    rows = cell_of(max_lat, 0, zoom)[1] - cell_of(min_lat, 0, zoom)[1] + 1
+    columns = sum(last - first + 1 for first, last in viewport_columns(min_lon, max_lon, zoom))
+    return rows * columns
+
+
+def viewport_clusters(min_lat, min_lon, max_lat, max_lon, zoom, by_type=False):
+    """
+    One cluster per non-empty cell (and type, when ``by_type``) in the viewport.
+    """
+    y_first, y_last = cell_of(min_lat, 0, zoom)[1], cell_of(max_lat, 0, zoom)[1]
+    clusters = []
+    for x_first, x_last in viewport_columns(min_lon, max_lon, zoom):
+        cells = RestaurantGridAggregate.objects.filter(
+            zoom=zoom, cell_y__range=(y_first, y_last), cell_x__range=(x_first, x_last), count__gt=0,
+        )
+        group = ['cell_x', 'cell_y', 'restaurant_type'] if by_type else ['cell_x', 'cell_y']
+        for row in cells.values(*group).annotate(
+            total=Sum('count'), lat_sum=Sum('latitude_sum'), lon_sum=Sum('longitude_sum')
+        ).order_by(*group):
+            cluster = {
+                'cell': [row['cell_x'], row['cell_y']],
+                'count': row['total'],
+                'latitude': row['lat_sum'] / row['total'],
+                'longitude': row['lon_sum'] / row['total'],
+            }
+            if by_type:
+                cluster['restaurant_type'] = row['restaurant_type']
+            clusters.append(cluster)
+    return clusters
@@ -0,0 +1,91 @@
+"""
+Conditional GET for read endpoints.
+
+The ``ETag`` and ``Last-Modified`` of a response come from the ``TableVersion``
+rows of the tables it is built from (see core/caching.py), so validating a
+client's copy costs one primary key lookup. When ``If-None-Match`` or
+``If-Modified-Since`` matches, the view answers ``304 Not Modified`` without
+running its own queries or the serializer.
+"""
+import functools
+import hashlib
+import inspect
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .caching import atable_versions, table_versions, version_tag
+
+
+def response_etag(view, request, kwargs, versions):
+    """
+    A strong validator: it changes whenever the data, the request or the
+    chosen representation could change the response bytes.
+    """
+    params = sorted((key, value) for key, values in request.query_params.lists() for value in values)
+    renderer = getattr(request, 'accepted_media_type', None)
+    # pagination links are absolute, so the host is part of the response
+    identity = (type(view).__name__, sorted(kwargs.items()), params, renderer, request.get_host())
+    digest = hashlib.sha256(repr((identity, version_tag(versions))).encode()).hexdigest()[:32]
+    return quote_etag(digest)
+
+
+def last_modified(versions):
+    # unknown while any of the tables has never been written to
+    stamps = [modified for _, modified in versions.values()]
+    if not stamps or None in stamps:
+        return None
+    # HTTP dates have one second resolution; clients that need to see every
+    # write within a second revalidate with the ETag instead
+    return int(max(stamps).timestamp())
+
+
+def conditional_get(*models, bypass=()):
+    """
+    Decorate an ``APIView.get`` (or the async ``get`` of a view in
+    core/async_views.py) whose response depends only on ``models`` and the
+    request. Requests carrying any of the ``bypass`` query parameters read
+    other tables and are served without validators.
+
+    The versions are stored on ``request.table_versions`` so the view can pass
+    them to ``cached_data`` instead of reading them again.
+    """
+    def validate(view, request, kwargs, versions):
+        request.table_versions = versions
+        etag = response_etag(view, request, kwargs, versions)
+        modified = last_modified(versions)
+        not_modified = get_conditional_response(request._request, etag=etag, last_modified=modified)
+        return etag, modified, not_modified
+
+    def add_validators(response, etag, modified):
+        response['ETag'] = etag
+        if modified is not None:
+            response['Last-Modified'] = http_date(modified)
+        return response
+
+    def decorator(get):
+        if inspect.iscoroutinefunction(get):
+            @functools.wraps(get)
+            async def async_wrapper(view, request, *args, **kwargs):
+                if any(param in request.query_params for param in bypass):
+                    return await get(view, request, *args, **kwargs)
+                etag, modified, response = validate(view, request, kwargs, await atable_versions(*models))
+                if response is None:
+                    response = await get(view, request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                return add_validators(response, etag, modified)
+            return async_wrapper
+
+        @functools.wraps(get)
+        def wrapper(view, request, *args, **kwargs):
+            if any(param in request.query_params for param in bypass):
+                return get(view, request, *args, **kwargs)
+            etag, modified, response = validate(view, request, kwargs, table_versions(*models))
+            if response is None:
+                response = get(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            return add_validators(response, etag, modified)
+        return wrapper
+    return decorator
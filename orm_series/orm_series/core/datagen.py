@@ -0,0 +1,127 @@
+"""
+Synthetic data for load testing, used by the ``create_data`` command.
+
+Rows are produced in fixed-size chunks, each from its own ``random.Random``
+seeded with ``(seed, kind, chunk index)``, so the output depends only on the
+seed, the counts and the chunk size, never on how many worker processes
+generated it. The
+module imports nothing from Django: chunks are plain tuples that can be built
+in a process pool and turned into model instances by the caller.
+
+Popularity is Zipf distributed (a few restaurants get most of the sales and
+ratings) and sale times follow a lunch/dinner daily curve.
+"""
+import itertools
+import random
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+
+# centres restaurants are scattered around (the cities of the original sample data)
+CITIES = [
+    (55.8642, -4.2518), (55.9533, -3.1883), (51.5099, -0.1181), (53.4840, -2.2446),
+    (53.4000, -2.9833), (55.0709, -3.6051), (53.3501, -6.2662), (51.4816, -3.1791),
+    (54.9667, -1.6000), (48.8566, 2.3522), (41.9028, 12.4964),
+]
+
+# relative share of sales per hour of the day (UTC), peaking at lunch and dinner
+DIURNAL_WEIGHTS = [
+    1, 1, 1, 1, 1, 1, 2, 4, 6, 5, 5, 9,
+    16, 15, 8, 5, 5, 8, 14, 18, 16, 10, 5, 2,
+]
+
+# share of 1..5 star ratings
+RATING_WEIGHTS = [5, 8, 20, 35, 32]
+
+_context = {}
+
+
+def zipf_cum_weights(count, exponent, rng):
+    """
+    Cumulative Zipf weights for ``count`` items in shuffled order, ready for
+    ``random.choices(cum_weights=...)``. Shuffling keeps popularity unrelated
+    to the primary key.
+    """
+    weights = [1 / rank ** exponent for rank in range(1, count + 1)]
+    rng.shuffle(weights)
+    return list(itertools.accumulate(weights))
+
+
+def set_context(context):
+    """
+    Share the restaurant ids, their popularity and the user ids with the
+    chunk generators. Also used as the process pool initializer.
+    """
+    _context.clear()
+    _context.update(context)
+
+
+def restaurant_rows(rng, count, start):
+    types = _context['restaurant_types']
+    today = _context['today']
+    rows = []
+    for number in range(start, start + count):
+        code, label = types[number % len(types)]
+        lat, lon = rng.choice(CITIES)
+        rows.append((
+            f"{label} {number + 1}",
+            today - timedelta(days=rng.randint(1, 5 * 365)),
+            max(-90.0, min(90.0, rng.gauss(lat, 0.05))),
+            max(-180.0, min(180.0, rng.gauss(lon, 0.05))),
+            code,
+        ))
+    return rows
+
+
+def sale_rows(rng, count, start):
+    first_day = datetime.combine(_context['today'], datetime.min.time(), tzinfo=timezone.utc) - timedelta(days=_context['days'])
+    restaurants = rng.choices(_context['restaurant_ids'], cum_weights=_context['popularity'], k=count)
+    hours = rng.choices(range(24), weights=DIURNAL_WEIGHTS, k=count)
+    days = _context['days']
+    return [
+        (
+            restaurant_id,
+            Decimal('%.2f' % min(999999.99, rng.lognormvariate(3.2, 0.5))),
+            first_day + timedelta(days=rng.randrange(days), hours=hour, seconds=rng.randrange(3600)),
+        )
+        for restaurant_id, hour in zip(restaurants, hours)
+    ]
+
+
+def rating_rows(rng, count, start):
+    restaurants = rng.choices(_context['restaurant_ids'], cum_weights=_context['popularity'], k=count)
+    users = rng.choices(_context['user_ids'], k=count)
+    stars = rng.choices(range(1, 6), weights=RATING_WEIGHTS, k=count)
+    return list(zip(users, restaurants, stars))
+
+
+def staff_rows(rng, count, start):
+    restaurant_ids = _context['restaurant_ids']
+    return [
+        (f"Staff {number + 1}", rng.sample(restaurant_ids, min(len(restaurant_ids), rng.randint(1, 3))))
+        for number in range(start, start + count)
+    ]
+
+
+GENERATORS = {
+    'restaurants': restaurant_rows,
+    'sales': sale_rows,
+    'ratings': rating_rows,
+    'staff': staff_rows,
+}
+
+
+def chunks(kind, total, chunk_size):
+    """
+    ``(kind, index, start, count)`` tasks covering ``total`` rows.
+    """
+    return [
+        (kind, index, start, min(chunk_size, total - start))
+        for index, start in enumerate(range(0, total, chunk_size))
+    ]
+
+
+def generate_chunk(seed, task):
+    kind, index, start, count = task
+    rng = random.Random(f"{seed}:{kind}:{index}")
+    return GENERATORS[kind](rng, count, start)
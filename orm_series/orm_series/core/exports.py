@@ -0,0 +1,117 @@
+import csv
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from .models import Rating, Sale
+
+
+# rows are read from the database this many at a time
+EXPORT_CHUNK_SIZE = 2000
+
+# encoded lines are joined into blocks of roughly this size before being sent
+EXPORT_BLOCK_SIZE = 64 * 1024
+
+# dataset name -> (model, exported columns, date column used by start/end, ordering)
+# the ordering matches an index so the first rows are found without sorting the table
+EXPORT_DATASETS = {
+    'sales': (Sale, ('id', 'restaurant_id', 'income', 'datetime'), 'datetime', ('datetime', 'id')),
+    'ratings': (Rating, ('id', 'user_id', 'restaurant_id', 'rating'), None, ('id',)),
+}
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def export_rows(dataset, start=None, end=None, restaurant_id=None):
+    """
+    Return a lazy iterator of value tuples for ``dataset``.
+
+    ``values_list`` skips model instantiation and ``iterator()`` keeps only one
+    chunk in memory, so the cost of an export does not grow with the table.
+    """
+    model, fields, date_field, ordering = EXPORT_DATASETS[dataset]
+    queryset = model.objects.all()
+    if date_field is not None:
+        if start is not None:
+            queryset = queryset.filter(**{f'{date_field}__gte': start})
+        if end is not None:
+            queryset = queryset.filter(**{f'{date_field}__lt': end})
+    if restaurant_id is not None:
+        queryset = queryset.filter(restaurant_id=restaurant_id)
+    return queryset.order_by(*ordering).values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def _to_text(value):
+    # same textual forms the API serializers use
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + 'Z' if text.endswith('+00:00') else text
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def ndjson_lines(rows, fields):
+    for row in rows:
+        record = dict(zip(fields, map(_to_text, row)))
+        yield json.dumps(record, separators=(',', ':')) + '\n'
+
+
+class _Echo:
+    """
+    File-like object for csv.writer that returns the line instead of storing it.
+    """
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([_to_text(value) for value in row])
+
+
+def encode_blocks(lines, block_size=EXPORT_BLOCK_SIZE):
+    """
+    Join text lines into byte blocks so the server is not flushing tiny writes.
+    """
+    buffer = []
+    size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= block_size:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def gzip_blocks(blocks):
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for block in blocks:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(dataset, output='ndjson', compress=False, **filters):
+    """
+    Byte stream for a whole export, ready for a StreamingHttpResponse or a file.
+    """
+    _, fields, _, _ = EXPORT_DATASETS[dataset]
+    rows = export_rows(dataset, **filters)
+    lines = csv_lines(rows, fields) if output == 'csv' else ndjson_lines(rows, fields)
+    blocks = encode_blocks(lines)
+    return gzip_blocks(blocks) if compress else blocks
@@ -0,0 +1,89 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from rest_framework.exceptions import ValidationError
+
+
+def parse_bound(value, param, end=False):
+    """
+    Parse an ISO date or datetime query parameter into an aware datetime.
+
+    A bare date used as an ``end`` bound covers the whole day, so it is moved
+    to midnight of the following day (the range end is always exclusive).
+    """
+    try:
+        # check the bare date form first, parse_datetime also accepts it
+        day = parse_date(value)
+        if day is not None:
+            if end:
+                day += timedelta(days=1)
+            parsed = datetime.combine(day, time.min)
+        else:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                raise ValueError
+    except ValueError:
+        raise ValidationError({param: "Expected an ISO 8601 date or datetime."})
+
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_date_range(queryset, request, field):
+    """
+    Apply ``?start=`` (inclusive) and ``?end=`` (exclusive) to ``field``.
+    Both bounds turn into a single range condition the index can seek on.
+    """
+    start = request.query_params.get("start")
+    end = request.query_params.get("end")
+    if start:
+        queryset = queryset.filter(**{f"{field}__gte": parse_bound(start, "start")})
+    if end:
+        queryset = queryset.filter(**{f"{field}__lt": parse_bound(end, "end", end=True)})
+    return queryset
+
+
+# the largest id a 64-bit signed integer column holds; SQLite raises
+# OverflowError on anything bigger
+MAX_ID = 2 ** 63 - 1
+
+
+def parse_id(value):
+    """
+    ``value`` as a primary key, from an int or a string of ASCII digits, or
+    None when it is neither or out of range.
+    """
+    if isinstance(value, str):
+        # str.isdigit() also accepts digits such as "²" that int() rejects
+        if not (value.isascii() and value.isdigit()):
+            return None
+        value = int(value)
+    elif not isinstance(value, int) or isinstance(value, bool):
+        return None
+    return value if 0 < value <= MAX_ID else None
+
+
+def restaurant_param(request):
+    """
+    The ``?restaurant=<id>`` query parameter as an int, or None when absent.
+    """
+    restaurant_id = request.query_params.get("restaurant")
+    if restaurant_id is None:
+        return None
+    restaurant_id = parse_id(restaurant_id)
+    if restaurant_id is None:
+        raise ValidationError({"restaurant": "Expected a restaurant id."})
+    return restaurant_id
+
+
+def filter_restaurant(queryset, request):
+    """
+    Apply ``?restaurant=<id>`` as an equality on the foreign key column.
+    """
+    restaurant_id = restaurant_param(request)
+    if restaurant_id is None:
+        return queryset
+    return queryset.filter(restaurant_id=restaurant_id)
@@ -0,0 +1,113 @@
+"""
+Grid index and haversine helpers for location queries.
+
+The globe is cut into CELL_DEGREES x CELL_DEGREES cells numbered row by row
+(``row * COLUMNS + column``), and every restaurant stores the number of its
+cell in the indexed ``Restaurant.grid_cell`` column. Cells of one row are
+consecutive numbers, so the cells covering a search circle turn into one
+``BETWEEN`` range per row that the B-tree index can seek on. Candidates from
+those cells are then filtered and sorted by their exact haversine distance.
+"""
+import heapq
+import math
+
+from django.db.models import Q
+
+
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEGREES = 0.1
+COLUMNS = int(round(360 / CELL_DEGREES))
+ROWS = int(round(180 / CELL_DEGREES))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _row(lat):
+    return min(ROWS - 1, max(0, int((lat + 90) // CELL_DEGREES)))
+
+
+def _column(lon):
+    return min(COLUMNS - 1, max(0, int((lon + 180) // CELL_DEGREES)))
+
+
+def grid_cell(lat, lon):
+    return _row(lat) * COLUMNS + _column(lon)
+
+
+def cell_ranges(lat, lon, radius_km):
+    """
+    Inclusive ``(first, last)`` cell number ranges covering the circle.
+
+    Uses the exact bounding box of a spherical cap: the latitude band is
+    ``lat +/- d`` and the longitude half-width is ``asin(sin d / cos lat)``,
+    or the whole row when the cap reaches a pole.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    lat_delta = math.degrees(angular)
+    lat_lo, lat_hi = lat - lat_delta, lat + lat_delta
+
+    if lat_lo <= -90 or lat_hi >= 90 or angular >= math.pi / 2:
+        lon_spans = [(0, COLUMNS - 1)]
+    else:
+        lon_delta = math.degrees(math.asin(min(1.0, math.sin(angular) / math.cos(math.radians(lat)))))
+        lon_lo, lon_hi = lon - lon_delta, lon + lon_delta
+        if lon_hi - lon_lo >= 360:
+            lon_spans = [(0, COLUMNS - 1)]
+        elif lon_lo < -180:
+            lon_spans = [(0, _column(lon_hi)), (_column(lon_lo + 360), COLUMNS - 1)]
+        elif lon_hi > 180:
+            lon_spans = [(0, _column(lon_hi - 360)), (_column(lon_lo), COLUMNS - 1)]
+        else:
+            lon_spans = [(_column(lon_lo), _column(lon_hi))]
+
+    ranges = []
+    for row in range(_row(max(-90, lat_lo)), _row(min(90, lat_hi)) + 1):
+        for first, last in lon_spans:
+            start, end = row * COLUMNS + first, row * COLUMNS + last
+            # whole rows are consecutive numbers, merge them into one range
+            if ranges and ranges[-1][1] + 1 == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+    return ranges
+
+
+def nearest(candidates, lat, lon, radius_km, k):
+    """
+    The ``k`` closest ``(id, lat, lon)`` candidates within ``radius_km``,
+    as ``(distance_km, id)`` pairs sorted by distance.
+    """
+    within = []
+    for pk, c_lat, c_lon in candidates:
+        distance = haversine_km(lat, lon, c_lat, c_lon)
+        if distance <= radius_km:
+            within.append((distance, pk))
+    return heapq.nsmallest(k, within)
+
+
+def search(queryset, lat, lon, radius_km, k, initial_radius_km=1.0):
+    """
+    Up to ``k`` restaurants of ``queryset`` nearest to (lat, lon) within
+    ``radius_km``, as ``(distance_km, id)`` pairs.
+
+    Starts with a small circle and widens it until ``k`` hits are found, so a
+    dense area never reads more than a few cells. Only ids and coordinates are
+    fetched here; the caller loads the ``k`` full rows.
+    """
+    radius = min(initial_radius_km, radius_km)
+    while True:
+        cells = Q()
+        for first, last in cell_ranges(lat, lon, radius):
+            cells |= Q(grid_cell__range=(first, last))
+        candidates = queryset.filter(cells).values_list('id', 'latitude', 'longitude')
+        found = nearest(candidates, lat, lon, radius, k)
+        if len(found) >= k or radius >= radius_km:
+            return found
+        radius = min(radius * 4, radius_km)
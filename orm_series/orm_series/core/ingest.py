@@ -0,0 +1,89 @@
+"""
+Bulk restaurant ingestion.
+
+Rows are validated a batch at a time by ``RestaurantSerializer(many=True)``
+and the valid ones are written with one ``bulk_create`` per batch. Because
+``bulk_create`` skips ``Restaurant.save()`` and the post_save signals, the
+grid cell, the map cluster aggregates, the restaurant counts and the table
+version are updated here.
+"""
+from contextlib import nullcontext
+from itertools import islice
+
+from django.db import transaction
+
+from . import clusters
+from .caching import bump_version
+from .geo import grid_cell
+from .models import Restaurant, RestaurantCount
+from .serializers import RestaurantSerializer
+
+
+def bulk_create_restaurants(restaurants, batch_size=None):
+    """
+    ``bulk_create`` restaurants and keep the data derived from their location
+    current. Run it inside a transaction so both land together.
+    """
+    for restaurant in restaurants:
+        restaurant.grid_cell = grid_cell(restaurant.latitude, restaurant.longitude)
+    created = Restaurant.objects.bulk_create(restaurants, batch_size=batch_size)
+    clusters.record_restaurants((r.latitude, r.longitude, r.restaurant_type) for r in created)
+    RestaurantCount.record(r.restaurant_type for r in created)
+    bump_version(Restaurant)
+    return created
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def ingest_restaurants(rows, atomic=True, batch_size=1000, max_errors=1000):
+    """
+    Create restaurants from ``(row_number, data, error)`` items.
+
+    With ``atomic`` nothing is written unless every row is valid; otherwise
+    each batch commits its valid rows in its own transaction. Invalid rows are
+    reported by row number, the first ``max_errors`` of them in detail.
+    """
+    result = {"created": 0, "failed": 0, "errors": []}
+
+    def reject(number, errors):
+        result["failed"] += 1
+        if len(result["errors"]) < max_errors:
+            result["errors"].append({"row": number, "errors": errors})
+
+    with transaction.atomic() if atomic else nullcontext():
+        for batch in batches(rows, batch_size):
+            for number, _, error in batch:
+                if error is not None:
+                    reject(number, {"non_field_errors": [error]})
+            batch = [(number, data) for number, data, error in batch if error is None]
+
+            serializer = RestaurantSerializer(data=[data for _, data in batch], many=True)
+            if serializer.is_valid():
+                valid = serializer.validated_data
+            else:
+                # keyed by row index; older DRF versions return a list with {} for valid rows
+                errors = serializer.errors
+                if isinstance(errors, list):
+                    errors = dict(enumerate(errors))
+                valid = []
+                for index, (number, data) in enumerate(batch):
+                    if errors.get(index):
+                        reject(number, errors[index])
+                    else:
+                        valid.append(serializer.child.run_validation(data))
+
+            # once an atomic upload has failed, keep validating only to report every error
+            if valid and not (atomic and result["failed"]):
+                with transaction.atomic():
+                    bulk_create_restaurants([Restaurant(**data) for data in valid])
+                result["created"] += len(valid)
+
+        if atomic and result["failed"]:
+            transaction.set_rollback(True)
+            result["created"] = 0
+    result["errors_truncated"] = result["failed"] > len(result["errors"])
+    return result
@@ -0,0 +1,119 @@
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.asgi import get_asgi_application
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import format_summary, scratch_database, start_asgi_server, uvicorn
+from core.ingest import bulk_create_restaurants
+from core.models import Restaurant, Staff
+
+
+async def fetch(port, path, dribble=0.0, read_delay=0.0):
+    """
+    One HTTP/1.1 request. A slow client sends its request a few bytes at a
+    time over ``dribble`` seconds and sleeps ``read_delay`` between reads.
+    """
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    request = f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'.encode()
+    try:
+        if dribble:
+            chunks = [request[i:i + 8] for i in range(0, len(request), 8)]
+            for chunk in chunks:
+                writer.write(chunk)
+                await writer.drain()
+                await asyncio.sleep(dribble / len(chunks))
+        else:
+            writer.write(request)
+        status = None
+        while data := await reader.read(1024 if read_delay else 65536):
+            status = status or data.split(b' ', 2)[1]
+            if read_delay:
+                await asyncio.sleep(read_delay)
+        return status
+    finally:
+        writer.close()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the sync and async read endpoints under uvicorn with slow clients connected'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants', type=int, default=10_000)
+        parser.add_argument('--paths', default='allrestaurants?include=rating_summary,counttotalrestaurants,restaurant/1/staff/',
+                            help='comma separated paths below /core/ (and /core/async/)')
+        parser.add_argument('--slow-clients', type=int, default=200, help='connections held open by slow clients')
+        parser.add_argument('--dribble', type=float, default=1.0, help='seconds a slow client takes to send its request')
+        parser.add_argument('--read-delay', type=float, default=0.05, help='seconds a slow client waits between 1 KiB reads')
+        parser.add_argument('--requests', type=int, default=500, help='fast requests measured per path')
+        parser.add_argument('--concurrency', type=int, default=20, help='fast requests in flight at once')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if uvicorn is None:
+            raise CommandError('bench_async needs uvicorn: pip install uvicorn')
+
+        rng = random.Random(options['seed'])
+        paths = options['paths'].split(',')
+        with scratch_database():
+            restaurants = bulk_create_restaurants(
+                [
+                    Restaurant(
+                        name=f'Bench {i}', date_opened=date(2000, 1, 1) + timedelta(days=rng.randrange(9000)),
+                        latitude=rng.uniform(-80, 80), longitude=rng.uniform(-170, 170),
+                        restaurant_type=rng.choice(Restaurant.TypeChoices.values),
+                    )
+                    for i in range(options['restaurants'])
+                ],
+                batch_size=5000,
+            )
+            for i in range(20):
+                member = Staff.objects.create(name=f'Staff {i}')
+                member.restaurant.add(*rng.sample(restaurants, 5))
+            Staff.objects.first().restaurant.add(Restaurant.objects.first())
+
+            server, thread, port = start_asgi_server(get_asgi_application())
+            try:
+                for path in paths:
+                    for label, prefix in (('sync', '/core/'), ('async', '/core/async/')):
+                        self.run_case(port, prefix + path, f'{label} {path}', options)
+            finally:
+                server.should_exit = True
+                thread.join()
+
+    def run_case(self, port, path, label, options):
+        # measure the views, not the response cache
+        caches['responses'].clear()
+
+        async def case():
+            slow = [
+                asyncio.create_task(fetch(port, path, options['dribble'], options['read_delay']))
+                for _ in range(options['slow_clients'])
+            ]
+            # let the slow clients connect and start sending first
+            await asyncio.sleep(min(options['dribble'] / 2, 0.5))
+
+            durations, statuses = [], []
+            semaphore = asyncio.Semaphore(options['concurrency'])
+
+            async def probe():
+                async with semaphore:
+                    start = time.perf_counter()
+                    statuses.append(await fetch(port, path))
+                    durations.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(probe() for _ in range(options['requests'])))
+            elapsed = time.perf_counter() - start
+            slow_statuses = await asyncio.gather(*slow, return_exceptions=True)
+            return durations, statuses, elapsed, slow_statuses
+
+        durations, statuses, elapsed, slow_statuses = asyncio.run(case())
+        failed = sum(status != b'200' for status in statuses + slow_statuses)
+        self.stdout.write(
+            format_summary(label[:28], durations)
+            + f"   {len(durations) / elapsed:7.0f} req/s   {failed} failed"
+        )
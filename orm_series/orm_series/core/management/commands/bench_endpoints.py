@@ -0,0 +1,400 @@
+import io
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from auth import urls as auth_urls
+from auth.tokens import LoginRefreshToken
+from core import urls as core_urls
+from core.benchmarks import (
+    compare_reports, http_request, start_asgi_server, start_wsgi_server, scratch_database, summarize, uvicorn,
+)
+from core.models import Restaurant, Staff
+
+
+# rows per model (restaurants, sales, ratings, staff)
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+DRIVERS = ('client', 'wsgi', 'asgi')
+
+
+class Endpoint:
+    """
+    How to call one URL pattern. ``path`` and ``query`` are formatted with
+    the benchmark context (``{restaurant}``, ``{staff}``, ``{lat}``, ...);
+    ``body(context, number)`` returns the JSON body of request ``number``.
+    """
+
+    def __init__(self, path=None, method='GET', query='', body=None, auth=False, expect=(200,), max_requests=None):
+        self.path = path
+        self.method = method
+        self.query = query
+        self.body = body
+        self.auth = auth
+        self.expect = expect
+        self.max_requests = max_requests
+
+
+def rating(context, number):
+    return {'restaurant_id': context.values['restaurant'], 'rating': number % 5 + 1}
+
+
+def ratings(context, number):
+    return [{'restaurant_id': context.values['restaurant'], 'rating': (number + i) % 5 + 1} for i in range(10)]
+
+
+def restaurant(context, number):
+    return {
+        'name': f'Bench {next(context.numbers)}', 'date_opened': '2024-01-01',
+        'latitude': context.values['lat'], 'longitude': context.values['lon'],
+        'restaurant_type': context.values['type'],
+    }
+
+
+def restaurants(context, number):
+    return [restaurant(context, number) for _ in range(100)]
+
+
+def registration(context, number):
+    return {'username': f'bench_{next(context.numbers)}', 'password': 'bench-password'}
+
+
+# keyed by the full route; every route of core/urls.py and auth/urls.py needs one
+ENDPOINTS = {
+    'core/': Endpoint(),
+    'core/allrestaurants': Endpoint(),
+    'core/allrestaurantsbytype': Endpoint(query='type={type}'),
+    'core/allsales': Endpoint(auth=True),
+    'core/export/<str:dataset>': Endpoint('core/export/ratings', auth=True, max_requests=5),
+    'core/analytics/sales': Endpoint(auth=True),
+    'core/counttotalrestaurants': Endpoint(),
+    'core/countrestaurantsbytype': Endpoint(),
+    'core/allratings': Endpoint(auth=True),
+    'core/ratings/submit/': Endpoint(method='POST', body=rating, auth=True, expect=(200, 202)),
+    'core/ratings/submit/batch/': Endpoint(method='POST', body=ratings, auth=True, expect=(201,)),
+    'core/ratings/my-ratings/': Endpoint(auth=True),
+    'core/restaurant/<int:pk>/ratings/summary/': Endpoint('core/restaurant/{restaurant}/ratings/summary/'),
+    'core/staff/<int:pk>/restaurants/': Endpoint('core/staff/{staff}/restaurants/'),
+    'core/restaurant/<int:pk>/staff/': Endpoint('core/restaurant/{restaurant}/staff/'),
+    'core/restaurants/add/': Endpoint(method='POST', body=restaurant, expect=(201,)),
+    'core/restaurants/bulk/': Endpoint(method='POST', body=restaurants, auth=True, expect=(201,)),
+    'core/restaurants/nearby': Endpoint(query='lat={lat}&lon={lon}&radius_km=50'),
+    'core/restaurants/clusters': Endpoint(query='min_lat=-80&min_lon=-180&max_lat=80&max_lon=180&zoom=3'),
+    'core/cache/stats': Endpoint(auth=True),
+    'core/async/allrestaurants': Endpoint(),
+    'core/async/allrestaurantsbytype': Endpoint(query='type={type}'),
+    'core/async/counttotalrestaurants': Endpoint(),
+    'core/async/staff/<int:pk>/restaurants/': Endpoint('core/async/staff/{staff}/restaurants/'),
+    'core/async/restaurant/<int:pk>/staff/': Endpoint('core/async/restaurant/{restaurant}/staff/'),
+    'core/async/ratings/my-ratings/': Endpoint(auth=True),
+    # hashing a password takes a few hundred milliseconds by design
+    'auth/register/': Endpoint(method='POST', body=registration, expect=(201,), max_requests=5),
+    'auth/login/': Endpoint(method='POST', body=lambda context, number: {'username': 'admin', 'password': 'test'}, max_requests=5),
+    'auth/refresh/': Endpoint(method='POST', body=lambda context, number: {'refresh': context.refresh}),
+    'auth/logout/': Endpoint(method='POST', body=lambda context, number: {'refresh': context.new_refresh()}, auth=True, expect=(205,)),
+    'auth/blacklist/stats/': Endpoint(auth=True),
+    'auth/dashboard/': Endpoint(auth=True),
+    'auth/profile/': Endpoint(auth=True),
+}
+
+
+def routes():
+    """
+    Every route of core/urls.py and auth/urls.py, as mounted in
+    orm_series/urls.py.
+    """
+    return [
+        f'{prefix}{pattern.pattern}'
+        for prefix, module in (('core/', core_urls), ('auth/', auth_urls))
+        for pattern in module.urlpatterns
+    ]
+
+
+class BenchContext:
+    """
+    The ids, tokens and counters requests are built from.
+    """
+
+    def __init__(self):
+        self.admin = User.objects.get(username='admin')
+        popular = Restaurant.objects.order_by('id').first()
+        self.values = {
+            'restaurant': popular.id,
+            'staff': Staff.objects.filter(restaurant=popular).values_list('id', flat=True).first() or Staff.objects.first().id,
+            'lat': popular.latitude,
+            'lon': popular.longitude,
+            'type': popular.restaurant_type,
+        }
+        self.numbers = itertools.count(1)
+        self.refresh = str(LoginRefreshToken.for_user(self.admin))
+        self.renew()
+
+    def renew(self):
+        # access tokens live for minutes and a large run takes longer
+        self.access = str(LoginRefreshToken.for_user(self.admin).access_token)
+
+    def new_refresh(self):
+        return str(LoginRefreshToken.for_user(self.admin))
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks every core and auth endpoint through the test client and real WSGI and ASGI servers '
+        'on seeded data, writing a JSON report; --compare flags regressions between two reports'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='1k', help='rows per model')
+        parser.add_argument('--rows', type=int, help='rows per model, instead of --scale')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--requests', type=int, default=100, help='requests per endpoint and driver')
+        parser.add_argument('--concurrency', type=int, default=8, help='requests in flight at once against the servers')
+        parser.add_argument('--alloc-requests', type=int, default=5, help='requests per endpoint traced for allocations')
+        parser.add_argument('--drivers', default=','.join(DRIVERS), help=f"comma separated, from {', '.join(DRIVERS)}")
+        parser.add_argument('--only', help='only endpoints whose route contains this')
+        parser.add_argument('--output', default='bench-endpoints.json', help='where the report is written')
+        parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two reports instead of running')
+        parser.add_argument('--threshold', type=float, default=0.2, help='relative change flagged by --compare')
+        parser.add_argument('--min-delta-ms', type=float, default=1.0, help='smallest latency change flagged by --compare')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self.compare(*options['compare'], options)
+
+        missing = [route for route in routes() if route not in ENDPOINTS]
+        if missing:
+            raise CommandError(f"No benchmark for {', '.join(missing)}: add them to ENDPOINTS.")
+        drivers = options['drivers'].split(',')
+        unknown = set(drivers) - set(DRIVERS)
+        if unknown:
+            raise CommandError(f"Unknown drivers: {', '.join(sorted(unknown))}.")
+        if 'asgi' in drivers and uvicorn is None:
+            self.stderr.write('uvicorn is not installed, skipping the asgi driver: pip install uvicorn')
+            drivers.remove('asgi')
+        selected = [route for route in routes() if not options['only'] or options['only'] in route]
+        rows = options['rows'] or SCALES[options['scale']]
+
+        # the request timer logs every request
+        logging.disable(logging.INFO)
+        try:
+            report = self.run(selected, drivers, rows, options)
+        finally:
+            logging.disable(logging.NOTSET)
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        self.stdout.write(f"Wrote {options['output']}")
+
+    def run(self, selected, drivers, rows, options):
+        with scratch_database():
+            started = time.perf_counter()
+            call_command(
+                'create_data', restaurants=rows, sales=rows, ratings=rows, staff=rows,
+                users=max(1, rows // 100), seed=options['seed'], stdout=io.StringIO(),
+            )
+            self.stdout.write(f"Seeded {rows:,} rows per model in {time.perf_counter() - started:.1f} s")
+            context = BenchContext()
+
+            results = {route: {} for route in selected}
+            if 'client' in drivers:
+                with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                    for route in selected:
+                        results[route]['client'] = self.run_client(route, context, options)
+                        self.report(route, 'client', results[route]['client'])
+            for driver in ('wsgi', 'asgi'):
+                if driver not in drivers:
+                    continue
+                if driver == 'wsgi':
+                    server, port = start_wsgi_server(get_wsgi_application())
+                else:
+                    server, thread, port = start_asgi_server(get_asgi_application())
+                try:
+                    for route in selected:
+                        results[route][driver] = self.run_server(port, route, context, options)
+                        self.report(route, driver, results[route][driver])
+                finally:
+                    if driver == 'wsgi':
+                        server.shutdown()
+                        server.server_close()
+                    else:
+                        server.should_exit = True
+                        thread.join()
+
+            return {'meta': self.meta(rows, drivers, options), 'results': results}
+
+    def prepare(self, route, context, options):
+        """
+        The method, path and request count of ``route``, with the response
+        cache emptied so the first request is a miss.
+        """
+        endpoint = ENDPOINTS[route]
+        caches['responses'].clear()
+        context.renew()
+        path = '/' + (endpoint.path or route).format(**context.values)
+        if endpoint.query:
+            path += '?' + endpoint.query.format(**context.values)
+        count = min(options['requests'], endpoint.max_requests or options['requests'])
+        return endpoint, path, count
+
+    def run_client(self, route, context, options):
+        endpoint, path, count = self.prepare(route, context, options)
+        client = Client()
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {context.access}'} if endpoint.auth else {}
+
+        def call(number):
+            body = endpoint.body(context, number) if endpoint.body else None
+            start = time.perf_counter()
+            response = client.generic(
+                endpoint.method, path, json.dumps(body) if body is not None else '',
+                content_type='application/json', **headers,
+            )
+            # streamed responses (exports) are only done once consumed
+            b''.join(response) if response.streaming else response.content
+            return response.status_code, time.perf_counter() - start
+
+        durations, statuses, queries = [], [], []
+        started = time.perf_counter()
+        for number in range(count):
+            with CaptureQueriesContext(connection) as captured:
+                status, duration = call(number)
+            durations.append(duration)
+            statuses.append(status)
+            queries.append(len(captured))
+        elapsed = time.perf_counter() - started
+
+        # traced separately: tracemalloc slows every allocation down
+        peaks, retained = [], []
+        tracemalloc.start()
+        try:
+            for number in range(count, count + min(options['alloc_requests'], count)):
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                call(number)
+                after, peak = tracemalloc.get_traced_memory()
+                peaks.append(peak - before)
+                retained.append(after - before)
+        finally:
+            tracemalloc.stop()
+
+        result = self.result(endpoint, path, durations, statuses, elapsed)
+        result.update(
+            queries=int(statistics.median(queries)),
+            max_queries=max(queries),
+            alloc_peak_kib=statistics.median(peaks) / 1024 if peaks else None,
+            alloc_retained_kib=statistics.median(retained) / 1024 if retained else None,
+        )
+        return result
+
+    def run_server(self, port, route, context, options):
+        endpoint, path, count = self.prepare(route, context, options)
+        headers = {'Authorization': f'Bearer {context.access}'} if endpoint.auth else {}
+        # request bodies are built up front so only the requests are timed
+        bodies = [
+            json.dumps(endpoint.body(context, number)) if endpoint.body else None
+            for number in range(count)
+        ]
+        lock = threading.Lock()
+        durations, statuses = [], []
+
+        def call(body):
+            start = time.perf_counter()
+            status = http_request(port, endpoint.method, path, body, headers)
+            duration = time.perf_counter() - start
+            with lock:
+                durations.append(duration)
+                statuses.append(status)
+
+        # SQLite takes one writer at a time, and the shared cache of the
+        # in-memory test database fails the others at once instead of waiting
+        concurrency = 1 if endpoint.method != 'GET' and connection.vendor == 'sqlite' else options['concurrency']
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(concurrency, count)) as executor:
+            list(executor.map(call, bodies))
+        return self.result(endpoint, path, durations, statuses, time.perf_counter() - started)
+
+    def result(self, endpoint, path, durations, statuses, elapsed):
+        counts = {}
+        for status in statuses:
+            counts[str(status)] = counts.get(str(status), 0) + 1
+        return {
+            'method': endpoint.method,
+            'path': path,
+            'requests': len(durations),
+            'throughput': len(durations) / elapsed if elapsed else 0.0,
+            **summarize(durations),
+            'statuses': counts,
+            'errors': sum(status not in endpoint.expect for status in statuses),
+        }
+
+    def report(self, route, driver, result):
+        line = (
+            f"{driver:<6} {result['method']:<4} {route[:44]:<44} p50 {result['p50_ms']:8.2f} ms   "
+            f"p95 {result['p95_ms']:8.2f} ms   p99 {result['p99_ms']:8.2f} ms   {result['throughput']:7.1f} req/s"
+        )
+        if 'queries' in result:
+            line += f"   {result['queries']:3d} queries"
+        if result.get('alloc_peak_kib') is not None:
+            line += f"   {result['alloc_peak_kib']:8.1f} KiB peak"
+        if result['errors']:
+            line += f"   {result['errors']} unexpected: {result['statuses']}"
+        self.stdout.write(line)
+
+    def meta(self, rows, drivers, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'created': timezone.now().isoformat(),
+            'commit': commit,
+            'rows': rows,
+            'seed': options['seed'],
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'drivers': drivers,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'cpus': os.cpu_count(),
+        }
+
+    def compare(self, old_path, new_path, options):
+        reports = []
+        for path in (old_path, new_path):
+            try:
+                with open(path) as f:
+                    reports.append(json.load(f))
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {path}: {e}")
+        old, new = reports
+        if old['meta']['rows'] != new['meta']['rows']:
+            self.stderr.write(f"Warning: comparing runs on {old['meta']['rows']:,} and {new['meta']['rows']:,} rows")
+
+        regressions = compare_reports(old, new, options['threshold'], options['min_delta_ms'])
+        for line in regressions:
+            self.stdout.write(line)
+        if regressions:
+            raise CommandError(f"{len(regressions)} regressions in {new_path} against {old_path}.")
+        self.stdout.write(f"No regressions in {new_path} against {old_path}.")
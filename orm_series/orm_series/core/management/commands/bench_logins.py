@@ -0,0 +1,78 @@
+import json
+import threading
+import time
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+
+from auth.hashing import hashing_pool
+from core.benchmarks import format_summary, http_request, scratch_database, start_wsgi_server
+from core.models import Restaurant
+
+
+def request(port, method, path, body=None):
+    return http_request(port, method, path, json.dumps(body) if body is not None else None)
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the latency of other endpoints while a login storm saturates password hashing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/core/counttotalrestaurants', help='endpoint probed during the storm')
+        parser.add_argument('--login-clients', type=int, default=16, help='clients logging in back to back')
+        parser.add_argument('--duration', type=float, default=10.0, help='seconds per scenario')
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            User.objects.create_user(username='storm', password='storm-password')
+            Restaurant.objects.create(
+                name='Probe', date_opened=date(2024, 1, 1), latitude=40.0, longitude=22.0,
+                restaurant_type=Restaurant.TypeChoices.GREEK,
+            )
+
+            server, port = start_wsgi_server(get_wsgi_application())
+            try:
+                self.run_case('no logins', port, 0, options)
+                # every login hashes on its own request thread, as before
+                with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.PBKDF2PasswordHasher']):
+                    self.run_case('storm, request thread', port, options['login_clients'], options)
+                pool = hashing_pool()
+                self.run_case(f'storm, pool of {pool.workers}', port, options['login_clients'], options)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def run_case(self, label, port, login_clients, options):
+        stop = threading.Event()
+        logins = {}
+        lock = threading.Lock()
+
+        def login():
+            while not stop.is_set():
+                status = request(port, 'POST', '/auth/login/', {'username': 'storm', 'password': 'storm-password'})
+                with lock:
+                    logins[status] = logins.get(status, 0) + 1
+
+        clients = [threading.Thread(target=login, daemon=True) for _ in range(login_clients)]
+        for client in clients:
+            client.start()
+
+        durations, failed = [], 0
+        deadline = time.perf_counter() + options['duration']
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            failed += request(port, 'GET', options['path']) != 200
+            durations.append(time.perf_counter() - start)
+        stop.set()
+        for client in clients:
+            client.join()
+
+        succeeded = logins.get(200, 0)
+        self.stdout.write(
+            format_summary(label, durations)
+            + f"   {succeeded / options['duration']:5.1f} logins/s   {logins.get(503, 0)} rejected"
+            + f"   {sum(logins.values()) - succeeded - logins.get(503, 0) + failed} failed"
+        )
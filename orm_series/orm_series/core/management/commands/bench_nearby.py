@@ -0,0 +1,71 @@
+import random
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from core import geo
+from core.benchmarks import format_summary, scratch_database, timed
+from core.models import Restaurant
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the grid-indexed nearby search against a full scan on a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--full-scan-queries', type=int, default=5, help='the full scan is slow, run it fewer times')
+        parser.add_argument('--radius-km', type=float, default=5.0)
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        # a few dense "cities" plus a uniform background, like real restaurant data
+        cities = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(200)]
+
+        def point():
+            if rng.random() < 0.8:
+                lat, lon = rng.choice(cities)
+                return max(-90, min(90, rng.gauss(lat, 0.3))), ((rng.gauss(lon, 0.3) + 180) % 360) - 180
+            return rng.uniform(-90, 90), rng.uniform(-180, 180)
+
+        with scratch_database():
+            start = time.perf_counter()
+            remaining = options['restaurants']
+            while remaining:
+                batch = []
+                for _ in range(min(remaining, options['batch_size'])):
+                    lat, lon = point()
+                    batch.append(Restaurant(
+                        name='bench', date_opened=date(2020, 1, 1), latitude=lat, longitude=lon,
+                        restaurant_type=Restaurant.TypeChoices.OTHER, grid_cell=geo.grid_cell(lat, lon),
+                    ))
+                Restaurant.objects.bulk_create(batch)
+                remaining -= len(batch)
+            self.stdout.write(f"Seeded {options['restaurants']} restaurants in {time.perf_counter() - start:.1f}s")
+
+            probes = [point() for _ in range(options['queries'])]
+            radius, k = options['radius_km'], options['k']
+            queryset = Restaurant.objects.all()
+
+            iterator = iter(probes)
+            indexed = timed(lambda: geo.search(queryset, *next(iterator), radius, k), len(probes))
+
+            def full_scan():
+                lat, lon = next(iterator)
+                geo.nearest(queryset.values_list('id', 'latitude', 'longitude'), lat, lon, radius, k)
+
+            iterator = iter(probes)
+            scanned = timed(full_scan, min(options['full_scan_queries'], len(probes)))
+
+            # both strategies must agree exactly
+            for lat, lon in probes[:options['full_scan_queries']]:
+                expected = geo.nearest(queryset.values_list('id', 'latitude', 'longitude'), lat, lon, radius, k)
+                assert geo.search(queryset, lat, lon, radius, k) == expected
+
+            self.stdout.write(format_summary('grid index search', indexed))
+            self.stdout.write(format_summary('full table scan', scanned))
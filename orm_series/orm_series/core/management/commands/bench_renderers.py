@@ -0,0 +1,59 @@
+import random
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmarks import format_summary, scratch_database, timed
+from core.models import Sale
+from core.renderers import MessagePackRenderer, ORJSONRenderer, msgpack, orjson
+from core.serializers import SaleSerializer, ValuesListSerializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the JSON, orjson and MessagePack renderers on Sale lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000', help='comma separated list sizes')
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        rng = random.Random(options['seed'])
+        renderers = [('json', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('orjson', ORJSONRenderer()))
+        if msgpack is not None:
+            renderers.append(('msgpack', MessagePackRenderer()))
+
+        with scratch_database():
+            first_day = datetime(2025, 1, 1, tzinfo=timezone.utc)
+            Sale.objects.bulk_create(
+                (
+                    Sale(income=Decimal(rng.randint(1, 99_999)) / 100, datetime=first_day + timedelta(seconds=rng.randrange(90 * 86400)))
+                    for _ in range(max(sizes))
+                ),
+                batch_size=10_000,
+            )
+
+            for size in sizes:
+                queryset = Sale.objects.order_by('id')[:size]
+                fast = ValuesListSerializer(SaleSerializer)
+                shapes = [
+                    # what the list endpoints render: decimals and datetimes already strings
+                    ('serialized', fast.to_representation(fast.values(queryset))),
+                    # Decimal and datetime objects left to the renderer
+                    ('raw values', list(queryset.values())),
+                ]
+                for shape, data in shapes:
+                    baseline = None
+                    for name, renderer in renderers:
+                        body = renderer.render(data)
+                        durations = timed(lambda: renderer.render(data), options['repeat'])
+                        baseline = baseline or sum(durations)
+                        self.stdout.write(
+                            format_summary(f'{size} {shape} {name}', durations)
+                            + f"   {baseline / sum(durations):4.1f}x   {len(body) / 1024:8.0f} KiB"
+                        )
@@ -0,0 +1,77 @@
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmarks import format_summary, scratch_database, timed
+from core.models import Restaurant, Sale
+from core.serializers import RestaurantSerializer, SaleSerializer, ValuesListSerializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks ModelSerializer lists against the values() fast path on a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000', help='comma separated list sizes')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        rng = random.Random(options['seed'])
+        renderer = JSONRenderer()
+
+        with scratch_database():
+            start = time.perf_counter()
+            largest = max(sizes)
+            first_day = datetime(2025, 1, 1, tzinfo=timezone.utc)
+            Restaurant.objects.bulk_create(
+                (
+                    Restaurant(
+                        name=f'bench {number}', date_opened=date(2020, 1, 1) + timedelta(days=number % 1000),
+                        latitude=rng.uniform(-90, 90), longitude=rng.uniform(-180, 180),
+                        restaurant_type=rng.choice(Restaurant.TypeChoices.values),
+                    )
+                    for number in range(largest)
+                ),
+                batch_size=options['batch_size'],
+            )
+            restaurant_ids = list(Restaurant.objects.values_list('id', flat=True))
+            Sale.objects.bulk_create(
+                (
+                    Sale(
+                        restaurant_id=rng.choice(restaurant_ids), income=Decimal(rng.randint(1, 99_999)) / 100,
+                        datetime=first_day + timedelta(seconds=rng.randrange(90 * 86400)),
+                    )
+                    for _ in range(largest)
+                ),
+                batch_size=options['batch_size'],
+            )
+            self.stdout.write(f"Seeded {largest} restaurants and sales in {time.perf_counter() - start:.1f}s")
+
+            for label, serializer_class, model in (
+                ('restaurants', RestaurantSerializer, Restaurant),
+                ('sales', SaleSerializer, Sale),
+            ):
+                for size in sizes:
+                    queryset = model.objects.order_by('id')[:size]
+
+                    def instances():
+                        return renderer.render(serializer_class(queryset, many=True).data)
+
+                    def values():
+                        fast = ValuesListSerializer(serializer_class)
+                        return renderer.render(fast.to_representation(fast.values(queryset)))
+
+                    # both paths must render exactly the same bytes
+                    assert instances() == values(), f"{label} x {size} differ"
+
+                    slow = timed(instances, options['repeat'])
+                    fast = timed(values, options['repeat'])
+                    speedup = sum(slow) / sum(fast)
+                    self.stdout.write(format_summary(f'{label} x {size} serializer', slow))
+                    self.stdout.write(format_summary(f'{label} x {size} values()', fast) + f"   {speedup:.1f}x")
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.openapi import OpenAPISchema, generate_schema
+
+
+class Command(BaseCommand):
+    help = 'Generates the OpenAPI schema served at /schema/ and writes it gzipped; run it on every deploy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="defaults to settings.OPENAPI_SCHEMA['PATH']")
+
+    def handle(self, *args, **options):
+        path = options['output'] or getattr(settings, 'OPENAPI_SCHEMA', {}).get('PATH')
+        if not path:
+            raise CommandError("Pass --output or set OPENAPI_SCHEMA['PATH'].")
+        schema = OpenAPISchema(generate_schema())
+        schema.save(path)
+        size = len(schema.representations['json'].gzipped)
+        self.stdout.write(self.style.SUCCESS(f"Wrote the schema to {path} ({size:,} bytes gzipped)"))
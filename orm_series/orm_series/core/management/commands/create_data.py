@@ -1,61 +1,202 @@
 import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-from django.core.management.base import BaseCommand
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.db import connection, transaction
 from django.utils import timezone
-from core.models import Restaurant, Rating, Sale
+
+from core import datagen
+from core.caching import bump_version
+from core.geo import grid_cell
+from core.models import (
+    Restaurant, Rating, Sale, Staff, RestaurantRatingSummary, SalesRollup, RestaurantGridAggregate,
+)
+
+
+LOAD_TEST_USER_PREFIX = 'loadtest_'
 
 
 class Command(BaseCommand):
-    help = 'Creates application data'
-
-    def handle(self, *args, **kwargs):
-        # get or create an admin user
-        user = User.objects.filter(username='admin')
-        if not user.exists():
-            user = User.objects.create_superuser(username='admin', password='test')
-        else:
-            user = user.first()
-
-        restaurants = [
-            {'name': 'Pizzeria 1', 'date_opened': timezone.now() - timezone.timedelta(days=20), 'restaurant_type': Restaurant.TypeChoices.ITALIAN, 'latitude': 55.869829854, 'longitude': -4.28583219},
-            {'name': 'Pizzeria 2', 'date_opened': timezone.now() - timezone.timedelta(days=27), 'restaurant_type': Restaurant.TypeChoices.ITALIAN, 'latitude': 55.862, 'longitude': -4.247},
-            {'name': 'Golden Dragon', 'date_opened': timezone.now() - timezone.timedelta(days=15), 'restaurant_type': Restaurant.TypeChoices.CHINESE, 'latitude': 55.953251, 'longitude':  -3.188267},
-            {'name': 'Bombay Bustle', 'date_opened': timezone.now() - timezone.timedelta(days=44), 'restaurant_type': Restaurant.TypeChoices.INDIAN, 'latitude': 51.509865, 'longitude':  -0.118092},
-            {'name': 'McDonalds', 'date_opened': timezone.now() - timezone.timedelta(days=51), 'restaurant_type': Restaurant.TypeChoices.FASTFOOD, 'latitude': 53.483959, 'longitude':  -2.244644},
-            {'name': 'Taco Bell', 'date_opened': timezone.now() - timezone.timedelta(days=12), 'restaurant_type': Restaurant.TypeChoices.FASTFOOD, 'latitude': 53.413959, 'longitude':  -2.254644},
-            {'name': 'Chinese 2', 'date_opened': timezone.now() - timezone.timedelta(days=31), 'restaurant_type': Restaurant.TypeChoices.CHINESE, 'latitude': 53.400002, 'longitude':  -2.983333},
-            {'name': 'Chinese 3', 'date_opened': timezone.now() - timezone.timedelta(days=71), 'restaurant_type': Restaurant.TypeChoices.CHINESE, 'latitude': 55.070859, 'longitude':  -3.60512},
-            {'name': 'Indian 2', 'date_opened': timezone.now() - timezone.timedelta(days=46), 'restaurant_type': Restaurant.TypeChoices.INDIAN, 'latitude': 53.350140, 'longitude':  -6.266155},
-            {'name': 'Mexican 1', 'date_opened': timezone.now() - timezone.timedelta(days=52), 'restaurant_type': Restaurant.TypeChoices.MEXICAN, 'latitude': 51.481583, 'longitude':  -3.179090},
-            {'name': 'Mexican 2', 'date_opened': timezone.now() - timezone.timedelta(days=50), 'restaurant_type': Restaurant.TypeChoices.MEXICAN, 'latitude': 55.847258, 'longitude':  -4.440114},
-            {'name': 'Pizzeria 3', 'date_opened': timezone.now() - timezone.timedelta(days=4), 'restaurant_type': Restaurant.TypeChoices.ITALIAN, 'latitude': 54.966667, 'longitude':  -1.600000},
-            {'name': 'Pizzeria 4', 'date_opened': timezone.now() - timezone.timedelta(days=61), 'restaurant_type': Restaurant.TypeChoices.ITALIAN, 'latitude': 48.856614, 'longitude':  2.3522219},
-            {'name': 'Italian 1', 'date_opened': timezone.now() - timezone.timedelta(days=37), 'restaurant_type': Restaurant.TypeChoices.ITALIAN, 'latitude': 41.902782, 'longitude':  12.496366},
+    help = 'Creates application data; scales to millions of seeded, realistically skewed rows for load tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants', type=int, default=14)
+        parser.add_argument('--ratings', type=int, default=30)
+        parser.add_argument('--sales', type=int, default=100)
+        parser.add_argument('--staff', type=int, default=10)
+        parser.add_argument('--users', type=int, default=0, help='load test users rating besides admin')
+        parser.add_argument('--seed', type=int, default=42, help='same seed and counts give the same data')
+        parser.add_argument('--days', type=int, default=50, help='sales are spread over the days before today')
+        parser.add_argument('--zipf', type=float, default=1.1, help='skew of restaurant popularity')
+        parser.add_argument('--batch-size', type=int, default=2000, help='rows per INSERT')
+        parser.add_argument('--chunk-size', type=int, default=50_000, help='rows generated per task and committed per transaction')
+        parser.add_argument('--workers', type=int, default=0, help='generate rows in a pool of this many processes')
+        parser.add_argument('--skip-derived', action='store_true', help='do not rebuild summaries, rollups and clusters; the restaurant counters are always reconciled')
+
+    def handle(self, *args, **options):
+        if options['restaurants'] < 1 and (options['sales'] or options['ratings'] or options['staff']):
+            raise CommandError('Sales, ratings and staff need at least one restaurant.')
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1.')
+        self.options = options
+        started = time.perf_counter()
+
+        self.reset()
+        user_ids = self.create_users(options['users'])
+
+        context = {
+            'restaurant_types': list(Restaurant.TypeChoices.choices),
+            'today': timezone.now().date(),
+            'days': options['days'],
+        }
+        datagen.set_context(context)
+        self.load('restaurants', options['restaurants'], Restaurant, lambda row: Restaurant(
+            name=row[0], date_opened=row[1], latitude=row[2], longitude=row[3], restaurant_type=row[4],
+            grid_cell=grid_cell(row[2], row[3]),
+        ))
+
+        restaurant_ids = list(Restaurant.objects.order_by('id').values_list('id', flat=True))
+        rng = random.Random(f"{options['seed']}:popularity")
+        context.update(
+            restaurant_ids=restaurant_ids,
+            popularity=datagen.zipf_cum_weights(len(restaurant_ids), options['zipf'], rng),
+            user_ids=user_ids,
+        )
+        datagen.set_context(context)
+
+        with self.pool(context) as executor:
+            self.executor = executor
+            self.load('sales', options['sales'], Sale, lambda row: Sale(
+                restaurant_id=row[0], income=row[1], datetime=row[2],
+            ))
+            self.load('ratings', options['ratings'], Rating, lambda row: Rating(
+                user_id=row[0], restaurant_id=row[1], rating=row[2],
+            ))
+            self.load_staff(options['staff'])
+
+        # cached responses were built from the old rows
+        bump_version(Restaurant, Staff)
+
+        # bulk_create sends no signals. The count endpoints read the restaurant
+        # counters directly, so those are always brought up to date
+        call_command('reconcile_restaurant_counts', stdout=self.stdout)
+        if not options['skip_derived']:
+            # the derived tables are rebuilt in one pass each
+            for command in ('rebuild_rating_summaries', 'rebuild_sales_rollups', 'rebuild_map_clusters'):
+                call_command(command, stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - started:.1f}s"))
+
+    def reset(self):
+        """
+        Empty the generated tables with plain DELETEs. ``QuerySet.delete()``
+        would load every row to send its delete signals; the derived tables
+        those signals maintain are emptied here as well.
+        """
+        tables = [
+            Staff.restaurant.through, Staff, Rating, Sale,
+            RestaurantRatingSummary, SalesRollup, RestaurantGridAggregate, Restaurant,
         ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model in tables:
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+        User.objects.filter(username__startswith=LOAD_TEST_USER_PREFIX).delete()
+
+    def create_users(self, count):
+        admin = User.objects.filter(username='admin').first()
+        if admin is None:
+            admin = User.objects.create_superuser(username='admin', password='test')
+
+        # hashing is deliberately slow, so every load test user shares one hash
+        password = make_password('test')
+        users = (
+            User(username=f"{LOAD_TEST_USER_PREFIX}{number + 1}", password=password)
+            for number in range(count)
+        )
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=self.options['batch_size'])
+        return [admin.id] + list(
+            User.objects.filter(username__startswith=LOAD_TEST_USER_PREFIX).order_by('id').values_list('id', flat=True)
+        )
+
+    def pool(self, context):
+        workers = self.options['workers']
+        if workers > 0:
+            return ProcessPoolExecutor(workers, initializer=datagen.set_context, initargs=(context,))
+        return _InProcess()
+
+    def generated(self, kind, total):
+        """
+        Row chunks in order. At most two chunks per worker are in flight so
+        generation runs ahead of the inserts without piling up in memory.
+        """
+        tasks = datagen.chunks(kind, total, self.options['chunk_size'])
+        generate = partial(datagen.generate_chunk, self.options['seed'])
+        executor = getattr(self, 'executor', None) or _InProcess()
+        pending = deque()
+        window = max(1, 2 * self.options['workers'])
+        for task in tasks:
+            pending.append(executor.submit(generate, task))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def load(self, kind, total, model, build):
+        started = time.perf_counter()
+        for rows in self.generated(kind, total):
+            with transaction.atomic():
+                model.objects.bulk_create(map(build, rows), batch_size=self.options['batch_size'])
+        self.report(kind, total, started)
+
+    def load_staff(self, total):
+        started = time.perf_counter()
+        Through = Staff.restaurant.through
+        for rows in self.generated('staff', total):
+            with transaction.atomic():
+                # pks are set from the INSERT ... RETURNING of bulk_create
+                members = Staff.objects.bulk_create([Staff(name=name) for name, _ in rows])
+                Through.objects.bulk_create(
+                    (
+                        Through(staff_id=member.id, restaurant_id=restaurant_id)
+                        for member, (_, restaurant_ids) in zip(members, rows)
+                        for restaurant_id in restaurant_ids
+                    ),
+                    batch_size=self.options['batch_size'],
+                )
+        self.report('staff', total, started)
+
+    def report(self, kind, total, started):
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(f"Created {total} {kind} in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+
+
+class _InProcess:
+    """
+    Runs submitted calls immediately; stands in for a pool when --workers is 0.
+    """
+
+    def submit(self, func, *args):
+        return _Done(func(*args))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Done:
+
+    def __init__(self, value):
+        self.value = value
 
-        # deleting all existing restaurants in the database
-        Restaurant.objects.all().delete()
-
-        # looping over the created dictionaries:
-        for r in restaurants:
-            Restaurant.objects.create(**r)
-
-        restaurants = Restaurant.objects.all()
-
-        # create some ratings
-        for _ in range(30):
-            Rating.objects.create(
-                restaurant=random.choice(restaurants),
-                user=user,
-                rating=random.randint(1,5)
-            )
-
-        # create some sales
-        Sale.objects.all().delete()
-        for _ in range(100):
-            Sale.objects.create(
-                restaurant=random.choice(restaurants),
-                income=random.uniform(5, 100),
-                datetime=timezone.now() - timezone.timedelta(days=random.randint(1,50))
-            )
\ No newline at end of file
+    def result(self):
+        return self.value
@@ -0,0 +1,50 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from core.exports import EXPORT_DATASETS, EXPORT_FORMATS, export_stream
+from core.filters import parse_bound
+
+
+class Command(BaseCommand):
+    help = 'Streams sales or ratings to a file (or stdout) as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(EXPORT_DATASETS))
+        parser.add_argument('--output-format', choices=list(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--gzip', action='store_true', help='gzip the output')
+        parser.add_argument('--start', help='ISO date/datetime, inclusive (sales only)')
+        parser.add_argument('--end', help='ISO date/datetime, exclusive (sales only)')
+        parser.add_argument('--restaurant', type=int, help='only rows for this restaurant id')
+        parser.add_argument('--file', help='write here instead of stdout')
+
+    def handle(self, *args, **options):
+        dataset = options['dataset']
+        if (options['start'] or options['end']) and EXPORT_DATASETS[dataset][2] is None:
+            raise CommandError(f'The {dataset} export has no date range filter.')
+
+        try:
+            start = parse_bound(options['start'], 'start') if options['start'] else None
+            end = parse_bound(options['end'], 'end', end=True) if options['end'] else None
+        except ValidationError as e:
+            raise CommandError(e.detail)
+
+        stream = export_stream(
+            dataset,
+            output=options['output_format'],
+            compress=options['gzip'],
+            start=start,
+            end=end,
+            restaurant_id=options['restaurant'],
+        )
+
+        if options['file']:
+            with open(options['file'], 'wb') as f:
+                for block in stream:
+                    f.write(block)
+            self.stdout.write(self.style.SUCCESS(f"Exported {dataset} to {options['file']}"))
+        else:
+            for block in stream:
+                sys.stdout.buffer.write(block)
+            sys.stdout.flush()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.clusters import rebuild_clusters
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the map cluster aggregates of every zoom level from the Restaurant table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = rebuild_clusters(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} cluster aggregates"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from core.models import Rating, RestaurantRatingSummary
+
+
+class Command(BaseCommand):
+    help = 'Recomputes every restaurant rating summary from the Rating table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        per_star = {f'star_{star}': Count('id', filter=Q(rating=star)) for star in range(1, 6)}
+        rows = (
+            Rating.objects.values('restaurant_id')
+            .annotate(count=Count('id'), total=Sum('rating'), **per_star)
+            .order_by()
+        )
+
+        with transaction.atomic():
+            RestaurantRatingSummary.objects.all().delete()
+            summaries = RestaurantRatingSummary.objects.bulk_create(
+                (RestaurantRatingSummary(**row) for row in rows),
+                batch_size=options['batch_size'],
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(summaries)} rating summaries"))
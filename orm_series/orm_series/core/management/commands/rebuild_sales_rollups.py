@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from core.filters import parse_bound
+from core.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the hourly/daily sales rollups, for a window or for all time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='ISO date/datetime, rounded down to a UTC day')
+        parser.add_argument('--end', help='ISO date/datetime, rounded up to a UTC day')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            start = parse_bound(options['start'], 'start') if options['start'] else None
+            end = parse_bound(options['end'], 'end', end=True) if options['end'] else None
+        except ValidationError as e:
+            raise CommandError(e.detail)
+
+        written = rebuild_rollups(start, end, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} rollup rows"))
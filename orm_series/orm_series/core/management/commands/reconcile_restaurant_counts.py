@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from core.models import RestaurantCount
+
+
+class Command(BaseCommand):
+    help = 'Compares the restaurant counters with the Restaurant table and repairs any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report drift, change nothing')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # every restaurant write updates the total row, so a no-op update of it
+            # holds them off until the repair commits (a row lock, or SQLite's write lock)
+            RestaurantCount.objects.filter(key=RestaurantCount.TOTAL).update(count=F('count'))
+            stored = dict(RestaurantCount.objects.values_list('key', 'count'))
+            actual = RestaurantCount.actual()
+            drift = {
+                key: (stored.get(key, 0), actual.get(key, 0))
+                for key in sorted(set(stored) | set(actual))
+                if stored.get(key, 0) != actual.get(key, 0)
+            }
+            for key, (was, count) in drift.items():
+                self.stdout.write(f"{key}: counter {was}, actual {count}")
+                if not options['check']:
+                    RestaurantCount.objects.update_or_create(key=key, defaults={'count': count})
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Restaurant counts are in step"))
+        elif options['check']:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} restaurant counters drifted"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(drift)} restaurant counters"))
@@ -0,0 +1,271 @@
+"""
+Request metrics in the Prometheus text format.
+
+``RequestTimerMiddleware`` (core/middleware.py) records every request here:
+a latency histogram per resolved view name, method and status, measured on
+the monotonic clock, plus the response bytes, the database queries and their
+time, and the number of requests in flight. ``/metrics`` renders them.
+
+Recording takes no lock. Each thread writes to its own shard and only its
+owner ever writes to a shard, so no update is lost. A scrape adds the shards
+up, and it may see a request that is halfway recorded. Shards of threads that
+have exited are folded into a retired total at the next scrape, so servers
+that spawn a thread per request do not grow the list forever. Queries are counted by
+an execute wrapper installed on every database connection when it is created.
+The wrapper finds the current request's counters through a context variable,
+so queries an async view runs on a worker thread count as well.
+
+Pre-forked workers (gunicorn, uvicorn ``--workers``) each keep their own
+numbers. With ``settings.METRICS['DIR']`` set, every process writes a snapshot
+to ``<DIR>/metrics-<pid>.json`` at most every ``FLUSH_INTERVAL`` seconds and
+when it exits. ``/metrics`` adds up the snapshots of the other processes and
+the live numbers of its own. Counters of workers that have exited are kept,
+so totals never go backwards, but their in-flight gauges are not. Empty the
+directory when deploying, as with prometheus_client's multiprocess mode.
+"""
+import atexit
+import contextvars
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from .caching import cache_stats
+
+
+# seconds; the last bucket is +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# a series is one flat list: the histogram buckets, then these totals
+SUM, BYTES, QUERIES, QUERY_SECONDS = range(len(LATENCY_BUCKETS) + 1, len(LATENCY_BUCKETS) + 5)
+SERIES_LENGTH = QUERY_SECONDS + 1
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# [queries, nanoseconds] of the request being handled
+request_queries = contextvars.ContextVar('request_queries', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    queries = request_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter_ns()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries[1] += time.perf_counter_ns() - start
+        queries[0] += 1
+
+
+def install_query_counter(sender, connection, **kwargs):
+    # connected to connection_created in core/signals.py
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class Shard:
+    __slots__ = ('series', 'in_flight')
+
+    def __init__(self):
+        self.series = {}
+        self.in_flight = 0
+
+
+class Metrics:
+    """
+    The metrics of one process.
+    """
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.local = threading.local()
+        # (owner thread, shard) pairs, and what exited threads recorded
+        self.shards = []
+        self.retired = Shard()
+        self.shards_lock = threading.Lock()
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.flushed_at = time.monotonic()
+        self.pid = os.getpid()
+
+    def shard(self):
+        try:
+            return self.local.shard
+        except AttributeError:
+            # once per thread, not per request
+            shard = self.local.shard = Shard()
+            with self.shards_lock:
+                self.shards.append((threading.current_thread(), shard))
+            return shard
+
+    def started(self):
+        self.shard().in_flight += 1
+
+    def finished(self, view, method, status, seconds, size, queries, query_nanoseconds):
+        shard = self.shard()
+        shard.in_flight -= 1
+        key = (view, method, status)
+        series = shard.series.get(key)
+        if series is None:
+            series = shard.series[key] = [0] * SERIES_LENGTH
+        series[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        series[SUM] += seconds
+        series[BYTES] += size
+        series[QUERIES] += queries
+        series[QUERY_SECONDS] += query_nanoseconds / 1e9
+        if self.directory and time.monotonic() - self.flushed_at >= self.flush_interval:
+            self.flush()
+
+    def snapshot(self):
+        with self.shards_lock:
+            live = []
+            for thread, shard in self.shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    # nothing writes to it any more
+                    self.retired.in_flight += shard.in_flight
+                    for key, series in shard.series.items():
+                        merge(self.retired.series, key, series)
+            self.shards = live
+            # copied under the lock, the next scrape may be merging into it
+            totals = {key: list(series) for key, series in self.retired.series.items()}
+            in_flight = self.retired.in_flight
+        for _, shard in live:
+            in_flight += shard.in_flight
+            for key, series in list(shard.series.items()):
+                merge(totals, key, series)
+        return totals, in_flight
+
+    # sharing between processes:
+    def path(self, pid):
+        return os.path.join(self.directory, f'metrics-{pid}.json')
+
+    def flush(self):
+        self.flushed_at = time.monotonic()
+        if os.getpid() != self.pid:
+            # forked after import: start this worker's own file
+            self.pid = os.getpid()
+        totals, in_flight = self.snapshot()
+        data = {'in_flight': in_flight, 'series': [[*key, series] for key, series in totals.items()]}
+        path = self.path(self.pid)
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(data, f)
+        os.replace(f'{path}.tmp', path)
+
+    def collect(self):
+        """
+        This process's live numbers plus the last snapshot of every other.
+        """
+        totals, in_flight = self.snapshot()
+        if not self.directory:
+            return totals, in_flight
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            pid = int(os.path.basename(path)[len('metrics-'):-len('.json')])
+            if pid == os.getpid():
+                continue
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for view, method, status, series in data['series']:
+                merge(totals, (view, method, status), series)
+            if alive(pid):
+                in_flight += data['in_flight']
+        return totals, in_flight
+
+
+def merge(totals, key, series):
+    target = totals.get(key)
+    if target is None:
+        totals[key] = list(series)
+    else:
+        for i, value in enumerate(series):
+            target[i] += value
+
+
+def alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render(totals, in_flight, caches=None):
+    """
+    The Prometheus text exposition of ``Metrics.collect()``.
+    """
+    lines = [
+        '# HELP http_requests_in_flight Requests being handled.',
+        '# TYPE http_requests_in_flight gauge',
+        f'http_requests_in_flight {in_flight}',
+        '# HELP http_request_duration_seconds Request latency by view, method and status.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    rows = sorted(totals.items())
+    for (view, method, status), series in rows:
+        labels = f'view="{_label(view)}",method="{method}",status="{status}"'
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS, '+Inf'), series):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'http_request_duration_seconds_sum{{{labels}}} {series[SUM]:.6f}')
+        lines.append(f'http_request_duration_seconds_count{{{labels}}} {cumulative}')
+
+    for name, index, help_text in (
+        ('http_response_bytes_total', BYTES, 'Response body bytes.'),
+        ('db_queries_total', QUERIES, 'Database queries run by requests.'),
+        ('db_query_duration_seconds_total', QUERY_SECONDS, 'Time requests spent in database queries.'),
+    ):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for (view, method, status), series in rows:
+            value = series[index]
+            value = f'{value:.6f}' if isinstance(value, float) else value
+            lines.append(f'{name}{{view="{_label(view)}",method="{method}",status="{status}"}} {value}')
+
+    if caches:
+        lines += ['# HELP response_cache_requests_total Response cache lookups (core/caching.py).',
+                  '# TYPE response_cache_requests_total counter']
+        for name, stats in sorted(caches.items()):
+            for outcome in ('hits', 'misses'):
+                lines.append(f'response_cache_requests_total{{cache="{name}",outcome="{outcome}"}} {stats[outcome]}')
+    return '\n'.join(lines) + '\n'
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def metrics():
+    """
+    The process-wide registry configured by ``settings.METRICS``.
+    """
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                config = getattr(settings, 'METRICS', {})
+                registry = Metrics(directory=config.get('DIR'), flush_interval=config.get('FLUSH_INTERVAL', 5.0))
+                if registry.directory:
+                    os.makedirs(registry.directory, exist_ok=True)
+                    atexit.register(registry.flush)
+                _metrics = registry
+    return _metrics
+
+
+def metrics_view(request):
+    totals, in_flight = metrics().collect()
+    return HttpResponse(render(totals, in_flight, cache_stats()), content_type=CONTENT_TYPE)
@@ -1,24 +1,111 @@
 import time
 import logging
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .metrics import metrics, request_queries
+from .querylog import QueryInspector, QueryProblems, current_inspector, inspector_settings
+from .querylog import logger as query_logger
+
 # You can configure this logger as needed
 logger = logging.getLogger(__name__)
 
+class CountingStream:
+    """
+    Passes a streamed body through and calls ``done(size)`` once, when it is
+    exhausted or closed, whichever comes first.
+    """
+
+    def __init__(self, content, done):
+        self.content = content
+        self.done = done
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self.content:
+            self.size += len(chunk)
+            yield chunk
+        self.close()
+
+    def close(self):
+        done, self.done = self.done, None
+        if done is not None:
+            done(self.size)
+
+
+class AsyncCountingStream(CountingStream):
+    async def __aiter__(self):
+        async for chunk in self.content:
+            self.size += len(chunk)
+            yield chunk
+        self.close()
+
 class RequestTimerMiddleware:
+    """
+    Times every request on the monotonic clock and records it, with its
+    database queries and response size, in the metrics served at /metrics
+    (core/metrics.py).
+    """
+    # works in both modes, so async views under ASGI are not pushed onto a thread
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.metrics = metrics()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
 
         # ========= BEFORE VIEW LOGIC (pre-processing) =========
-        start_time = time.time()
+        queries, token, start_time = self.start()
 
         # Process the request
-        response = self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_queries.reset(token)
 
         # ========= AFTER VIEW LOGIC (post-processing) =========
-        end_time = time.time()
-        duration = end_time - start_time
+        return self.finish(request, response, queries, start_time)
+
+    async def __acall__(self, request):
+        queries, token, start_time = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_queries.reset(token)
+        return self.finish(request, response, queries, start_time)
+
+    def start(self):
+        self.metrics.started()
+        # filled in by core.metrics.count_queries, also from sync_to_async threads
+        queries = [0, 0]
+        return queries, request_queries.set(queries), time.perf_counter()
+
+    def finish(self, request, response, queries, start_time):
+        duration = time.perf_counter() - start_time
+
+        match = request.resolver_match
+
+        def record(size):
+            self.metrics.finished(
+                match.view_name if match else '<unresolved>', request.method, response.status_code,
+                duration, size, queries[0], queries[1],
+            )
+
+        if response.streaming:
+            # the body is sent after we return: record it once it has been
+            # served, or once the server closes the response
+            stream = AsyncCountingStream if response.is_async else CountingStream
+            response.streaming_content = stream(response.streaming_content, record)
+        else:
+            record(len(response.content))
 
         logger.info(f"{request.method} {request.get_full_path()} took {duration:.3f} seconds")
 
@@ -26,3 +113,52 @@ class RequestTimerMiddleware:
         response["X-Response-Time"] = f"{duration:.3f}s"
 
         return response
+
+
+class QueryInspectorMiddleware:
+    """
+    Reports probable N+1 queries and slow queries of each request, see
+    core/querylog.py. Only loaded when QUERY_INSPECTOR['ENABLED'] is set.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = getattr(settings, 'QUERY_INSPECTOR', {})
+        if not config.get('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.raise_problems = config.get('RAISE', False)
+        self.options = inspector_settings()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        inspector = QueryInspector(**self.options)
+        token = current_inspector.set(inspector)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_inspector.reset(token)
+        return self.report(request, response, inspector)
+
+    async def __acall__(self, request):
+        inspector = QueryInspector(**self.options)
+        token = current_inspector.set(inspector)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_inspector.reset(token)
+        return self.report(request, response, inspector)
+
+    def report(self, request, response, inspector):
+        problems = inspector.problems()
+        if problems:
+            message = f"{request.method} {request.get_full_path()}\n" + "\n".join(problems)
+            # slow queries alone are logged even then: their timing is not reproducible
+            if self.raise_problems and inspector.repeated():
+                raise QueryProblems(message)
+            query_logger.warning(message)
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_staff'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['datetime', 'id'], name='core_sale_datetime_idx'),
+        ),
+    ]
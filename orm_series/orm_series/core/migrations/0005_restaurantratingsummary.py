@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def build_summaries(apps, schema_editor):
+    Rating = apps.get_model('core', 'Rating')
+    RestaurantRatingSummary = apps.get_model('core', 'RestaurantRatingSummary')
+    per_star = {f'star_{star}': Count('id', filter=Q(rating=star)) for star in range(1, 6)}
+    rows = (
+        Rating.objects.values('restaurant_id')
+        .annotate(count=Count('id'), total=Sum('rating'), **per_star)
+        .order_by()
+    )
+    RestaurantRatingSummary.objects.bulk_create(
+        (RestaurantRatingSummary(**row) for row in rows), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_sale_datetime_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestaurantRatingSummary',
+            fields=[
+                ('restaurant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='core.restaurant')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('star_1', models.PositiveIntegerField(default=0)),
+                ('star_2', models.PositiveIntegerField(default=0)),
+                ('star_3', models.PositiveIntegerField(default=0)),
+                ('star_4', models.PositiveIntegerField(default=0)),
+                ('star_5', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:03
+
+from datetime import timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncHour
+
+
+def build_rollups(apps, schema_editor):
+    Sale = apps.get_model('core', 'Sale')
+    SalesRollup = apps.get_model('core', 'SalesRollup')
+    sales = Sale.objects.filter(restaurant__isnull=False)
+    rows = []
+    for granularity, truncate in (('H', TruncHour), ('D', TruncDay)):
+        bucketed = sales.annotate(bucket=truncate('datetime', tzinfo=timezone.utc))
+        for group in (('bucket', 'restaurant_id', 'restaurant__restaurant_type'), ('bucket', 'restaurant__restaurant_type')):
+            for row in bucketed.values(*group).annotate(sale_count=Count('id'), income=Sum('income')).order_by():
+                rows.append(SalesRollup(
+                    granularity=granularity, bucket=row['bucket'], restaurant_id=row.get('restaurant_id'),
+                    restaurant_type=row['restaurant__restaurant_type'],
+                    sale_count=row['sale_count'], income=row['income'],
+                ))
+    SalesRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_restaurantratingsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('H', 'Hour'), ('D', 'Day')], max_length=1)),
+                ('bucket', models.DateTimeField()),
+                ('restaurant_type', models.CharField(choices=[('IN', 'Indian'), ('CH', 'Chinese'), ('IT', 'Italian'), ('GR', 'Greek'), ('MX', 'Mexican'), ('FF', 'Fast Food'), ('OT', 'Other')], max_length=2)),
+                ('sale_count', models.IntegerField(default=0)),
+                ('income', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('restaurant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='core.restaurant')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('restaurant__isnull', False)), fields=('granularity', 'restaurant', 'bucket'), name='core_rollup_restaurant_bucket_uniq'), models.UniqueConstraint(condition=models.Q(('restaurant__isnull', True)), fields=('granularity', 'restaurant_type', 'bucket'), name='core_rollup_type_bucket_uniq')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
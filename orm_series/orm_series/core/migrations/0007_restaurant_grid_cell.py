@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:06
+
+from django.db import migrations, models
+
+
+# frozen copy of core.geo.grid_cell: the numbering as of this migration
+CELL_DEGREES = 0.1
+COLUMNS = 3600
+ROWS = 1800
+
+
+def grid_cell(lat, lon):
+    row = min(ROWS - 1, max(0, int((lat + 90) // CELL_DEGREES)))
+    column = min(COLUMNS - 1, max(0, int((lon + 180) // CELL_DEGREES)))
+    return row * COLUMNS + column
+
+
+def fill_grid_cells(apps, schema_editor):
+    Restaurant = apps.get_model('core', 'Restaurant')
+    restaurants = list(Restaurant.objects.only('id', 'latitude', 'longitude'))
+    for restaurant in restaurants:
+        restaurant.grid_cell = grid_cell(restaurant.latitude, restaurant.longitude)
+    Restaurant.objects.bulk_update(restaurants, ['grid_cell'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_salesrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='grid_cell',
+            field=models.IntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(fill_grid_cells, migrations.RunPython.noop),
+    ]
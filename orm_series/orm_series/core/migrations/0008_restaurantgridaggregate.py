@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:12
+
+import math
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+# frozen copy of core.clusters.restaurant_deltas as of this migration
+MAX_ZOOM = 12
+
+
+def cell_of(lat, lon, zoom):
+    side = 2 ** zoom
+    x = min(side - 1, max(0, int(math.floor((lon + 180) / 360 * side))))
+    y = min(side - 1, max(0, int(math.floor((lat + 90) / 180 * side))))
+    return x, y
+
+
+def restaurant_deltas(restaurants):
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+    for lat, lon, restaurant_type in restaurants:
+        for zoom in range(MAX_ZOOM + 1):
+            x, y = cell_of(lat, lon, zoom)
+            delta = deltas[(zoom, x, y, restaurant_type)]
+            delta[0] += 1
+            delta[1] += lat
+            delta[2] += lon
+    return deltas
+
+
+def build_aggregates(apps, schema_editor):
+    Restaurant = apps.get_model('core', 'Restaurant')
+    RestaurantGridAggregate = apps.get_model('core', 'RestaurantGridAggregate')
+    rows = Restaurant.objects.values_list('latitude', 'longitude', 'restaurant_type').iterator()
+    RestaurantGridAggregate.objects.bulk_create(
+        (
+            RestaurantGridAggregate(
+                zoom=zoom, cell_x=x, cell_y=y, restaurant_type=restaurant_type,
+                count=count, latitude_sum=lat_sum, longitude_sum=lon_sum,
+            )
+            for (zoom, x, y, restaurant_type), (count, lat_sum, lon_sum) in restaurant_deltas(rows).items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_restaurant_grid_cell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestaurantGridAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField()),
+                ('cell_x', models.IntegerField()),
+                ('cell_y', models.IntegerField()),
+                ('restaurant_type', models.CharField(choices=[('IN', 'Indian'), ('CH', 'Chinese'), ('IT', 'Italian'), ('GR', 'Greek'), ('MX', 'Mexican'), ('FF', 'Fast Food'), ('OT', 'Other')], max_length=2)),
+                ('count', models.IntegerField(default=0)),
+                ('latitude_sum', models.FloatField(default=0)),
+                ('longitude_sum', models.FloatField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('zoom', 'cell_y', 'cell_x', 'restaurant_type'), name='core_grid_aggregate_cell_uniq')],
+            },
+        ),
+        migrations.RunPython(build_aggregates, migrations.RunPython.noop),
+    ]
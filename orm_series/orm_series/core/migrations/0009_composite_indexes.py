@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_restaurantgridaggregate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['user', 'restaurant'], name='core_rating_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(fields=['restaurant_type', 'id'], name='core_restaurant_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(fields=['date_opened', 'id'], name='core_restaurant_opened_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['restaurant', 'datetime', 'id'], name='core_sale_restaurant_idx'),
+        ),
+        # the composite index above replaces the plain foreign key index
+        migrations.AlterField(
+            model_name='sale',
+            name='restaurant',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales', to='core.restaurant'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:46
+
+from django.db import migrations, models
+
+
+def count_restaurants(apps, schema_editor):
+    Restaurant = apps.get_model('core', 'Restaurant')
+    RestaurantCount = apps.get_model('core', 'RestaurantCount')
+    counts = dict(Restaurant.objects.values_list('restaurant_type').annotate(count=models.Count('id')).order_by())
+    counts['*'] = sum(counts.values())
+    RestaurantCount.objects.bulk_create(RestaurantCount(key=key, count=count) for key, count in counts.items())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_tableversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestaurantCount',
+            fields=[
+                ('key', models.CharField(max_length=2, primary_key=True, serialize=False)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_restaurants, migrations.RunPython.noop),
+    ]
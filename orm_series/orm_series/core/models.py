@@ -1,8 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 
+from .geo import grid_cell
+from .utils import bulk_increment_or_create, increment_or_create
+
 # restaurant model:
 class Restaurant(models.Model):
 
@@ -23,13 +26,47 @@ class Restaurant(models.Model):
     latitude = models.FloatField(validators=[MinValueValidator(-90), MaxValueValidator(90)])
     longitude = models.FloatField(validators=[MinValueValidator(-180), MaxValueValidator(180)])
     restaurant_type = models.CharField(max_length=2, choices=TypeChoices.choices)
+    # cell of the 0.1 degree grid in core/geo.py, derived from latitude/longitude
+    # and indexed so location searches read a handful of index ranges
+    grid_cell = models.IntegerField(default=0, editable=False, db_index=True)
+
+    class Meta:
+        indexes = [
+            # type listings filter on the type and return rows in id order
+            models.Index(fields=['restaurant_type', 'id'], name='core_restaurant_type_idx'),
+            # keyset pagination with ?ordering=date_opened
+            models.Index(fields=['date_opened', 'id'], name='core_restaurant_opened_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    # read by core/pagination.py instead of running COUNT(*)
+    @classmethod
+    def counted(cls, queryset):
+        """
+        The number of restaurants in ``queryset`` from the RestaurantCount
+        counters when it is the unfiltered table, otherwise None.
+        """
+        if queryset.query.has_filters():
+            return None
+        return RestaurantCount.total()
+
+    @classmethod
+    async def acounted(cls, queryset):
+        if queryset.query.has_filters():
+            return None
+        return await RestaurantCount.atotal()
+
     def save(self, *args, **kwargs):
-        print(self._state.adding)
-        super().save(*args, **kwargs)
+        self.grid_cell = grid_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'grid_cell'}
+        # post_save runs outside save_base's transaction; keep the derived
+        # counters and aggregates updated by the signals in the same one
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 # rating model:
@@ -41,14 +78,31 @@ class Rating(models.Model):
         validators=[MinValueValidator(1), MaxValueValidator(5)]
     )
 
+    class Meta:
+        indexes = [
+            # a user's ratings (MyRatings), optionally for one restaurant
+            models.Index(fields=['user', 'restaurant'], name='core_rating_user_idx'),
+        ]
+
     def __str__(self):
         return f"Rating: {self.rating}"
     
 # sale model:
 class Sale(models.Model):
-    restaurant = models.ForeignKey(Restaurant, on_delete=models.SET_NULL, null=True, related_name='sales')
+    # no single-column index: core_sale_restaurant_idx starts with restaurant_id
+    restaurant = models.ForeignKey(
+        Restaurant, on_delete=models.SET_NULL, null=True, related_name='sales', db_index=False
+    )
     income = models.DecimalField(max_digits=8, decimal_places=2)
     datetime = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # keyset pagination walks sales newest first and date filters seek on it
+            models.Index(fields=['datetime', 'id'], name='core_sale_datetime_idx'),
+            # one restaurant's sales in a time range, newest first, without a sort
+            models.Index(fields=['restaurant', 'datetime', 'id'], name='core_sale_restaurant_idx'),
+        ]
     
 # Staff model:
 class Staff(models.Model):
@@ -57,3 +111,198 @@ class Staff(models.Model):
     # is created -- id | staff_id | restaurant_id
     restaurant = models.ManyToManyField(Restaurant)
 
+
+
+# rating summary model:
+class RestaurantRatingSummary(models.Model):
+    # one row per restaurant, kept in step with Rating by the signals in core/signals.py
+    restaurant = models.OneToOneField(
+        Restaurant, on_delete=models.CASCADE, primary_key=True, related_name='rating_summary'
+    )
+    count = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    star_1 = models.PositiveIntegerField(default=0)
+    star_2 = models.PositiveIntegerField(default=0)
+    star_3 = models.PositiveIntegerField(default=0)
+    star_4 = models.PositiveIntegerField(default=0)
+    star_5 = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Rating summary: {self.restaurant_id}"
+
+    @property
+    def average(self):
+        return round(self.total / self.count, 2) if self.count else None
+
+    @property
+    def histogram(self):
+        return {str(star): getattr(self, f'star_{star}') for star in range(1, 6)}
+
+    @classmethod
+    def record(cls, restaurant_id, rating, delta=1):
+        """
+        Add (delta=1) or remove (delta=-1) one rating in a single UPDATE.
+        """
+        rating = int(rating)
+        deltas = {'count': delta, 'total': delta * rating}
+        if 1 <= rating <= 5:
+            deltas[f'star_{rating}'] = delta
+        increment_or_create(cls, {'restaurant_id': restaurant_id}, create=delta > 0, **deltas)
+
+    @classmethod
+    def record_many(cls, ratings):
+        """
+        Add many new ``(restaurant_id, rating)`` pairs with one upsert per
+        restaurant, for ratings written by ``bulk_create`` (which sends no signals).
+        """
+        deltas = {}
+        for restaurant_id, rating in ratings:
+            row = deltas.setdefault(
+                (restaurant_id,), {'count': 0, 'total': 0, **{f'star_{star}': 0 for star in range(1, 6)}}
+            )
+            row['count'] += 1
+            row['total'] += rating
+            row[f'star_{rating}'] += 1
+        bulk_increment_or_create(cls, ('restaurant',), deltas)
+
+
+# sales rollup model:
+class SalesRollup(models.Model):
+    """
+    Sale count and income per hour or day bucket.
+
+    Rows with a restaurant hold that restaurant's totals; rows without one hold
+    the totals of a whole ``restaurant_type``. Kept current by core/rollups.py.
+    """
+
+    class Granularity(models.TextChoices):
+        HOUR = 'H', 'Hour'
+        DAY = 'D', 'Day'
+
+    granularity = models.CharField(max_length=1, choices=Granularity.choices)
+    bucket = models.DateTimeField()
+    restaurant = models.ForeignKey(
+        Restaurant, on_delete=models.CASCADE, null=True, blank=True, related_name='sales_rollups'
+    )
+    restaurant_type = models.CharField(max_length=2, choices=Restaurant.TypeChoices.choices)
+    sale_count = models.IntegerField(default=0)
+    income = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            # the unique indexes double as the range-scan indexes for the analytics queries
+            models.UniqueConstraint(
+                fields=['granularity', 'restaurant', 'bucket'],
+                condition=models.Q(restaurant__isnull=False),
+                name='core_rollup_restaurant_bucket_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['granularity', 'restaurant_type', 'bucket'],
+                condition=models.Q(restaurant__isnull=True),
+                name='core_rollup_type_bucket_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_granularity_display()} {self.bucket:%Y-%m-%d %H:%M}: {self.income}"
+
+
+# map cluster model:
+class RestaurantGridAggregate(models.Model):
+    """
+    Restaurant count and coordinate sums per map grid cell, zoom level and type.
+    Kept current by core/clusters.py so map viewports never read Restaurant rows.
+    """
+    zoom = models.PositiveSmallIntegerField()
+    cell_x = models.IntegerField()
+    cell_y = models.IntegerField()
+    restaurant_type = models.CharField(max_length=2, choices=Restaurant.TypeChoices.choices)
+    count = models.IntegerField(default=0)
+    # sums rather than averages so adding or removing a restaurant is one UPDATE
+    latitude_sum = models.FloatField(default=0)
+    longitude_sum = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            # also the index a viewport query (zoom, y range, x range) seeks on
+            models.UniqueConstraint(
+                fields=['zoom', 'cell_y', 'cell_x', 'restaurant_type'],
+                name='core_grid_aggregate_cell_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"z{self.zoom} ({self.cell_x}, {self.cell_y}) {self.restaurant_type}: {self.count}"
+
+
+# table version model:
+class TableVersion(models.Model):
+    """
+    Change counter and last change time of a table, bumped by the signals in
+    core/signals.py. Cached responses are keyed on it, so a write makes every
+    older entry unreachable without any TTL.
+    """
+    table = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    modified = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.table} v{self.version}"
+
+
+# restaurant counter model:
+class RestaurantCount(models.Model):
+    """
+    Number of restaurants per type plus one ``TOTAL`` row, kept current by
+    core/signals.py and bulk ingestion so counting is a primary key lookup.
+    ``reconcile_restaurant_counts`` repairs drift from raw SQL writes.
+    """
+    TOTAL = '*'
+
+    key = models.CharField(max_length=2, primary_key=True)
+    # signed, so a decrement on a drifted counter never blocks a delete
+    count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.count}"
+
+    @classmethod
+    def record(cls, types, sign=1):
+        """
+        Add (sign=1) or remove (sign=-1) restaurants of the given types, one
+        per item, with one upsert per type plus the total.
+        """
+        deltas = {}
+        for restaurant_type in types:
+            deltas[restaurant_type] = deltas.get(restaurant_type, 0) + sign
+        if not deltas:
+            return
+        deltas[cls.TOTAL] = sum(deltas.values())
+        bulk_increment_or_create(cls, ('key',), {(key,): {'count': delta} for key, delta in deltas.items()})
+
+    @classmethod
+    def total(cls):
+        return cls.objects.filter(key=cls.TOTAL).values_list('count', flat=True).first() or 0
+
+    @classmethod
+    async def atotal(cls):
+        return await cls.objects.filter(key=cls.TOTAL).values_list('count', flat=True).afirst() or 0
+
+    @classmethod
+    def by_type(cls, types=None):
+        """
+        ``{type: count}`` for ``types`` (every type by default), zeros included.
+        """
+        types = list(types or Restaurant.TypeChoices.values)
+        found = dict(cls.objects.filter(key__in=types).values_list('key', 'count'))
+        return {restaurant_type: found.get(restaurant_type, 0) for restaurant_type in types}
+
+    @classmethod
+    def actual(cls):
+        """
+        The counts recomputed from the Restaurant table, as ``{key: count}``.
+        """
+        rows = Restaurant.objects.values_list('restaurant_type').annotate(count=models.Count('id')).order_by()
+        counts = dict(rows)
+        counts[cls.TOTAL] = sum(counts.values())
+        return counts
@@ -0,0 +1,159 @@
+"""
+The OpenAPI schema, generated once and served from memory.
+
+``SpectacularAPIView`` walks every view and its ``@extend_schema`` on each
+request. The schema only changes with the code, so it is generated once per
+deploy instead. ``python manage.py build_openapi_schema`` writes it, gzipped,
+to ``settings.OPENAPI_SCHEMA['PATH']``. Without that file (or without a
+``PATH``) the first request generates it, and writes the file when a
+``PATH`` is set. After that each process keeps the YAML and JSON renderings
+in memory, identity and gzipped, each with a strong ``ETag``. Serving a
+request is then a dictionary lookup. Run the command on deploy so a stale
+file is never served.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_safe
+
+
+# content negotiation as SpectacularAPIView does it: YAML unless JSON is asked for
+MEDIA_TYPES = {
+    'application/vnd.oai.openapi': 'yaml',
+    'application/yaml': 'yaml',
+    'application/vnd.oai.openapi+json': 'json',
+    'application/json': 'json',
+}
+FORMATS = {
+    'openapi': 'application/vnd.oai.openapi',
+    'yaml': 'application/yaml',
+    'openapi-json': 'application/vnd.oai.openapi+json',
+    'json': 'application/json',
+}
+
+
+def generate_schema():
+    """
+    The schema as ``SpectacularAPIView`` would build it, as a dict.
+    """
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+
+
+class Representation:
+    __slots__ = ('body', 'gzipped', 'etag', 'gzip_etag')
+
+    def __init__(self, body):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = quote_etag(digest)
+        self.gzip_etag = quote_etag(f'{digest}-gzip')
+
+
+class OpenAPISchema:
+    def __init__(self, schema):
+        from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+        self.representations = {
+            'yaml': Representation(OpenApiYamlRenderer().render(schema)),
+            'json': Representation(OpenApiJsonRenderer().render(schema, FORMATS['openapi-json'], {})),
+        }
+        self.title = schema.get('info', {}).get('title') or 'schema'
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, 'rb') as f:
+            return cls(json.load(f))
+
+    def save(self, path):
+        # written to a temporary file first so workers never read half of it
+        with open(f'{path}.tmp', 'wb') as f:
+            f.write(self.representations['json'].gzipped)
+        os.replace(f'{path}.tmp', path)
+
+
+def accepts_gzip(accept_encoding):
+    """
+    Whether an ``Accept-Encoding`` header value allows gzip: ``gzip`` (or
+    ``x-gzip``, or else ``*``) listed with a q-value above 0.
+    """
+    qvalues = {}
+    for item in accept_encoding.split(','):
+        coding, *params = (part.strip() for part in item.split(';'))
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            qvalues[coding.lower()] = q
+    for coding in ('gzip', 'x-gzip', '*'):
+        if coding in qvalues:
+            return qvalues[coding] > 0
+    return False
+
+
+_schema = None
+_schema_lock = threading.Lock()
+
+
+def openapi_schema():
+    """
+    The process-wide schema: loaded from ``settings.OPENAPI_SCHEMA['PATH']``
+    when the file exists, generated otherwise.
+    """
+    global _schema
+    if _schema is None:
+        with _schema_lock:
+            if _schema is None:
+                path = getattr(settings, 'OPENAPI_SCHEMA', {}).get('PATH')
+                if path and os.path.exists(path):
+                    schema = OpenAPISchema.load(path)
+                else:
+                    schema = OpenAPISchema(generate_schema())
+                    if path:
+                        schema.save(path)
+                _schema = schema
+    return _schema
+
+
+@require_safe
+def schema_view(request):
+    requested = request.GET.get('format')
+    if requested is not None:
+        media_type = FORMATS.get(requested)
+    else:
+        media_type = request.get_preferred_type(list(MEDIA_TYPES))
+    if media_type is None:
+        response = HttpResponse(status=406)
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    schema = openapi_schema()
+    representation = schema.representations[MEDIA_TYPES[media_type]]
+    compressed = accepts_gzip(request.headers.get('Accept-Encoding', ''))
+    etag = representation.gzip_etag if compressed else representation.etag
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(representation.gzipped if compressed else representation.body, content_type=media_type)
+        if compressed:
+            response['Content-Encoding'] = 'gzip'
+        extension = 'json' if MEDIA_TYPES[media_type] == 'json' else 'yaml'
+        response['Content-Disposition'] = f'inline; filename="{schema.title}.{extension}"'
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+    return response
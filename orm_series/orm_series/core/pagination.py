@@ -0,0 +1,327 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max, Min, Q
+from django.utils.functional import cached_property
+
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+Cursor = namedtuple('Cursor', ['ordering', 'position', 'reverse'])
+
+
+def estimate_count(queryset):
+    """
+    Cheap row estimate taken from the primary key span of the queryset.
+
+    MIN and MAX on the primary key are answered from the index in O(log n), so
+    this stays constant-time on large tables. They run as two queries because
+    SQLite only applies that optimisation to a lone MIN() or MAX(); both in one
+    SELECT scan the table. It over-counts when rows were deleted.
+    """
+    queryset = queryset.order_by()
+    low = queryset.aggregate(low=Min('pk'))['low']
+    if low is None:
+        return 0
+    return queryset.aggregate(high=Max('pk'))['high'] - low + 1
+
+
+async def aestimate_count(queryset):
+    queryset = queryset.order_by()
+    low = (await queryset.aaggregate(low=Min('pk')))['low']
+    if low is None:
+        return 0
+    return (await queryset.aaggregate(high=Max('pk')))['high'] - low + 1
+
+
+def counted(queryset):
+    """
+    The size of ``queryset`` from counters its model maintains, or None.
+
+    Models opt in with ``counted(queryset)`` and ``acounted(queryset)``
+    classmethods, which return None for querysets they cannot answer.
+    """
+    counter = getattr(queryset.model, 'counted', None)
+    return None if counter is None else counter(queryset)
+
+
+async def acounted(queryset):
+    counter = getattr(queryset.model, 'acounted', None)
+    return None if counter is None else await counter(queryset)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a fixed, unique ordering.
+
+    Instead of ``OFFSET`` every page filters on the position of the last row
+    seen, so page N costs the same as page 1. Cursors are opaque base64 tokens.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    # ordering name -> tuple of model fields, the last one must be unique
+    orderings = {'id': ('id',)}
+    default_ordering = 'id'
+    ordering_query_param = 'ordering'
+
+    # 'none' skips the total, 'exact' runs COUNT(*), 'estimate' is O(log n)
+    count_query_param = 'count'
+    count_modes = ('none', 'exact', 'estimate')
+    default_count_mode = 'none'
+
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = self.page_queryset(queryset, request)
+        self.count = self.get_count(queryset, request)
+        return self.set_page(list(page))
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        ``paginate_queryset`` for async views, with the async ORM.
+        """
+        page = self.page_queryset(queryset, request)
+        self.count = await self.aget_count(queryset, request)
+        return self.set_page([row async for row in page])
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering_name = self.get_ordering_name(request)
+        self.ordering = self.orderings[self.ordering_name]
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = cursor.reverse if cursor else False
+        self.cursor, self.reverse = cursor, reverse
+
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if cursor is not None:
+            queryset = queryset.filter(self._seek(cursor.position, reverse))
+
+        # fetch one extra row to know whether there is another page
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        cursor, reverse = self.cursor, self.reverse
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = bool(results), has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None and bool(results)
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True, 'example': 123},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    # request parsing:
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering_name(self, request):
+        name = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if name not in self.orderings:
+            raise ValidationError({
+                self.ordering_query_param: f"Must be one of: {', '.join(self.orderings)}."
+            })
+        return name
+
+    def get_count_mode(self, request):
+        mode = request.query_params.get(self.count_query_param, self.default_count_mode)
+        if mode not in self.count_modes:
+            raise ValidationError({
+                self.count_query_param: f"Must be one of: {', '.join(self.count_modes)}."
+            })
+        return mode
+
+    def get_count(self, queryset, request):
+        mode = self.get_count_mode(request)
+        if mode == 'exact':
+            return self.get_exact_count(queryset)
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+    async def aget_count(self, queryset, request):
+        mode = self.get_count_mode(request)
+        if mode == 'exact':
+            return await self.aget_exact_count(queryset)
+        if mode == 'estimate':
+            return await aestimate_count(queryset)
+        return None
+
+    def get_exact_count(self, queryset):
+        count = counted(queryset)
+        return queryset.count() if count is None else count
+
+    async def aget_exact_count(self, queryset):
+        count = await acounted(queryset)
+        return await queryset.acount() if count is None else count
+
+    # cursors:
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            ordering = payload['o']
+            reverse = bool(payload.get('r', 0))
+            fields = self.orderings[ordering]
+            if ordering != self.ordering_name or len(payload['p']) != len(fields):
+                raise ValueError
+            position = [
+                model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(fields, payload['p'])
+            ]
+        except (BinasciiError, DjangoValidationError, KeyError, TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(ordering=ordering, position=position, reverse=reverse)
+
+    def encode_cursor(self, cursor):
+        payload = {'o': cursor.ordering, 'p': cursor.position}
+        if cursor.reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':'))
+        encoded = urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self._position(self.page[-1])
+        return self.encode_cursor(Cursor(self.ordering_name, position, False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self._position(self.page[0])
+        return self.encode_cursor(Cursor(self.ordering_name, position, True))
+
+    # query building:
+    def _order_by(self, reverse):
+        order_by = []
+        for name in self.ordering:
+            descending = name.startswith('-') != reverse
+            order_by.append(('-' if descending else '') + name.lstrip('-'))
+        return order_by
+
+    def _seek(self, position, reverse):
+        """
+        Build ``(a, b) > (x, y)`` as ``a >= x AND (a > x OR (a = x AND b > y))``.
+        The leading ``a >= x`` gives the planner one index range to start
+        from; without it SQLite walks the composite index from its first entry.
+        """
+        query = Q()
+        for index, name in enumerate(self.ordering):
+            descending = name.startswith('-') != reverse
+            field = name.lstrip('-')
+            branch = Q(**{f'{field}__{"lt" if descending else "gt"}': position[index]})
+            for prefix, value in zip(self.ordering[:index], position[:index]):
+                branch &= Q(**{prefix.lstrip('-'): value})
+            query |= branch
+        if len(self.ordering) > 1:
+            name = self.ordering[0]
+            descending = name.startswith('-') != reverse
+            query &= Q(**{f'{name.lstrip("-")}__{"lte" if descending else "gte"}': position[0]})
+        return query
+
+    def _position(self, row):
+        fields = [name.lstrip('-') for name in self.ordering]
+        if isinstance(row, dict):
+            return [row[field] for field in fields]
+        return [getattr(row, field) for field in fields]
+
+
+class RestaurantPagination(KeysetPagination):
+    """
+    Keyset pagination for restaurants, by ``id`` or by ``(date_opened, id)``.
+    """
+    orderings = {
+        'id': ('id',),
+        'date_opened': ('date_opened', 'id'),
+    }
+    # clients of the page-number listing always got the total; the counters
+    # keep it cheap
+    default_count_mode = 'exact'
+
+
+class CountedPaginator(Paginator):
+    """
+    ``Paginator`` that reads the total from the model's counters when it
+    maintains them, see ``counted()``.
+    """
+
+    @cached_property
+    def count(self):
+        count = counted(self.object_list)
+        return super().count if count is None else count
+
+
+class LegacyRestaurantPagination(PageNumberPagination):
+    """
+    ``?page=N`` pagination kept for old clients; the page count comes from
+    the counters instead of a ``COUNT(*)`` on every page.
+    """
+    page_size = 10
+    django_paginator_class = CountedPaginator
+
+
+class SalePagination(KeysetPagination):
+    """
+    Keyset pagination for sales, newest first.
+    """
+    orderings = {'datetime': ('-datetime', '-id')}
+    default_ordering = 'datetime'
+
+
+class RatingPagination(KeysetPagination):
+    """
+    Keyset pagination for ratings in insertion order.
+    """
+    orderings = {'id': ('id',)}
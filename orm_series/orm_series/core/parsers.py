@@ -0,0 +1,66 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .renderers import MSGPACK_MEDIA_TYPE, ORJSON_MEDIA_TYPE, msgpack, orjson
+
+
+class NDJSONParser(BaseParser):
+    """
+    Newline-delimited JSON, one value per line.
+
+    Lines are decoded lazily while the view iterates, so a large upload is
+    never held in memory at once. Each item is ``(line_number, value, error)``
+    where ``error`` is set instead of ``value`` for a line that is not JSON.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return ndjson_rows(stream, encoding)
+
+
+def ndjson_rows(stream, encoding):
+    if stream is None:
+        return
+    for number, line in enumerate(stream, 1):
+        try:
+            line = line.decode(encoding).strip()
+            if line:
+                yield number, json.loads(line), None
+        except ValueError as e:
+            # UnicodeDecodeError and JSONDecodeError are both ValueErrors
+            yield number, None, f"Invalid JSON: {e}"
+
+
+class ORJSONParser(BaseParser):
+    """
+    JSON decoded by orjson, for requests sent as ``application/json; engine=orjson``.
+    """
+    media_type = ORJSON_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            raise ParseError("orjson is not installed on this server.")
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as e:
+            raise ParseError(f"JSON parse error - {e}")
+
+
+class MessagePackParser(BaseParser):
+    """
+    A MessagePack request body.
+    """
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if msgpack is None:
+            raise ParseError("msgpack is not installed on this server.")
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as e:
+            raise ParseError(f"MessagePack parse error - {e}")
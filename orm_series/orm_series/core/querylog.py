@@ -0,0 +1,167 @@
+"""
+N+1 detection and slow query logging.
+
+``QueryInspector`` watches the queries of one request (or one block of test
+code). It groups them by fingerprint: the SQL with literals, placeholders and
+savepoint names normalised, so the same statement with different values
+counts as one. A fingerprint seen more than ``repeat_threshold`` times is
+reported as a probable N+1. A query slower than ``slow_query_ms`` is reported
+together with its ``EXPLAIN QUERY PLAN``, taken straight after it on the same
+connection.
+
+``QueryInspectorMiddleware`` (core/middleware.py) inspects every request when
+``settings.QUERY_INSPECTOR['ENABLED']`` is set. It logs what it finds to the
+``core.querylog`` logger. Under ``core.testing.QueryInspectingTestRunner`` a
+probable N+1 raises ``QueryProblems`` instead, so the test fails. Slow queries
+are only logged there: how long a query takes depends on the machine running
+the tests. Tests can also wrap code in ``inspect_queries()``.
+
+The queries are seen by an execute wrapper installed on every connection (see
+core/signals.py), which finds the active inspector through a context
+variable. It does not depend on django-debug-toolbar, so it can stay on in
+staging.
+"""
+import contextvars
+import functools
+import logging
+import re
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+current_inspector = contextvars.ContextVar('current_inspector', default=None)
+
+_LITERALS = re.compile(
+    r"""'(?:[^']|'')*'"""            # string literals
+    r"""|\b\d+(?:\.\d+)?\b"""         # numbers
+    r"""|%s|\?"""                    # placeholders
+)
+_SAVEPOINT = re.compile(r'(SAVEPOINT) "[^"]*"')
+_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+@functools.lru_cache(maxsize=4096)
+def fingerprint(sql):
+    """
+    ``sql`` with every literal and placeholder replaced by ``?`` and lists
+    of them (``IN (...)``, multi-row ``VALUES``) collapsed to one.
+    """
+    sql = _SAVEPOINT.sub(r'\1 ?', sql)
+    sql = _LITERALS.sub('?', sql)
+    sql = _LISTS.sub('(...)', sql)
+    sql = re.sub(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+', '(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+class QueryProblems(AssertionError):
+    """
+    Raised in test mode when a request repeats a query.
+    """
+
+
+class QueryInspector:
+    def __init__(self, repeat_threshold=10, slow_query_ms=100, explain=True):
+        self.repeat_threshold = repeat_threshold
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.explain = explain
+        self.counts = {}
+        self.examples = {}
+        self.slow_queries = []
+        self.paused = False
+
+    def record(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            key = fingerprint(sql)
+            count = self.counts[key] = self.counts.get(key, 0) + 1
+            if count == 1:
+                self.examples[key] = sql
+            if duration >= self.slow_query_seconds:
+                plan = self.query_plan(context['connection'], sql, params) if self.explain and not many else None
+                self.slow_queries.append((duration, sql, params, plan))
+
+    def query_plan(self, connection, sql, params):
+        if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return None
+        self.paused = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+                return [' '.join(str(column) for column in row) if connection.vendor != 'sqlite' else row[-1]
+                        for row in cursor.fetchall()]
+        except Exception as e:
+            return [f"EXPLAIN failed: {e}"]
+        finally:
+            self.paused = False
+
+    def repeated(self):
+        """
+        ``(count, fingerprint)`` of the fingerprints above the threshold,
+        most repeated first.
+        """
+        return sorted(
+            ((count, key) for key, count in self.counts.items() if count > self.repeat_threshold), reverse=True,
+        )
+
+    def problems(self):
+        lines = []
+        for count, key in self.repeated():
+            lines.append(f"Probable N+1: {count} queries like {key}")
+        for duration, sql, params, plan in self.slow_queries:
+            lines.append(f"Slow query ({duration * 1000:.1f} ms): {sql} {params!r}")
+            lines += [f"    {line}" for line in plan or []]
+        return lines
+
+
+def inspect_query(execute, sql, params, many, context):
+    inspector = current_inspector.get()
+    if inspector is None or inspector.paused:
+        return execute(sql, params, many, context)
+    return inspector.record(execute, sql, params, many, context)
+
+
+def install_query_inspector(sender, connection, **kwargs):
+    # connected to connection_created in core/signals.py
+    if inspect_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(inspect_query)
+
+
+def inspector_settings():
+    config = getattr(settings, 'QUERY_INSPECTOR', {})
+    return {
+        'repeat_threshold': config.get('REPEAT_THRESHOLD', 10),
+        'slow_query_ms': config.get('SLOW_QUERY_MS', 100),
+        'explain': config.get('EXPLAIN', True),
+    }
+
+
+@contextmanager
+def inspect_queries(raise_problems=True, **options):
+    """
+    Inspect the queries run inside the block; settings.QUERY_INSPECTOR gives
+    the defaults of ``options``. Raises ``QueryProblems`` at the end of the
+    block if it found a probable N+1, unless ``raise_problems`` is false;
+    slow queries are logged.
+
+        with inspect_queries(repeat_threshold=3):
+            self.client.get(f'/core/restaurant/{pk}/staff/')
+    """
+    inspector = QueryInspector(**{**inspector_settings(), **options})
+    token = current_inspector.set(inspector)
+    try:
+        yield inspector
+    finally:
+        current_inspector.reset(token)
+    problems = inspector.problems()
+    if problems:
+        if raise_problems and inspector.repeated():
+            raise QueryProblems('\n'.join(problems))
+        logger.warning('\n'.join(problems))
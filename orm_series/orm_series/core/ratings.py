@@ -0,0 +1,166 @@
+"""
+Batched rating writes.
+
+``submit_ratings`` stores many ratings with one ``IN`` query to check the
+restaurants, one ``bulk_create`` and one summary upsert per restaurant.
+``RatingBuffer`` is a write-behind queue that collects single submissions and
+hands them to ``submit_ratings`` in batches, so the cost of a commit is shared
+by every rating that arrived within the flush interval.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, transaction
+
+from .models import Rating, Restaurant, RestaurantRatingSummary
+
+
+logger = logging.getLogger(__name__)
+
+
+def existing_restaurants(restaurant_ids):
+    """
+    The subset of ``restaurant_ids`` that exist, in one ``IN`` query.
+    """
+    return set(Restaurant.objects.filter(id__in=set(restaurant_ids)).values_list('id', flat=True))
+
+
+def existing_users(user_ids):
+    """
+    The subset of ``user_ids`` that exist, in one ``IN`` query.
+    """
+    return set(User.objects.filter(id__in=set(user_ids)).values_list('id', flat=True))
+
+
+def submit_ratings(ratings, known=None, check_users=False, batch_size=1000):
+    """
+    Store ``(user_id, restaurant_id, rating)`` triples whose rating is already
+    validated. Ratings for restaurants that do not exist are skipped; pass
+    ``known`` when the caller has already looked the restaurants up. With
+    ``check_users``, ratings of users that no longer exist are skipped as
+    well. Returns the number stored.
+    """
+    ratings = list(ratings)
+    if known is None:
+        known = existing_restaurants(restaurant_id for _, restaurant_id, _ in ratings)
+    ratings = [row for row in ratings if row[1] in known]
+    if check_users and ratings:
+        users = existing_users(user_id for user_id, _, _ in ratings)
+        ratings = [row for row in ratings if row[0] in users]
+    if not ratings:
+        return 0
+    with transaction.atomic():
+        Rating.objects.bulk_create(
+            [Rating(user_id=user_id, restaurant_id=restaurant_id, rating=rating) for user_id, restaurant_id, rating in ratings],
+            batch_size=batch_size,
+        )
+        RestaurantRatingSummary.record_many((restaurant_id, rating) for _, restaurant_id, rating in ratings)
+    return len(ratings)
+
+
+class RatingBuffer:
+    """
+    Write-behind queue for single ratings.
+
+    A daemon thread flushes at most ``flush_interval`` seconds after a rating
+    arrives, sooner once ``max_batch`` ratings are waiting. If the thread
+    falls behind and ``max_pending`` ratings pile up, ``add`` flushes in the
+    caller's thread instead of growing the queue. Everything still queued is
+    flushed when the process exits.
+    """
+
+    def __init__(self, flush_interval=1.0, max_batch=500, max_pending=10_000):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.pending = []
+        self.flushed = 0
+        self.condition = threading.Condition()
+        self.flush_lock = threading.Lock()
+        self.thread = None
+        self.stopped = False
+
+    def add(self, user_id, restaurant_id, rating):
+        with self.condition:
+            self.pending.append((user_id, restaurant_id, rating))
+            size = len(self.pending)
+            self._start()
+            # wake the thread for the first rating, so it starts the interval
+            # timer, and again once a batch is full
+            if size == 1 or size >= self.max_batch:
+                self.condition.notify()
+        if size >= self.max_pending:
+            self.flush()
+
+    def flush(self):
+        """
+        Write everything queued so far; returns the number of ratings stored.
+        """
+        with self.flush_lock:
+            with self.condition:
+                batch, self.pending = self.pending, []
+            if not batch:
+                return 0
+            try:
+                # users may have been deleted since their rating was queued
+                stored = submit_ratings(batch, check_users=True)
+            except Exception:
+                logger.exception("Dropped %d buffered ratings", len(batch))
+                return 0
+            self.flushed += stored
+            return stored
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.flush()
+
+    def _start(self):
+        # started on first use, so every forked worker process runs its own thread
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped = False
+            self.thread = threading.Thread(target=self._run, name="rating-buffer", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if not self.pending and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                # the oldest rating waits at most flush_interval
+                if len(self.pending) < self.max_batch:
+                    self.condition.wait(self.flush_interval)
+            self.flush()
+            close_old_connections()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def rating_buffer():
+    """
+    The process-wide buffer configured by ``settings.RATING_WRITE_BEHIND``,
+    or None when write-behind is disabled.
+    """
+    global _buffer
+    config = getattr(settings, 'RATING_WRITE_BEHIND', {})
+    if not config.get('ENABLED'):
+        return None
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = RatingBuffer(
+                flush_interval=config.get('FLUSH_INTERVAL', 1.0),
+                max_batch=config.get('MAX_BATCH', 500),
+                max_pending=config.get('MAX_PENDING', 10_000),
+            )
+            atexit.register(_buffer.stop)
+    return _buffer
@@ -0,0 +1,77 @@
+"""
+Faster response formats, picked by content negotiation.
+
+Plain ``application/json`` (and no ``Accept`` header at all) keeps using DRF's
+``JSONRenderer``, so existing clients get the same bytes as before. Clients
+opt in with ``Accept: application/json; engine=orjson`` for orjson-encoded
+JSON (the same bytes only under DRF's default JSON settings, see
+``ORJSONRenderer``), or ``Accept: application/msgpack`` for MessagePack,
+which internal services use. The same media types select the parsers in core/parsers.py.
+
+Both libraries are optional; settings.py only offers a format when its
+library is installed.
+"""
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+ORJSON_MEDIA_TYPE = 'application/json; engine=orjson'
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+# whatever orjson and msgpack cannot encode is converted the way JSONRenderer does it
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON encoded by orjson; types it cannot encode go through DRF's encoder.
+    The bytes match ``JSONRenderer`` with DRF's default ``COMPACT_JSON`` and
+    ``UNICODE_JSON``: no spaces after separators, raw UTF-8, and datetime
+    objects with their microseconds and ``Z`` for a zero UTC offset. Those
+    settings are not read here, though. NaN and infinity are written as
+    ``null`` where ``JSONRenderer`` refuses them, and an ``indent`` in the
+    media type always means two spaces.
+    """
+    # the parameter keeps it from matching a plain application/json Accept header
+    media_type = ORJSON_MEDIA_TYPE
+    format = 'orjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+        if accepted_media_type and 'indent=' in accepted_media_type:
+            # orjson only supports two space indentation
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=option)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack with the same values as the JSON output: decimals stay
+    strings (as the serializers emit them) and datetimes are ISO 8601 strings.
+    """
+    media_type = MSGPACK_MEDIA_TYPE
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True, datetime=False)
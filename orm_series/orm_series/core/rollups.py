@@ -0,0 +1,193 @@
+"""
+Hourly and daily sales rollups.
+
+Every new, edited or deleted Sale adjusts four SalesRollup rows (hour and day,
+for its restaurant and for its restaurant type) through the signals in
+core/signals.py. A deleted restaurant takes its totals out of its type's rows,
+and a restaurant changing type moves them to the new one. Bulk loads and anything done with ``QuerySet.update()`` skip
+those signals, so ``rebuild_rollups`` recomputes a time window from scratch.
+Sales without a restaurant are left out of the rollups.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncDay, TruncHour
+
+from .models import Sale, SalesRollup
+from .utils import increment_or_create
+
+
+TRUNCATE = {
+    SalesRollup.Granularity.HOUR: TruncHour,
+    SalesRollup.Granularity.DAY: TruncDay,
+}
+
+
+def bucket_start(when, granularity):
+    """
+    Start of the UTC hour or day containing ``when``.
+    """
+    when = when.astimezone(dt_timezone.utc)
+    if granularity == SalesRollup.Granularity.DAY:
+        return when.replace(hour=0, minute=0, second=0, microsecond=0)
+    return when.replace(minute=0, second=0, microsecond=0)
+
+
+def record_sale(restaurant_id, restaurant_type, when, income, delta=1):
+    """
+    Add (delta=1) or remove (delta=-1) one sale from its rollup buckets.
+    """
+    if restaurant_id is None:
+        return
+    # round the way the income column stores it, callers may pass floats or strings
+    income = Sale._meta.get_field('income').to_python(income).quantize(Decimal('0.01'))
+    for granularity in TRUNCATE:
+        bucket = bucket_start(when, granularity)
+        increment_or_create(
+            SalesRollup,
+            {'granularity': granularity, 'bucket': bucket, 'restaurant_id': restaurant_id},
+            defaults={'restaurant_type': restaurant_type},
+            create=delta > 0,
+            sale_count=delta,
+            income=delta * income,
+        )
+        increment_or_create(
+            SalesRollup,
+            {'granularity': granularity, 'bucket': bucket, 'restaurant': None, 'restaurant_type': restaurant_type},
+            create=delta > 0,
+            sale_count=delta,
+            income=delta * income,
+        )
+
+
+def take_out_restaurant(restaurant_id):
+    """
+    Subtract every bucket of one restaurant's rollups from the rows of the
+    type they were recorded under. Its own rows are left alone: a deleted
+    restaurant's go with the cascade.
+    """
+    own = SalesRollup.objects.filter(
+        restaurant_id=restaurant_id, granularity=OuterRef('granularity'), bucket=OuterRef('bucket'),
+        restaurant_type=OuterRef('restaurant_type'),
+    )
+    SalesRollup.objects.filter(Exists(own), restaurant=None).update(
+        sale_count=F('sale_count') - Subquery(own.values('sale_count')),
+        income=F('income') - Subquery(own.values('income')),
+    )
+
+
+def move_restaurant(restaurant_id, restaurant_type):
+    """
+    Move one restaurant's rollups to ``restaurant_type``: out of the old type's
+    rows, into the new type's (created where missing), and relabel its own.
+    A fixed number of queries, however many buckets it has.
+    """
+    take_out_restaurant(restaurant_id)
+    own = SalesRollup.objects.filter(
+        restaurant_id=restaurant_id, granularity=OuterRef('granularity'), bucket=OuterRef('bucket'),
+    )
+    target = SalesRollup.objects.filter(restaurant=None, restaurant_type=restaurant_type)
+    target.filter(Exists(own)).update(
+        sale_count=F('sale_count') + Subquery(own.values('sale_count')),
+        income=F('income') + Subquery(own.values('income')),
+    )
+    missing = SalesRollup.objects.filter(restaurant_id=restaurant_id).exclude(
+        Exists(target.filter(granularity=OuterRef('granularity'), bucket=OuterRef('bucket')))
+    )
+    SalesRollup.objects.bulk_create([
+        SalesRollup(
+            granularity=row.granularity, bucket=row.bucket, restaurant=None, restaurant_type=restaurant_type,
+            sale_count=row.sale_count, income=row.income,
+        )
+        for row in missing
+    ])
+    SalesRollup.objects.filter(restaurant_id=restaurant_id).update(restaurant_type=restaurant_type)
+
+
+def _day_bounds(start, end):
+    # widen the window to whole UTC days so hour and day buckets cover the same sales
+    if start is not None:
+        start = bucket_start(start, SalesRollup.Granularity.DAY)
+    if end is not None:
+        day = bucket_start(end, SalesRollup.Granularity.DAY)
+        end = day if day == end.astimezone(dt_timezone.utc) else day + timedelta(days=1)
+    return start, end
+
+
+def _window(queryset, field, start, end):
+    if start is not None:
+        queryset = queryset.filter(**{f'{field}__gte': start})
+    if end is not None:
+        queryset = queryset.filter(**{f'{field}__lt': end})
+    return queryset
+
+
+def rebuild_rollups(start=None, end=None, batch_size=1000):
+    """
+    Recompute all rollups of the UTC days overlapping [start, end).
+    With no bounds every rollup is rebuilt. Returns the number of rows written.
+    """
+    start, end = _day_bounds(start, end)
+    sales = _window(Sale.objects.filter(restaurant__isnull=False), 'datetime', start, end)
+
+    rows = []
+    for granularity, truncate in TRUNCATE.items():
+        bucketed = sales.annotate(bucket=truncate('datetime', tzinfo=dt_timezone.utc))
+        per_restaurant = bucketed.values('bucket', 'restaurant_id', 'restaurant__restaurant_type').annotate(
+            sale_count=Count('id'), income=Sum('income')
+        ).order_by()
+        per_type = bucketed.values('bucket', 'restaurant__restaurant_type').annotate(
+            sale_count=Count('id'), income=Sum('income')
+        ).order_by()
+
+        for row in per_restaurant:
+            rows.append(SalesRollup(
+                granularity=granularity, bucket=row['bucket'], restaurant_id=row['restaurant_id'],
+                restaurant_type=row['restaurant__restaurant_type'],
+                sale_count=row['sale_count'], income=row['income'],
+            ))
+        for row in per_type:
+            rows.append(SalesRollup(
+                granularity=granularity, bucket=row['bucket'], restaurant=None,
+                restaurant_type=row['restaurant__restaurant_type'],
+                sale_count=row['sale_count'], income=row['income'],
+            ))
+
+    with transaction.atomic():
+        _window(SalesRollup.objects.all(), 'bucket', start, end).delete()
+        SalesRollup.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def query_rollups(granularity, start, end, restaurant_id=None, restaurant_type=None):
+    """
+    Buckets in [start, end) for one restaurant, one restaurant type or
+    (with neither) everything. Reads only rollup rows, never core_sale.
+    """
+    # buckets emptied by deletes stay behind with a zero count
+    rollups = SalesRollup.objects.filter(
+        granularity=granularity, bucket__gte=start, bucket__lt=end
+    ).exclude(sale_count=0)
+    if restaurant_id is not None:
+        rollups = rollups.filter(restaurant_id=restaurant_id)
+    else:
+        # type rows are already summed over restaurants, at most one per type and bucket
+        rollups = rollups.filter(restaurant__isnull=True)
+        if restaurant_type is not None:
+            rollups = rollups.filter(restaurant_type=restaurant_type)
+    return list(
+        rollups.values('bucket')
+        .annotate(sale_count=Sum('sale_count'), income=Sum('income'))
+        .order_by('bucket')
+    )
+
+
+def bucket_count(granularity, start, end):
+    step = timedelta(days=1) if granularity == SalesRollup.Granularity.DAY else timedelta(hours=1)
+    return (end - start) // step
+
+
+def start_of_today():
+    return datetime.combine(datetime.now(dt_timezone.utc).date(), time.min, tzinfo=dt_timezone.utc)
@@ -1,12 +1,36 @@
+import decimal
+
+from django.db.models import Prefetch
 from rest_framework import serializers
+from rest_framework.fields import ISO_8601
+from rest_framework.settings import api_settings
 
 # import models
-from . models import Restaurant, Sale, Rating, Staff
+from . models import Restaurant, Sale, Rating, Staff, RestaurantRatingSummary
+
+
+class RestaurantRatingSummarySerializer(serializers.ModelSerializer):
+    average = serializers.FloatField(read_only=True, allow_null=True)
+    histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = RestaurantRatingSummary
+        fields = ['restaurant', 'count', 'total', 'average', 'histogram']
+
 
 class RestaurantSerializer(serializers.ModelSerializer):
+    # only sent when the view passes include_rating_summary=True in the context
+    rating_summary = RestaurantRatingSummarySerializer(read_only=True)
+
     class Meta:
         model = Restaurant
-        fields = "__all__"
+        # grid_cell is an internal search index, not part of the API
+        exclude = ['grid_cell']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.context.get('include_rating_summary'):
+            self.fields.pop('rating_summary')
 
 class SaleSerializer(serializers.ModelSerializer):
     class Meta:
@@ -19,6 +43,12 @@ class RatingSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class SalesRollupBucketSerializer(serializers.Serializer):
+    bucket = serializers.DateTimeField()
+    sale_count = serializers.IntegerField()
+    income = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
 class StaffSerializer(serializers.ModelSerializer):
     restaurant = RestaurantSerializer(many=True, read_only=True)  # Nested Restaurant Serializer
 
@@ -26,6 +56,153 @@ class StaffSerializer(serializers.ModelSerializer):
         model = Staff
         fields = ['id', 'name', 'restaurant']  # Include restaurant field in StaffSerializer
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        # without this every staff member costs one more query for its restaurants;
+        # the prefetch loads all of them in a single join on the staff_restaurant table
+        return queryset.prefetch_related(
+            Prefetch('restaurant', queryset=Restaurant.objects.order_by('id'))
+        )
+
+
+
+# fast read-only lists:
+def _decimal_converter(field, model_field):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.normalize_output or field.decimal_places is None:
+        return field.to_representation
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        return f'{value.quantize(exponent, rounding=rounding, context=context):f}'
+    return convert
+
+
+def _datetime_converter(field, model_field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or tz is None:
+        return field.to_representation
+    to_representation = field.to_representation
+
+    def convert(value):
+        if value.tzinfo is None:
+            return to_representation(value)
+        text = value.astimezone(tz).isoformat()
+        return text[:-6] + 'Z' if text.endswith('+00:00') else text
+    return convert
+
+
+def _date_converter(field, model_field):
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    return lambda value: value.isoformat()
+
+
+def _choice_converter(field, model_field):
+    choices = field.choice_strings_to_values
+    if all(key == value for key, value in choices.items()):
+        return None
+    return lambda value: choices.get(str(value), value)
+
+
+def _primary_key_converter(field, model_field):
+    # values() already returns the primary key
+    return field.pk_field.to_representation if field.pk_field is not None else None
+
+
+def _cast(cast, internal_types):
+    # the cast the field applies is a no-op on columns that already hold that type
+    def converter(field, model_field):
+        return None if model_field.get_internal_type() in internal_types else cast
+    return converter
+
+
+_INTEGER_TYPES = {
+    'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField', 'BigIntegerField', 'SmallIntegerField',
+    'PositiveIntegerField', 'PositiveBigIntegerField', 'PositiveSmallIntegerField',
+}
+
+def _big_integer_converter(field, model_field):
+    if getattr(field, 'coerce_to_string', api_settings.COERCE_BIGINT_TO_STRING):
+        return str
+    return _cast(int, _INTEGER_TYPES)(field, model_field)
+
+
+_CONVERTERS = {
+    serializers.IntegerField.to_representation: _cast(int, _INTEGER_TYPES),
+    serializers.CharField.to_representation: _cast(str, {'CharField', 'TextField', 'SlugField', 'EmailField'}),
+    serializers.BooleanField.to_representation: _cast(bool, {'BooleanField'}),
+    serializers.FloatField.to_representation: _cast(float, {'FloatField'}),
+    serializers.DecimalField.to_representation: _decimal_converter,
+    serializers.DateTimeField.to_representation: _datetime_converter,
+    serializers.DateField.to_representation: _date_converter,
+    serializers.ChoiceField.to_representation: _choice_converter,
+    serializers.PrimaryKeyRelatedField.to_representation: _primary_key_converter,
+}
+if hasattr(serializers, 'BigIntegerField'):
+    # DRF 3.16+ maps BigAutoField and BigIntegerField here
+    _CONVERTERS[serializers.BigIntegerField.to_representation] = _big_integer_converter
+
+
+def _converter(field, model_field):
+    """
+    A function turning a ``values()`` value of ``field`` into what the field's
+    ``to_representation`` returns for the model attribute, or None when the
+    value is already that.
+    """
+    method = type(field).to_representation
+    if method in _CONVERTERS:
+        return _CONVERTERS[method](field, model_field)
+    if isinstance(field, (serializers.RelatedField, serializers.BaseSerializer)):
+        raise TypeError(f"{field.field_name} needs model instances")
+    return field.to_representation
+
+
+class ValuesListSerializer:
+    """
+    Read-only list serialization from ``QuerySet.values()`` rows.
+
+    Built from a ``ModelSerializer`` whose readable fields are all model
+    columns: each field's conversion is worked out once, then every row is a
+    dict lookup and at most one function call per field, without model
+    instances or per-field ``get_attribute``. The output is identical to
+    ``serializer_class(rows, many=True).data`` for the same rows. Fields that
+    need model instances (nested serializers, method fields, dotted sources)
+    and serializers overriding ``to_representation`` raise ``TypeError``.
+    """
+
+    def __init__(self, serializer_class, context=None):
+        if serializer_class.to_representation is not serializers.Serializer.to_representation:
+            raise TypeError(f"{serializer_class.__name__} overrides to_representation")
+        serializer = serializer_class(context=context or {})
+        model = serializer.Meta.model
+        columns = {f.name: f for f in model._meta.concrete_fields}
+        self.columns = []
+        for field in serializer._readable_fields:
+            if field.source not in columns:
+                raise TypeError(f"{serializer_class.__name__}.{field.field_name} is not a {model.__name__} column")
+            self.columns.append((field.field_name, field.source, _converter(field, columns[field.source])))
+        self.sources = list(dict.fromkeys(source for _, source, _ in self.columns))
+
+    def values(self, queryset):
+        return queryset.values(*self.sources)
+
+    def to_representation(self, rows):
+        columns = self.columns
+        data = []
+        for row in rows:
+            item = {}
+            for name, source, convert in columns:
+                value = row[source]
+                item[name] = value if convert is None or value is None else convert(value)
+            data.append(item)
+        return data
 
 
 
@@ -0,0 +1,154 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .caching import bump_version
+from .clusters import record_restaurants
+from .metrics import install_query_counter
+from .querylog import install_query_inspector
+from .models import Rating, Restaurant, RestaurantCount, RestaurantRatingSummary, Sale, Staff
+from .rollups import move_restaurant, record_sale, take_out_restaurant
+
+
+# rating summary:
+@receiver(pre_save, sender=Rating)
+def remember_previous_rating(sender, instance, raw=False, **kwargs):
+    # an edited rating has to be taken out of the summary before the new value goes in
+    if raw or instance.pk is None or instance._state.adding:
+        return
+    instance._previous_rating = (
+        Rating.objects.filter(pk=instance.pk).values_list('restaurant_id', 'rating').first()
+    )
+
+
+@receiver(post_save, sender=Rating)
+def add_rating_to_summary(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_rating', None)
+    if previous is not None:
+        RestaurantRatingSummary.record(*previous, delta=-1)
+        instance._previous_rating = None
+    RestaurantRatingSummary.record(instance.restaurant_id, instance.rating)
+
+
+@receiver(post_delete, sender=Rating)
+def remove_rating_from_summary(sender, instance, **kwargs):
+    # also runs for ratings removed by a cascade from Restaurant or User
+    RestaurantRatingSummary.record(instance.restaurant_id, instance.rating, delta=-1)
+
+
+# sales rollups:
+def _rollup_key(sale):
+    if sale.restaurant_id is None:
+        return None
+    # the restaurant is usually cached on the instance, otherwise this is one pk lookup
+    return (sale.restaurant_id, sale.restaurant.restaurant_type, sale.datetime, sale.income)
+
+
+@receiver(pre_save, sender=Sale)
+def remember_previous_sale(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None or instance._state.adding:
+        return
+    previous = Sale.objects.select_related('restaurant').filter(pk=instance.pk).first()
+    instance._previous_rollup_key = _rollup_key(previous) if previous else None
+
+
+@receiver(post_save, sender=Sale)
+def add_sale_to_rollups(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_rollup_key', None)
+    if previous is not None:
+        record_sale(*previous, delta=-1)
+        instance._previous_rollup_key = None
+    key = _rollup_key(instance)
+    if key is not None:
+        record_sale(*key)
+
+
+@receiver(post_delete, sender=Sale)
+def remove_sale_from_rollups(sender, instance, **kwargs):
+    key = _rollup_key(instance)
+    if key is not None:
+        record_sale(*key, delta=-1)
+
+
+# map clusters and restaurant counts:
+def _cluster_key(restaurant):
+    return (restaurant.latitude, restaurant.longitude, restaurant.restaurant_type)
+
+
+@receiver(pre_save, sender=Restaurant)
+def remember_previous_location(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None or instance._state.adding:
+        return
+    instance._previous_cluster_key = (
+        Restaurant.objects.filter(pk=instance.pk)
+        .values_list('latitude', 'longitude', 'restaurant_type')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Restaurant)
+def add_restaurant_to_aggregates(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_cluster_key', None)
+    instance._previous_cluster_key = None
+    current = _cluster_key(instance)
+    if previous == current:
+        return
+    if previous is not None:
+        record_restaurants([previous], sign=-1)
+    record_restaurants([current])
+    if previous is None:
+        RestaurantCount.record([current[2]])
+    elif previous[2] != current[2]:
+        RestaurantCount.record([previous[2]], sign=-1)
+        RestaurantCount.record([current[2]])
+        move_restaurant(instance.pk, current[2])
+
+
+@receiver(pre_delete, sender=Restaurant)
+def remove_restaurant_from_rollups(sender, instance, **kwargs):
+    # its sales are detached with a bulk UPDATE that sends no Sale signals,
+    # so its type's rollups are adjusted here, before its own rows cascade away
+    take_out_restaurant(instance.pk)
+
+
+@receiver(post_delete, sender=Restaurant)
+def remove_restaurant_from_aggregates(sender, instance, **kwargs):
+    # sent for each row of a queryset delete too, inside the delete's transaction
+    record_restaurants([_cluster_key(instance)], sign=-1)
+    RestaurantCount.record([instance.restaurant_type], sign=-1)
+
+
+# response cache versions:
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+def bump_restaurant_version(sender, raw=False, **kwargs):
+    # also runs for every restaurant removed by a cascade
+    if not raw:
+        bump_version(Restaurant)
+
+
+@receiver(post_save, sender=Staff)
+@receiver(post_delete, sender=Staff)
+def bump_staff_version(sender, raw=False, **kwargs):
+    if not raw:
+        bump_version(Staff)
+
+
+@receiver(m2m_changed, sender=Staff.restaurant.through)
+def bump_staff_version_on_assignment(sender, action, **kwargs):
+    # links removed by deleting a restaurant send no m2m_changed, but the
+    # staff views also depend on the restaurant version
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version(Staff)
+
+
+# request metrics: count the queries of every connection (core/metrics.py)
+connection_created.connect(install_query_counter, dispatch_uid='core.metrics.install_query_counter')
+# N+1 and slow query detection (core/querylog.py)
+connection_created.connect(install_query_inspector, dispatch_uid='core.querylog.install_query_inspector')
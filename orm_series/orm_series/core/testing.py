@@ -0,0 +1,22 @@
+"""
+Test runner that turns the query inspector (core/querylog.py) on.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class QueryInspectingTestRunner(DiscoverRunner):
+    """
+    ``DiscoverRunner`` under which every request made through the test client
+    fails its test with ``QueryProblems`` when it repeats a query more than
+    ``QUERY_INSPECTOR['REPEAT_THRESHOLD']`` times. Slow queries are only logged.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.saved_query_inspector = getattr(settings, 'QUERY_INSPECTOR', {})
+        settings.QUERY_INSPECTOR = {**self.saved_query_inspector, 'ENABLED': True, 'RAISE': True}
+
+    def teardown_test_environment(self, **kwargs):
+        settings.QUERY_INSPECTOR = self.saved_query_inspector
+        super().teardown_test_environment(**kwargs)
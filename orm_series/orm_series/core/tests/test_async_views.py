@@ -0,0 +1,85 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import Rating, Restaurant, Staff
+
+
+class AsyncViewsTest(TestCase):
+    """
+    Test suite for the async read endpoints under /core/async/.
+    """
+
+    def setUp(self):
+        caches['responses'].clear()
+        self.restaurants = [
+            Restaurant.objects.create(
+                name=f"Async {i}", date_opened=date(2024, 1, 1 + i), latitude=40.0, longitude=22.0 + i,
+                restaurant_type=Restaurant.TypeChoices.GREEK if i % 2 else Restaurant.TypeChoices.ITALIAN,
+            )
+            for i in range(15)
+        ]
+        self.member = Staff.objects.create(name="Chef")
+        self.member.restaurant.add(*self.restaurants[:3])
+        self.user = User.objects.create_user(username="async", password="pass12345")
+        Rating.objects.create(user=self.user, restaurant=self.restaurants[0], rating=4)
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    async def assertSameAsSync(self, path, **headers):
+        sync = await self.async_client.get(f'/core/{path}', headers=headers)
+        response = await self.async_client.get(f'/core/async/{path}', headers=headers)
+        self.assertEqual(response.status_code, sync.status_code)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        # the pagination links name the URL that was asked for
+        self.assertEqual(response.content, sync.content.replace(b'/core/', b'/core/async/'))
+        return response
+
+    async def test_same_responses_as_sync_views(self):
+        restaurant, member = self.restaurants[0], self.member
+        for path in ('allrestaurants', 'allrestaurants?ordering=date_opened&page_size=4',
+                     'allrestaurants?include=rating_summary', 'allrestaurants?page=2',
+                     'allrestaurantsbytype?type=GR', 'allrestaurantsbytype?type=IT&include=rating_summary',
+                     'allrestaurantsbytype', 'counttotalrestaurants',
+                     f'staff/{member.id}/restaurants/', f'restaurant/{restaurant.id}/staff/',
+                     'staff/999999/restaurants/', 'restaurant/999999/staff/'):
+            with self.subTest(path=path):
+                await self.assertSameAsSync(path)
+
+    async def test_cursor_pages(self):
+        response = await self.assertSameAsSync('allrestaurants?page_size=10')
+        following = await self.assertSameAsSync(response.json()['next'].split('/core/async/')[1])
+        self.assertEqual(len(following.json()['results']), 5)
+
+    async def test_my_ratings(self):
+        response = await self.assertSameAsSync('ratings/my-ratings/', authorization=f'Bearer {self.token}')
+        self.assertEqual([r['rating'] for r in response.json()['results']], [4])
+
+    async def test_my_ratings_requires_authentication(self):
+        response = await self.async_client.get('/core/async/ratings/my-ratings/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('WWW-Authenticate', response)
+
+        response = await self.async_client.get('/core/async/ratings/my-ratings/', headers={'authorization': 'Bearer bad'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json()['code'], 'token_not_valid')
+
+    async def test_not_modified(self):
+        first = await self.async_client.get('/core/async/counttotalrestaurants')
+        self.assertEqual(first.json(), 15)
+        response = await self.async_client.get('/core/async/counttotalrestaurants', headers={'if-none-match': first['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        await Restaurant.objects.acreate(
+            name="New", date_opened=date(2024, 2, 1), latitude=41.0, longitude=23.0,
+            restaurant_type=Restaurant.TypeChoices.GREEK,
+        )
+        response = await self.async_client.get('/core/async/counttotalrestaurants', headers={'if-none-match': first['ETag']})
+        self.assertEqual(response.json(), 16)
+
+    async def test_writes_are_not_allowed(self):
+        response = await self.async_client.post('/core/async/allrestaurants', {})
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -0,0 +1,38 @@
+from django.test import SimpleTestCase
+
+from core.benchmarks import compare_reports
+from core.management.commands.bench_endpoints import ENDPOINTS, routes
+
+
+def report(**client):
+    result = {'p95_ms': 10.0, 'throughput': 100.0, 'errors': 0, 'queries': 2, 'alloc_peak_kib': 50.0}
+    return {'meta': {'rows': 1000}, 'results': {'core/allrestaurants': {'client': {**result, **client}, 'wsgi': None}}}
+
+
+class EndpointBenchmarkTest(SimpleTestCase):
+    """
+    Test suite for the endpoint benchmark harness and its regression check.
+    """
+
+    def test_every_route_is_benchmarked(self):
+        self.assertEqual(sorted(set(routes()) - set(ENDPOINTS)), [])
+        self.assertEqual(sorted(set(ENDPOINTS) - set(routes())), [])
+
+    def test_unchanged_and_noise_are_not_regressions(self):
+        self.assertEqual(compare_reports(report(), report()), [])
+        # 30% slower, but by less than the 1 ms floor
+        self.assertEqual(compare_reports(report(p95_ms=1.0), report(p95_ms=1.3)), [])
+        self.assertEqual(compare_reports(report(), report(p95_ms=11.0, throughput=90.0)), [])
+
+    def test_regressions_are_flagged(self):
+        regressions = compare_reports(
+            report(), report(p95_ms=15.0, throughput=60.0, errors=2, queries=3, alloc_peak_kib=80.0),
+        )
+        self.assertEqual(regressions, [
+            'core/allrestaurants [client]: p95 10.00 ms -> 15.00 ms',
+            'core/allrestaurants [client]: throughput 100.0 -> 60.0 req/s',
+            'core/allrestaurants [client]: unexpected statuses 0 -> 2',
+            'core/allrestaurants [client]: queries 2 -> 3',
+            'core/allrestaurants [client]: peak allocations 50.0 KiB -> 80.0 KiB',
+        ])
+        self.assertEqual(len(compare_reports(report(), report(p95_ms=15.0), threshold=0.6)), 0)
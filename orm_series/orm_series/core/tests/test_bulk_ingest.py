@@ -0,0 +1,105 @@
+import json
+import random
+from unittest import mock
+
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core import geo
+from core.clusters import rebuild_clusters
+from core.ingest import ingest_restaurants
+from core.models import Restaurant, RestaurantGridAggregate
+from core.views import BulkAddRestaurants
+
+
+def restaurant(name, latitude=55.86, longitude=-4.25, **extra):
+    return {
+        "name": name, "date_opened": "2024-05-01", "latitude": latitude, "longitude": longitude,
+        "restaurant_type": "IT", **extra,
+    }
+
+
+class BulkAddRestaurantsTest(APITestCase):
+    """
+    Test suite for the bulk restaurant ingestion endpoint.
+    """
+
+    url = '/core/restaurants/bulk/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="partner", password="pass12345")
+        self.client.force_authenticate(user=self.user)
+
+    def post_ndjson(self, lines, query=''):
+        body = "\n".join(lines).encode()
+        return self.client.post(self.url + query, body, content_type='application/x-ndjson')
+
+    def test_json_array(self):
+        response = self.client.post(self.url, [restaurant(f"Branch {i}") for i in range(25)], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {"created": 25, "failed": 0, "errors": [], "errors_truncated": False})
+
+        created = Restaurant.objects.get(name="Branch 7")
+        self.assertEqual(created.grid_cell, geo.grid_cell(55.86, -4.25))
+        world = RestaurantGridAggregate.objects.get(zoom=0, restaurant_type="IT")
+        self.assertEqual(world.count, 25)
+
+    def test_cluster_aggregates_match_a_rebuild(self):
+        rng = random.Random(3)
+        rows = [restaurant(f"Spot {i}", latitude=rng.uniform(-60, 60), longitude=rng.uniform(-170, 170)) for i in range(300)]
+        with mock.patch.object(BulkAddRestaurants, 'batch_size', 64):
+            self.client.post(self.url, rows, format='json')
+        self.client.post('/core/restaurants/add/', restaurant("Single"), format='json')
+
+        def aggregates():
+            return sorted(RestaurantGridAggregate.objects.values_list('zoom', 'cell_x', 'cell_y', 'restaurant_type', 'count'))
+        incremental = aggregates()
+        rebuild_clusters()
+        self.assertEqual(incremental, aggregates())
+
+    def test_atomic_mode_writes_nothing_on_error(self):
+        rows = [restaurant("Good"), restaurant("Bad", latitude=123), "not an object", restaurant("Also good")]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["created"], 0)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [2, 3])
+        self.assertIn("latitude", response.data["errors"][0]["errors"])
+        self.assertFalse(Restaurant.objects.exists())
+        self.assertFalse(RestaurantGridAggregate.objects.exists())
+
+    def test_partial_mode_across_batches(self):
+        rows = [restaurant(f"Row {i}", latitude=99 if i == 3 else 55.0) for i in range(1, 8)]
+        with mock.patch.object(BulkAddRestaurants, 'batch_size', 2):
+            response = self.client.post(self.url + '?mode=partial', rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual((response.data["created"], response.data["failed"]), (6, 1))
+        self.assertEqual(response.data["errors"][0]["row"], 3)
+        self.assertEqual(Restaurant.objects.count(), 6)
+        self.assertFalse(Restaurant.objects.filter(name="Row 3").exists())
+
+    def test_ndjson_reports_line_numbers(self):
+        lines = [json.dumps(restaurant("First")), "", "{not json", json.dumps(restaurant("Fourth", restaurant_type="XX"))]
+        response = self.post_ndjson(lines + [json.dumps(restaurant("Fifth"))], '?mode=partial')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [3, 4])
+        self.assertIn("Invalid JSON", response.data["errors"][0]["errors"]["non_field_errors"][0])
+        self.assertIn("restaurant_type", response.data["errors"][1]["errors"])
+
+        response = self.post_ndjson([json.dumps(restaurant(f"Line {i}")) for i in range(10)])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Restaurant.objects.count(), 12)
+
+    def test_error_details_are_capped(self):
+        rows = [(number, restaurant("Bad", latitude=500), None) for number in range(1, 6)]
+        result = ingest_restaurants(rows, atomic=False, batch_size=2, max_errors=3)
+        self.assertEqual(result["failed"], 5)
+        self.assertEqual([error["row"] for error in result["errors"]], [1, 2, 3])
+        self.assertTrue(result["errors_truncated"])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.post(self.url, restaurant("Single"), format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(self.url + '?mode=maybe', [], format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.post(self.url, [], format='json').status_code, status.HTTP_401_UNAUTHORIZED)
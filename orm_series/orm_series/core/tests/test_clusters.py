@@ -0,0 +1,92 @@
+import io
+
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import Restaurant, RestaurantGridAggregate
+
+
+class RestaurantClustersTest(APITestCase):
+    """
+    Test suite for the precomputed map clusters.
+    """
+
+    url = '/core/restaurants/clusters'
+
+    def add(self, lat, lon, kind=Restaurant.TypeChoices.ITALIAN):
+        response = self.client.post('/core/restaurants/add/', {
+            "name": "Map pin", "date_opened": "2024-01-01", "latitude": lat, "longitude": lon,
+            "restaurant_type": kind,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Restaurant.objects.get(id=response.data['id'])
+
+    def clusters(self, query):
+        response = self.client.get(self.url + query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['clusters']
+
+    def test_added_restaurants_are_clustered(self):
+        self.add(55.86, -4.25)
+        self.add(55.87, -4.26, Restaurant.TypeChoices.CHINESE)
+        self.add(51.50, -0.12)
+
+        # the whole world at zoom 0 is a single cell
+        world = self.clusters('?min_lat=-90&min_lon=-180&max_lat=90&max_lon=180&zoom=0')
+        self.assertEqual([c['count'] for c in world], [3])
+        self.assertAlmostEqual(world[0]['latitude'], (55.86 + 55.87 + 51.50) / 3)
+
+        # zoomed in, Glasgow and London fall apart, and types can be split
+        uk = '?min_lat=50&min_lon=-6&max_lat=57&max_lon=1&zoom=8'
+        self.assertEqual(sorted(c['count'] for c in self.clusters(uk)), [1, 2])
+        by_type = self.clusters(uk + '&by_type=1')
+        self.assertEqual(sorted((c['restaurant_type'], c['count']) for c in by_type), [('CH', 1), ('IT', 1), ('IT', 1)])
+
+    def test_moves_and_deletes_are_tracked(self):
+        restaurant = self.add(10.0, 10.0)
+        restaurant.latitude = -10.0
+        restaurant.save()
+        north = '?min_lat=0&min_lon=0&max_lat=20&max_lon=20&zoom=4'
+        south = '?min_lat=-20&min_lon=0&max_lat=0&max_lon=20&zoom=4'
+        self.assertEqual(self.clusters(north), [])
+        self.assertEqual([c['count'] for c in self.clusters(south)], [1])
+
+        restaurant.delete()
+        self.assertEqual(self.clusters(south), [])
+
+    def test_move_inside_a_cell_updates_the_centroid(self):
+        restaurant = self.add(10.01, 10.01)
+        restaurant.latitude = 10.03
+        restaurant.save()
+        found = self.clusters('?min_lat=0&min_lon=0&max_lat=20&max_lon=20&zoom=2')
+        self.assertAlmostEqual(found[0]['latitude'], 10.03)
+
+    def test_viewport_across_the_antimeridian(self):
+        self.add(-17.0, 179.5)
+        self.add(-17.0, -179.5)
+        found = self.clusters('?min_lat=-20&min_lon=170&max_lat=-10&max_lon=-170&zoom=6')
+        self.assertEqual(sum(c['count'] for c in found), 2)
+
+    def test_payload_does_not_grow_with_restaurants(self):
+        for i in range(20):
+            self.add(40.0 + i * 0.001, 10.0)
+        found = self.clusters('?min_lat=30&min_lon=0&max_lat=50&max_lon=20&zoom=3')
+        self.assertEqual(found[0]['count'], 20)
+        self.assertEqual(len(found), 1)
+
+    def test_rebuild_command(self):
+        self.add(1.0, 1.0)
+        self.add(2.0, 2.0)
+        before = sorted(RestaurantGridAggregate.objects.values_list('zoom', 'cell_x', 'cell_y', 'restaurant_type', 'count'))
+        RestaurantGridAggregate.objects.all().delete()
+        call_command('rebuild_map_clusters', stdout=io.StringIO())
+        after = sorted(RestaurantGridAggregate.objects.values_list('zoom', 'cell_x', 'cell_y', 'restaurant_type', 'count'))
+        self.assertEqual(before, after)
+
+    def test_invalid_requests(self):
+        for query in ('', '?min_lat=0&min_lon=0&max_lat=1&max_lon=1', '?min_lat=a&min_lon=0&max_lat=1&max_lon=1&zoom=1',
+                      '?min_lat=0&min_lon=0&max_lat=1&max_lon=1&zoom=99',
+                      '?min_lat=5&min_lon=0&max_lat=1&max_lon=1&zoom=1',
+                      '?min_lat=-90&min_lon=-180&max_lat=90&max_lon=180&zoom=12'):
+            self.assertEqual(self.client.get(self.url + query).status_code, status.HTTP_400_BAD_REQUEST, query)
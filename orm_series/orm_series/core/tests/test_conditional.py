@@ -0,0 +1,83 @@
+from datetime import date
+
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import Restaurant, Staff
+
+
+class ConditionalGetTest(APITestCase):
+    """
+    Test suite for ETag / Last-Modified validation of the read endpoints.
+    """
+
+    def setUp(self):
+        caches['responses'].clear()
+        self.restaurant = Restaurant.objects.create(
+            name="Validated", date_opened=date(2024, 1, 1), latitude=40.0, longitude=22.0,
+            restaurant_type=Restaurant.TypeChoices.GREEK,
+        )
+        self.member = Staff.objects.create(name="Waiter")
+        self.member.restaurant.add(self.restaurant)
+
+    def assertNotModified(self, url, **headers):
+        # only the version lookup runs: no list query, no serializer
+        with self.assertNumQueries(1):
+            response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        return response
+
+    def test_if_none_match(self):
+        for url in ('/core/allrestaurants', '/core/allrestaurantsbytype?type=GR', '/core/counttotalrestaurants',
+                    f'/core/restaurant/{self.restaurant.id}/staff/', f'/core/staff/{self.member.id}/restaurants/'):
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertEqual(first.status_code, status.HTTP_200_OK)
+                etag = first['ETag']
+                self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+                self.assertIn('Last-Modified', first)
+
+                response = self.assertNotModified(url, if_none_match=etag)
+                self.assertEqual(response['ETag'], etag)
+                self.assertEqual(self.client.get(url, headers={"if-none-match": '"other"'}).status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        first = self.client.get('/core/allrestaurants')
+        self.assertNotModified('/core/allrestaurants', if_modified_since=first['Last-Modified'])
+
+    def test_etag_depends_on_request(self):
+        plain = self.client.get('/core/allrestaurants')['ETag']
+        self.assertNotEqual(plain, self.client.get('/core/allrestaurants?ordering=date_opened')['ETag'])
+        self.assertNotEqual(
+            self.client.get(f'/core/restaurant/{self.restaurant.id}/staff/')['ETag'],
+            self.client.get(f'/core/staff/{self.restaurant.id}/restaurants/')['ETag'],
+        )
+
+    def test_writes_change_the_etag(self):
+        url = f'/core/restaurant/{self.restaurant.id}/staff/'
+        etag = self.client.get(url)['ETag']
+
+        self.member.restaurant.remove(self.restaurant)
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+        etag = response['ETag']
+
+        self.restaurant.name = "Renamed"
+        self.restaurant.save()
+        self.assertEqual(self.client.get(url, headers={"if-none-match": etag}).status_code, status.HTTP_200_OK)
+
+        listing = self.client.get('/core/allrestaurants')
+        Staff.objects.create(name="Cook")
+        # the restaurant list does not depend on staff
+        self.assertNotModified('/core/allrestaurants', if_none_match=listing['ETag'])
+
+    def test_no_validators_for_errors_or_bypassed_params(self):
+        missing = self.client.get('/core/restaurant/9999/staff/')
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('ETag', missing)
+
+        # rating summaries are not versioned
+        self.assertNotIn('ETag', self.client.get('/core/allrestaurants?include=rating_summary'))
@@ -0,0 +1,73 @@
+import io
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import geo
+from core.models import (
+    Restaurant, RestaurantCount, Rating, Sale, Staff, RestaurantRatingSummary, SalesRollup, RestaurantGridAggregate,
+)
+
+
+class CreateDataTest(TestCase):
+    """
+    Test suite for the seeded bulk data generator.
+    """
+
+    def create(self, **options):
+        options = {'restaurants': 50, 'sales': 3000, 'ratings': 500, 'staff': 5, 'users': 20, 'chunk_size': 700, **options}
+        call_command('create_data', stdout=io.StringIO(), **options)
+
+    def snapshot(self):
+        # ids move on between runs, compare restaurants by their position instead
+        position = {pk: index for index, pk in enumerate(Restaurant.objects.order_by('id').values_list('id', flat=True))}
+        return [
+            (position[restaurant_id], income, when)
+            for restaurant_id, income, when in Sale.objects.order_by('id').values_list('restaurant_id', 'income', 'datetime')
+        ]
+
+    def test_counts_and_derived_tables(self):
+        self.create()
+        self.assertEqual(Restaurant.objects.count(), 50)
+        self.assertEqual(Sale.objects.count(), 3000)
+        self.assertEqual(Rating.objects.count(), 500)
+        self.assertEqual(Staff.objects.count(), 5)
+        self.assertEqual(User.objects.filter(username__startswith='loadtest_').count(), 20)
+        self.assertTrue(all(Staff.objects.get(id=pk).restaurant.exists() for pk in Staff.objects.values_list('id', flat=True)))
+
+        restaurant = Restaurant.objects.first()
+        self.assertEqual(restaurant.grid_cell, geo.grid_cell(restaurant.latitude, restaurant.longitude))
+        self.assertEqual(sum(RestaurantRatingSummary.objects.values_list('count', flat=True)), 500)
+        self.assertEqual(sum(SalesRollup.objects.filter(granularity='D', restaurant__isnull=True).values_list('sale_count', flat=True)), 3000)
+        self.assertEqual(sum(RestaurantGridAggregate.objects.filter(zoom=0).values_list('count', flat=True)), 50)
+
+        # running again replaces the data instead of adding to it
+        self.create()
+        self.assertEqual(Sale.objects.count(), 3000)
+        self.assertEqual(User.objects.filter(username__startswith='loadtest_').count(), 20)
+
+    def test_same_seed_same_data(self):
+        self.create(seed=7)
+        first = self.snapshot()
+        self.create(seed=7, workers=2)
+        self.assertEqual(self.snapshot(), first)
+        self.create(seed=8)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_popularity_and_time_of_day_are_skewed(self):
+        self.create(sales=5000, ratings=0, skip_derived=True)
+        per_restaurant = sorted(Counter(Sale.objects.values_list('restaurant_id', flat=True)).values(), reverse=True)
+        # the favourite restaurant sells several times more than the median one
+        self.assertGreater(per_restaurant[0], 5 * per_restaurant[len(per_restaurant) // 2])
+
+        per_hour = Counter(when.hour for when in Sale.objects.values_list('datetime', flat=True))
+        self.assertGreater(per_hour[19], 5 * per_hour[3])
+        self.assertFalse(SalesRollup.objects.exists())
+
+    def test_counters_are_reconciled_without_derived_tables(self):
+        self.create(skip_derived=True)
+        self.create(restaurants=30, sales=0, ratings=0, staff=0, skip_derived=True)
+        self.assertEqual(RestaurantCount.total(), 30)
+        self.assertEqual(self.client.get('/core/counttotalrestaurants').json(), 30)
@@ -0,0 +1,79 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import date, datetime, timezone
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import Restaurant, Rating, Sale
+
+
+class ExportTest(APITestCase):
+    """
+    Test suite for the streaming sales/ratings exports.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="finance", password="pass12345")
+        self.client.force_authenticate(user=self.user)
+        self.restaurant = Restaurant.objects.create(
+            name="Export Diner", date_opened=date(2024, 1, 1), latitude=50.0, longitude=0.0,
+            restaurant_type=Restaurant.TypeChoices.OTHER,
+        )
+        for day in range(1, 11):
+            Sale.objects.create(
+                restaurant=self.restaurant,
+                income=f"{day}.50",
+                datetime=datetime(2025, 5, day, 9, tzinfo=timezone.utc),
+            )
+        Rating.objects.create(user=self.user, restaurant=self.restaurant, rating=4)
+
+    def read(self, response):
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b''.join(response.streaming_content)
+
+    def test_sales_ndjson(self):
+        response = self.client.get('/core/export/sales?start=2025-05-03&end=2025-05-04')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(
+            [(row['income'], row['datetime']) for row in rows],
+            [('3.50', '2025-05-03T09:00:00Z'), ('4.50', '2025-05-04T09:00:00Z')],
+        )
+
+    def test_sales_csv_gzip(self):
+        response = self.client.get('/core/export/sales?output=csv&gzip=1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('sales.csv.gz', response['Content-Disposition'])
+        text = gzip.decompress(self.read(response)).decode()
+        rows = list(csv.reader(io.StringIO(text)))
+        self.assertEqual(rows[0], ['id', 'restaurant_id', 'income', 'datetime'])
+        self.assertEqual(len(rows), 11)
+
+    def test_ratings_export(self):
+        rows = [json.loads(line) for line in self.read(self.client.get('/core/export/ratings')).splitlines()]
+        self.assertEqual(rows, [{'id': rows[0]['id'], 'user_id': self.user.id, 'restaurant_id': self.restaurant.id, 'rating': 4}])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get('/core/export/staff').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/core/export/sales?output=xml').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/core/export/ratings?start=2025-01-01').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/core/export/sales?restaurant=²').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_management_command(self):
+        fd, path = tempfile.mkstemp(suffix='.ndjson')
+        os.close(fd)
+        try:
+            call_command('export_data', 'sales', '--file', path, '--start', '2025-05-10', stdout=io.StringIO())
+            with open(path) as f:
+                self.assertEqual(len(f.readlines()), 1)
+        finally:
+            os.remove(path)
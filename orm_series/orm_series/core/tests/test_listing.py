@@ -0,0 +1,92 @@
+from datetime import date, datetime, timezone
+
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import Restaurant, Rating, Sale
+
+
+class SalesAndRatingsListTest(APITestCase):
+    """
+    Test suite for the paginated and filtered sales/ratings endpoints.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="lister", password="pass12345")
+        self.other = User.objects.create_user(username="other", password="pass12345")
+        self.client.force_authenticate(user=self.user)
+
+        self.r1, self.r2 = [
+            Restaurant.objects.create(
+                name=name, date_opened=date(2024, 1, 1), latitude=50.0, longitude=0.0,
+                restaurant_type=Restaurant.TypeChoices.GREEK,
+            )
+            for name in ("One", "Two")
+        ]
+        # one sale per day in March 2025, alternating restaurants
+        for day in range(1, 31):
+            Sale.objects.create(
+                restaurant=self.r1 if day % 2 else self.r2,
+                income="10.00",
+                datetime=datetime(2025, 3, day, 12, tzinfo=timezone.utc),
+            )
+        for value in range(1, 6):
+            Rating.objects.create(user=self.user, restaurant=self.r1, rating=value)
+            Rating.objects.create(user=self.other, restaurant=self.r2, rating=value)
+
+    def test_sales_are_paginated_newest_first(self):
+        response = self.client.get('/core/allsales?page_size=7')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 7)
+        self.assertEqual(response.data['results'][0]['datetime'], '2025-03-30T12:00:00Z')
+        self.assertIsNotNone(response.data['next'])
+
+        seen = []
+        url = '/core/allsales?page_size=7'
+        while url:
+            page = self.client.get(url).data
+            seen.extend(row['datetime'] for row in page['results'])
+            url = page['next']
+        self.assertEqual(len(seen), 30)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_sales_date_range_and_restaurant_filters(self):
+        response = self.client.get(f'/core/allsales?start=2025-03-10&end=2025-03-19&restaurant={self.r1.id}&count=exact')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # odd days 11..19 inclusive belong to r1
+        self.assertEqual(response.data['count'], 5)
+        self.assertTrue(all(row['restaurant'] == self.r1.id for row in response.data['results']))
+
+    def test_invalid_filters(self):
+        self.assertEqual(self.client.get('/core/allsales?start=yesterday').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/core/allsales?restaurant=abc').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/core/allsales?restaurant=²').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(f'/core/allsales?restaurant={2 ** 70}').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_response_size_is_capped(self):
+        response = self.client.get('/core/allsales?page_size=5000')
+        self.assertEqual(len(response.data['results']), 30)
+        Sale.objects.bulk_create(
+            Sale(restaurant=self.r1, income="1.00", datetime=datetime(2025, 4, 1, tzinfo=timezone.utc))
+            for _ in range(150)
+        )
+        response = self.client.get('/core/allsales?page_size=5000')
+        self.assertEqual(len(response.data['results']), 100)
+
+    def test_all_ratings_paginated(self):
+        response = self.client.get('/core/allratings?page_size=4')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 4)
+        response = self.client.get(f'/core/allratings?restaurant={self.r2.id}&count=exact')
+        self.assertEqual(response.data['count'], 5)
+
+    def test_my_ratings_only_returns_own(self):
+        response = self.client.get('/core/ratings/my-ratings/?count=exact')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 5)
+        self.assertTrue(all(row['user'] == self.user.id for row in response.data['results']))
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get('/core/allsales').status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,167 @@
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import date, datetime, timezone
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.metrics import BYTES, CONTENT_TYPE, LATENCY_BUCKETS, Metrics, render
+from core.middleware import CountingStream
+from core.models import Restaurant, Sale
+
+SAMPLE = re.compile(r'^(\w+)\{(.*)\} (\S+)$')
+
+
+def parse(text):
+    samples = {}
+    for line in text.splitlines():
+        match = SAMPLE.match(line)
+        if match:
+            samples[(match[1], match[2])] = float(match[3])
+    return samples
+
+
+class MetricsEndpointTest(TestCase):
+    """
+    Test suite for the request metrics served at /metrics.
+    """
+
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(
+            name="Counted", date_opened=date(2024, 1, 1), latitude=40.0, longitude=22.0,
+            restaurant_type=Restaurant.TypeChoices.GREEK,
+        )
+
+    def scrape(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], CONTENT_TYPE)
+        return parse(response.content.decode())
+
+    def sample(self, samples, name, view, status=200, method='GET'):
+        return samples.get((name, f'view="{view}",method="{method}",status="{status}"'), 0)
+
+    def test_requests_are_recorded(self):
+        view = 'core.views.CountTotalRestaurants'
+        before = self.scrape()
+        with self.assertNumQueries(2):
+            response = self.client.get('/core/counttotalrestaurants')
+        after = self.scrape()
+
+        self.assertEqual(self.sample(after, 'http_request_duration_seconds_count', view)
+                         - self.sample(before, 'http_request_duration_seconds_count', view), 1)
+        self.assertEqual(self.sample(after, 'db_queries_total', view)
+                         - self.sample(before, 'db_queries_total', view), 2)
+        self.assertEqual(self.sample(after, 'http_response_bytes_total', view)
+                         - self.sample(before, 'http_response_bytes_total', view), len(response.content))
+        self.assertGreater(self.sample(after, 'http_request_duration_seconds_sum', view), 0)
+        # the scrape itself is the request in flight
+        self.assertIn('http_requests_in_flight 1\n', self.client.get('/metrics').content.decode())
+
+    def test_streamed_responses_are_counted(self):
+        view = 'export-data'
+        Sale.objects.create(restaurant=self.restaurant, income="9.50", datetime=datetime(2025, 5, 1, tzinfo=timezone.utc))
+        User.objects.create_user(username="metrics", password="pass12345")
+        access = self.client.post(
+            reverse('jwt-login'), {"username": "metrics", "password": "pass12345"}, content_type='application/json',
+        ).json()["access"]
+        before = self.scrape()
+        response = self.client.get('/core/export/sales', HTTP_AUTHORIZATION=f"Bearer {access}")
+        # recorded once the body has been served, not when the view returns
+        self.assertEqual(self.sample(self.scrape(), 'http_request_duration_seconds_count', view)
+                         - self.sample(before, 'http_request_duration_seconds_count', view), 0)
+        body = b''.join(response.streaming_content)
+        after = self.scrape()
+
+        self.assertGreater(len(body), 0)
+        self.assertEqual(self.sample(after, 'http_request_duration_seconds_count', view)
+                         - self.sample(before, 'http_request_duration_seconds_count', view), 1)
+        self.assertEqual(self.sample(after, 'http_response_bytes_total', view)
+                         - self.sample(before, 'http_response_bytes_total', view), len(body))
+
+    def test_status_and_unresolved_views(self):
+        self.client.get('/core/allrestaurantsbytype')
+        self.client.get('/no/such/page')
+        samples = self.scrape()
+        self.assertGreaterEqual(self.sample(samples, 'http_request_duration_seconds_count', 'core.views.ListAllRestaurantsOfGivenType', 400), 1)
+        self.assertGreaterEqual(self.sample(samples, 'http_request_duration_seconds_count', '<unresolved>', 404), 1)
+
+    async def test_async_view_queries_are_counted(self):
+        view = 'async-count-total-restaurants'
+        before = parse((await self.async_client.get('/metrics')).content.decode())
+        await self.async_client.get('/core/async/counttotalrestaurants')
+        after = parse((await self.async_client.get('/metrics')).content.decode())
+        self.assertEqual(self.sample(after, 'db_queries_total', view) - self.sample(before, 'db_queries_total', view), 2)
+
+    def test_response_cache_stats(self):
+        self.client.get('/core/allrestaurants')
+        self.assertIn(('response_cache_requests_total', 'cache="restaurants",outcome="misses"'), self.scrape())
+
+
+class MetricsRegistryTest(SimpleTestCase):
+    """
+    Test suite for the histogram and sharing snapshots between processes.
+    """
+
+    def test_histogram_buckets(self):
+        registry = Metrics()
+        for seconds in (0.0005, 0.003, 0.003, 20.0):
+            registry.started()
+            registry.finished('home', 'GET', 200, seconds, 10, 1, 1000)
+        samples = parse(render(*registry.collect()))
+        labels = 'view="home",method="GET",status="200"'
+        self.assertEqual(samples[('http_request_duration_seconds_bucket', labels + ',le="0.001"')], 1)
+        self.assertEqual(samples[('http_request_duration_seconds_bucket', labels + ',le="0.005"')], 3)
+        self.assertEqual(samples[('http_request_duration_seconds_bucket', labels + f',le="{LATENCY_BUCKETS[-1]}"')], 3)
+        self.assertEqual(samples[('http_request_duration_seconds_bucket', labels + ',le="+Inf"')], 4)
+        self.assertEqual(samples[('http_request_duration_seconds_count', labels)], 4)
+        self.assertEqual(samples[('db_queries_total', labels)], 4)
+        self.assertEqual(samples[('http_response_bytes_total', labels)], 40)
+
+    def test_shards_of_exited_threads_are_retired(self):
+        registry = Metrics()
+
+        def request():
+            registry.started()
+            registry.finished('home', 'GET', 200, 0.002, 10, 1, 1000)
+
+        for _ in range(3):
+            worker = threading.Thread(target=request)
+            worker.start()
+            worker.join()
+        request()
+        totals, in_flight = registry.snapshot()
+        self.assertEqual(totals[('home', 'GET', 200)][BYTES], 40)
+        self.assertEqual(in_flight, 0)
+        self.assertEqual([thread for thread, _ in registry.shards], [threading.current_thread()])
+        self.assertEqual(registry.snapshot(), (totals, in_flight))
+
+    def test_stream_closed_early_is_recorded_once(self):
+        sizes = []
+        stream = CountingStream(iter([b'ab', b'c']), sizes.append)
+        next(iter(stream))
+        stream.close()
+        stream.close()
+        self.assertEqual(sizes, [2])
+
+    def test_snapshots_of_other_processes_are_added(self):
+        with tempfile.TemporaryDirectory() as directory:
+            registry = Metrics(directory=directory, flush_interval=0)
+            registry.started()
+            registry.finished('home', 'GET', 200, 0.002, 10, 1, 1000)
+            self.assertTrue(os.path.exists(os.path.join(directory, f'metrics-{os.getpid()}.json')))
+
+            # a worker that has exited: its counters stay, its in-flight gauge does not
+            other = [0] * len(registry.snapshot()[0][('home', 'GET', 200)])
+            other[2] = 5
+            with open(os.path.join(directory, 'metrics-999999999.json'), 'w') as f:
+                json.dump({'in_flight': 3, 'series': [['home', 'GET', 200, other]]}, f)
+
+            registry.started()
+            totals, in_flight = registry.collect()
+            self.assertEqual(sum(totals[('home', 'GET', 200)][:len(LATENCY_BUCKETS) + 1]), 6)
+            self.assertEqual(in_flight, 1)
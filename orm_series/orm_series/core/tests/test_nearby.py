@@ -0,0 +1,92 @@
+import random
+from datetime import date
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core import geo
+from core.models import Restaurant
+
+
+class NearbyRestaurantsTest(APITestCase):
+    """
+    Test suite for the grid-indexed nearby search.
+    """
+
+    url = '/core/restaurants/nearby'
+
+    def create(self, lat, lon, name="Spot"):
+        return Restaurant.objects.create(
+            name=name, date_opened=date(2024, 1, 1), latitude=lat, longitude=lon,
+            restaurant_type=Restaurant.TypeChoices.OTHER,
+        )
+
+    def test_grid_cell_follows_coordinates(self):
+        restaurant = self.create(55.86, -4.25)
+        self.assertEqual(restaurant.grid_cell, geo.grid_cell(55.86, -4.25))
+        restaurant.latitude = -33.9
+        restaurant.save(update_fields=['latitude'])
+        restaurant.refresh_from_db()
+        self.assertEqual(restaurant.grid_cell, geo.grid_cell(-33.9, -4.25))
+
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        for _ in range(300):
+            self.create(51.5 + rng.uniform(-0.5, 0.5), -0.12 + rng.uniform(-0.8, 0.8))
+
+        rows = list(Restaurant.objects.values_list('id', 'latitude', 'longitude'))
+        for radius, k in ((2, 5), (10, 20), (60, 100)):
+            expected = geo.nearest(rows, 51.5, -0.12, radius, k)
+            self.assertEqual(geo.search(Restaurant.objects.all(), 51.5, -0.12, radius, k), expected)
+
+    def test_endpoint_returns_sorted_distances(self):
+        near = self.create(55.8642, -4.2518, "Near")
+        far = self.create(55.9533, -3.1883, "Far")
+        self.create(51.5074, -0.1278, "Too far")
+
+        response = self.client.get(self.url + '?lat=55.86&lon=-4.25&radius_km=100&k=5')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data], [near.id, far.id])
+        self.assertAlmostEqual(
+            response.data[1]['distance_km'], geo.haversine_km(55.86, -4.25, 55.9533, -3.1883)
+        )
+        self.assertNotIn('grid_cell', response.data[0])
+
+        response = self.client.get(self.url + '?lat=55.86&lon=-4.25&radius_km=100&k=1')
+        self.assertEqual([row['id'] for row in response.data], [near.id])
+
+    # the delete stands in for another request, its queries are not this one's
+    @override_settings(QUERY_INSPECTOR={'ENABLED': False})
+    def test_restaurant_deleted_after_the_search_is_skipped(self):
+        near = self.create(55.8642, -4.2518, "Near")
+        gone = self.create(55.8650, -4.2500, "Gone")
+        search = geo.search
+
+        def search_then_delete(*args):
+            found = search(*args)
+            gone.delete()
+            return found
+
+        with mock.patch('core.views.geo.search', side_effect=search_then_delete):
+            response = self.client.get(self.url + '?lat=55.86&lon=-4.25&radius_km=10')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data], [near.id])
+
+    def test_search_across_the_date_line(self):
+        east = self.create(-17.0, 179.98)
+        west = self.create(-17.0, -179.98)
+        response = self.client.get(self.url + '?lat=-17&lon=179.99&radius_km=10')
+        self.assertEqual({row['id'] for row in response.data}, {east.id, west.id})
+
+    def test_search_near_the_pole(self):
+        polar = self.create(89.95, 120.0)
+        response = self.client.get(self.url + '?lat=89.9&lon=-60&radius_km=50')
+        self.assertEqual([row['id'] for row in response.data], [polar.id])
+
+    def test_invalid_parameters(self):
+        for query in ('', '?lat=1', '?lat=a&lon=1', '?lat=91&lon=0', '?lat=0&lon=0&radius_km=0',
+                      '?lat=0&lon=0&radius_km=5000', '?lat=0&lon=0&k=0', '?lat=0&lon=0&k=1000'):
+            response = self.client.get(self.url + query)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
@@ -0,0 +1,92 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from drf_spectacular.settings import patched_settings
+
+from core import openapi
+
+
+SMALL_SCHEMA = {'openapi': '3.0.3', 'info': {'title': 'Small', 'version': '1'}, 'paths': {}}
+
+
+class OpenAPISchemaTest(SimpleTestCase):
+    """
+    Test suite for the precomputed schema served at /schema/.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with patched_settings({'DISABLE_ERRORS_AND_WARNINGS': True}):
+            cls.schema = openapi.generate_schema()
+
+    def setUp(self):
+        openapi._schema = None
+        patcher = mock.patch('core.openapi.generate_schema', return_value=self.schema)
+        self.generate = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, openapi, '_schema', None)
+
+    def test_generated_once_and_negotiated(self):
+        response = self.client.get('/schema/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.oai.openapi')
+        self.assertTrue(response.content.startswith(b'openapi: 3.0.3'))
+
+        response = self.client.get('/schema/', HTTP_ACCEPT='application/vnd.oai.openapi+json')
+        self.assertEqual(response['Content-Type'], 'application/vnd.oai.openapi+json')
+        self.assertIn('/core/allrestaurants', json.loads(response.content)['paths'])
+        self.assertEqual(self.client.get('/schema/?format=json')['Content-Type'], 'application/json')
+        self.assertEqual(self.client.get('/schema/', HTTP_ACCEPT='text/html').status_code, 406)
+        self.assertEqual(self.generate.call_count, 1)
+
+    def test_gzip_and_etags(self):
+        plain = self.client.get('/schema/?format=json')
+        zipped = self.client.get('/schema/?format=json', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(zipped['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(zipped.content), plain.content)
+        self.assertNotEqual(zipped['ETag'], plain['ETag'])
+        self.assertEqual(zipped['Vary'], 'Accept, Accept-Encoding')
+
+        response = self.client.get('/schema/?format=json', HTTP_IF_NONE_MATCH=plain['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.client.get('/schema/', HTTP_IF_NONE_MATCH=plain['ETag']).status_code, 200)
+        self.assertEqual(response['Vary'], 'Accept, Accept-Encoding')
+
+    def test_gzip_only_when_its_q_value_allows_it(self):
+        for accept_encoding in ('gzip;q=0', 'x-gzip-foo', 'br, *;q=0', '*, gzip;q=0.0', 'gzip;q=bad'):
+            response = self.client.get('/schema/?format=json', HTTP_ACCEPT_ENCODING=accept_encoding)
+            self.assertFalse(response.has_header('Content-Encoding'), accept_encoding)
+            self.assertEqual(response['Vary'], 'Accept, Accept-Encoding')
+        for accept_encoding in ('GZIP;Q=0.5', 'br, x-gzip', 'deflate, *;q=0.1', 'identity;q=0, gzip ; q=1'):
+            response = self.client.get('/schema/?format=json', HTTP_ACCEPT_ENCODING=accept_encoding)
+            self.assertEqual(response['Content-Encoding'], 'gzip', accept_encoding)
+
+    def test_served_from_the_file_written_on_deploy(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'openapi.json.gz')
+            call_command('build_openapi_schema', output=path, stdout=io.StringIO())
+            with gzip.open(path) as f:
+                self.assertEqual(json.load(f), json.loads(json.dumps(self.schema)))
+
+            self.generate.return_value = SMALL_SCHEMA
+            with override_settings(OPENAPI_SCHEMA={'PATH': path}):
+                response = self.client.get('/schema/?format=json')
+            self.assertIn('/core/allrestaurants', json.loads(response.content)['paths'])
+            self.assertEqual(self.generate.call_count, 1)
+
+    def test_first_request_writes_the_missing_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'openapi.json.gz')
+            with override_settings(OPENAPI_SCHEMA={'PATH': path}):
+                self.client.get('/schema/')
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(openapi.OpenAPISchema.load(path).representations['json'].etag,
+                             openapi._schema.representations['json'].etag)
@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import Restaurant
+
+
+class RestaurantKeysetPaginationTest(APITestCase):
+    """
+    Test suite for the keyset pagination on ListAllRestaurants.
+    """
+
+    url = '/core/allrestaurants'
+
+    def setUp(self):
+        # opening dates repeat so (date_opened, id) needs the id tie-breaker
+        self.restaurants = [
+            Restaurant.objects.create(
+                name=f"Restaurant {i}",
+                date_opened=date(2024, 1, 1) + timedelta(days=i % 5),
+                latitude=50.0,
+                longitude=0.0,
+                restaurant_type=Restaurant.TypeChoices.ITALIAN,
+            )
+            for i in range(25)
+        ]
+
+    def collect(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_walks_every_row_once_in_id_order(self):
+        ids = self.collect(self.url)
+        self.assertEqual(ids, sorted(r.id for r in self.restaurants))
+
+    def test_walks_every_row_once_in_date_order(self):
+        ids = self.collect(self.url + '?ordering=date_opened&page_size=4')
+        expected = [r.id for r in sorted(self.restaurants, key=lambda r: (r.date_opened, r.id))]
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_the_same_page(self):
+        first = self.client.get(self.url + '?page_size=5')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertIsNone(back.data['previous'])
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(self.url + '?page_size=1000')
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertIsNone(response.data['next'])
+
+    def test_count_modes(self):
+        self.assertEqual(self.client.get(self.url).data['count'], 25)
+        self.assertIsNone(self.client.get(self.url + '?count=none').data['count'])
+        self.assertEqual(self.client.get(self.url + '?count=exact').data['count'], 25)
+        self.assertEqual(self.client.get(self.url + '?count=estimate').data['count'], 25)
+        response = self.client.get(self.url + '?count=maybe')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_from_other_ordering_is_rejected(self):
+        cursor_url = self.client.get(self.url + '?page_size=5').data['next']
+        response = self.client.get(cursor_url + '&ordering=date_opened')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_legacy_page_number(self):
+        response = self.client.get(self.url + '?page=2')
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual([row['id'] for row in response.data['results']], [r.id for r in self.restaurants[10:20]])
@@ -0,0 +1,193 @@
+import unittest
+from datetime import date, datetime, timezone
+
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from core.models import Restaurant, Rating, Sale, Staff
+
+
+def explain(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def ordered_scan(line, sql):
+    """
+    Whether the ``SCAN`` plan line only walks the rows of a first keyset page.
+
+    That takes a ``LIMIT`` and rows read in the requested order: along an
+    index matching the ``ORDER BY``, or along the primary key when nothing is
+    filtered. A scan that has to skip rows failing a filter is still a full one.
+    """
+    if " LIMIT " not in sql:
+        return False
+    if " USING INDEX " in line or " USING COVERING INDEX " in line:
+        return True
+    return " USING " not in line and " WHERE " not in sql
+
+
+def full_scans(sql, params):
+    """
+    The plan lines of ``sql`` that read a whole table or index.
+    """
+    plan = explain(sql, params)
+    # a temporary B-tree sorts after reading everything
+    ordered = not any("TEMP B-TREE" in line for line in plan)
+    return [
+        line for line in plan
+        if line.startswith("SCAN ") and line != "SCAN CONSTANT ROW" and not (ordered and ordered_scan(line, sql))
+    ]
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+class QueryPlanTest(APITestCase):
+    """
+    Every query behind the core endpoints must be served by an index.
+    """
+
+    # endpoints that read everything on purpose
+    FULL_SCAN_ALLOWED = {
+        "/core/export/sales",
+        "/core/export/ratings",
+    }
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="planner", password="pass12345")
+        self.client.force_authenticate(user=self.user)
+        # two of everything so the cursor pages below exist
+        self.restaurant, _ = [
+            Restaurant.objects.create(
+                name="Planned", date_opened=date(2024, 1, day), latitude=55.86, longitude=-4.25,
+                restaurant_type=Restaurant.TypeChoices.ITALIAN,
+            )
+            for day in (1, 2)
+        ]
+        for day in (1, 2):
+            Sale.objects.create(restaurant=self.restaurant, income="9.99", datetime=datetime(2025, 3, day, 12, tzinfo=timezone.utc))
+        Rating.objects.create(user=self.user, restaurant=self.restaurant, rating=4)
+        self.staff = Staff.objects.create(name="Planner")
+        self.staff.restaurant.add(self.restaurant)
+
+    def endpoints(self):
+        pk = self.restaurant.id
+        cursor = self.client.get("/core/allrestaurants?page_size=1&ordering=date_opened").data["next"]
+        sales_cursor = self.client.get("/core/allsales?page_size=1&restaurant=%d" % pk).data["next"]
+        return [
+            ("get", "/core/allrestaurants", None),
+            ("get", "/core/allrestaurants?ordering=date_opened", None),
+            ("get", cursor, None),
+            ("get", "/core/allrestaurants?count=estimate", None),
+            ("get", "/core/allrestaurants?include=rating_summary", None),
+            ("get", "/core/allrestaurants?page=1", None),
+            ("get", "/core/allrestaurants?count=exact", None),
+            ("get", "/core/allrestaurantsbytype?type=IT", None),
+            ("get", "/core/allrestaurantsbytype?type=IT&include=rating_summary", None),
+            ("get", "/core/counttotalrestaurants", None),
+            ("get", "/core/countrestaurantsbytype", None),
+            ("get", "/core/countrestaurantsbytype?type=IT", None),
+            ("get", "/core/allsales", None),
+            ("get", "/core/allsales?restaurant=%d" % pk, None),
+            ("get", sales_cursor, None),
+            ("get", "/core/allsales?start=2025-03-01&end=2025-03-31", None),
+            ("get", "/core/allsales?restaurant=%d&start=2025-03-01&end=2025-03-31" % pk, None),
+            ("get", "/core/allratings", None),
+            ("get", "/core/allratings?restaurant=%d" % pk, None),
+            ("get", "/core/ratings/my-ratings/", None),
+            ("get", "/core/ratings/my-ratings/?restaurant=%d" % pk, None),
+            ("get", "/core/restaurant/%d/ratings/summary/" % pk, None),
+            ("get", "/core/staff/%d/restaurants/" % self.staff.id, None),
+            ("get", "/core/restaurant/%d/staff/" % pk, None),
+            ("get", "/core/restaurants/nearby?lat=55.86&lon=-4.25", None),
+            ("get", "/core/restaurants/clusters?min_lat=50&min_lon=-6&max_lat=57&max_lon=1&zoom=8", None),
+            ("get", "/core/analytics/sales?start=2025-03-01&end=2025-03-31", None),
+            ("get", "/core/analytics/sales?start=2025-03-01&end=2025-03-31&type=IT", None),
+            ("get", "/core/analytics/sales?start=2025-03-01&end=2025-03-31&restaurant=%d" % pk, None),
+            ("get", "/core/export/sales", None),
+            ("get", "/core/export/sales?restaurant=%d" % pk, None),
+            ("get", "/core/export/sales?start=2025-03-01&end=2025-03-31", None),
+            ("get", "/core/export/ratings", None),
+            ("get", "/core/export/ratings?restaurant=%d" % pk, None),
+            ("post", "/core/ratings/submit/", {"restaurant_id": pk, "rating": 5}),
+            ("post", "/core/restaurants/bulk/", [{
+                "name": "Bulk", "date_opened": "2024-03-01", "latitude": 48.85, "longitude": 2.35,
+                "restaurant_type": "IN",
+            }]),
+            ("post", "/core/restaurants/add/", {
+                "name": "Another", "date_opened": "2024-02-01", "latitude": 51.5, "longitude": -0.12,
+                "restaurant_type": "GR",
+            }),
+        ]
+
+    def request(self, method, url, data=None):
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            response = getattr(self.client, method)(url, data, format="json")
+            if hasattr(response, "streaming_content"):
+                b"".join(response.streaming_content)
+        self.assertLess(response.status_code, 300, url)
+        return statements
+
+    def test_no_endpoint_falls_back_to_a_full_scan(self):
+        for method, url, data in self.endpoints():
+            statements = self.request(method, url, data)
+
+            if url in self.FULL_SCAN_ALLOWED:
+                continue
+            for sql, params in statements:
+                if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                    continue
+                with self.subTest(url=url, sql=sql):
+                    self.assertEqual(full_scans(sql, params), [])
+
+    def test_later_keyset_pages_seek(self):
+        pk = self.restaurant.id
+        for url, table in (
+            ("/core/allrestaurants?page_size=1", "core_restaurant"),
+            ("/core/allrestaurants?page_size=1&ordering=date_opened", "core_restaurant"),
+            ("/core/allsales?page_size=1", "core_sale"),
+            ("/core/allsales?page_size=1&restaurant=%d" % pk, "core_sale"),
+        ):
+            cursor = self.client.get(url).data["next"]
+            pages = [
+                (sql, params) for sql, params in self.request("get", cursor)
+                if f'FROM "{table}"' in sql and " LIMIT " in sql
+            ]
+            self.assertEqual(len(pages), 1, url)
+            with self.subTest(url=url):
+                self.assertTrue(all(line.startswith("SEARCH ") for line in explain(*pages[0])), explain(*pages[0]))
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+class CompositeIndexTest(APITestCase):
+    """
+    The composite indexes serve both the filter and the ordering.
+    """
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        return " | ".join(explain(sql, params))
+
+    def test_sales_of_a_restaurant_in_a_range(self):
+        plan = self.plan(
+            Sale.objects.filter(restaurant_id=1, datetime__gte=datetime(2025, 1, 1, tzinfo=timezone.utc))
+            .order_by("-datetime", "-id")[:10]
+        )
+        self.assertIn("core_sale_restaurant_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_ratings_of_a_user(self):
+        plan = self.plan(Rating.objects.filter(user_id=1, restaurant_id=2))
+        self.assertIn("core_rating_user_idx", plan)
+
+    def test_restaurants_of_a_type(self):
+        plan = self.plan(Restaurant.objects.filter(restaurant_type="IT").order_by("id"))
+        self.assertIn("core_restaurant_type_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
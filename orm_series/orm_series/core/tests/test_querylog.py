@@ -0,0 +1,98 @@
+from datetime import date
+
+from django.http import JsonResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import path
+
+from core.models import Restaurant, Staff
+from core.querylog import QueryProblems, fingerprint, inspect_queries
+
+
+def staff_counts(request):
+    # one query per restaurant: the N+1 the inspector is there to catch
+    return JsonResponse({r.id: Staff.objects.filter(restaurant=r).count() for r in Restaurant.objects.all()})
+
+
+urlpatterns = [path('staff-counts', staff_counts)]
+
+INSPECTOR = {'ENABLED': True, 'REPEAT_THRESHOLD': 5, 'SLOW_QUERY_MS': 100, 'EXPLAIN': True, 'RAISE': True}
+
+
+class FingerprintTest(SimpleTestCase):
+    """
+    Test suite for SQL fingerprints.
+    """
+
+    def test_literals_are_normalised(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 42 AND name = 'it''s'  AND x = %s"),
+            "SELECT * FROM t WHERE id = ? AND name = ? AND x = ?",
+        )
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            fingerprint('SELECT * FROM t WHERE id IN (%s)'),
+        )
+        self.assertEqual(
+            fingerprint('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO t (a, b) VALUES (...)',
+        )
+        self.assertEqual(fingerprint('SAVEPOINT "s140_x1"'), fingerprint('SAVEPOINT "s140_x2"'))
+        # digits inside identifiers are not literals
+        self.assertEqual(fingerprint('SELECT "t1"."a2" FROM t1'), 'SELECT "t1"."a2" FROM t1')
+
+
+class QueryInspectorTest(TestCase):
+    """
+    Test suite for N+1 and slow query detection.
+    """
+
+    def setUp(self):
+        self.restaurants = [
+            Restaurant.objects.create(
+                name=f"Inspected {i}", date_opened=date(2024, 1, 1), latitude=40.0, longitude=22.0,
+                restaurant_type=Restaurant.TypeChoices.GREEK,
+            )
+            for i in range(8)
+        ]
+        for i in range(8):
+            Staff.objects.create(name=f"Staff {i}").restaurant.add(self.restaurants[0], self.restaurants[i])
+
+    def test_repeated_queries_raise(self):
+        with self.assertRaisesRegex(QueryProblems, r"Probable N\+1: 8 queries like SELECT COUNT"):
+            with inspect_queries(repeat_threshold=5):
+                [Staff.objects.filter(restaurant=r).count() for r in self.restaurants]
+
+    def test_eager_loaded_endpoint_passes(self):
+        with inspect_queries(repeat_threshold=1) as inspector:
+            response = self.client.get(f'/core/restaurant/{self.restaurants[0].id}/staff/')
+        self.assertEqual(len(response.json()), 8)
+        self.assertEqual(inspector.repeated(), [])
+
+    def test_slow_queries_come_with_their_plan(self):
+        with inspect_queries(raise_problems=False, slow_query_ms=0) as inspector:
+            list(Restaurant.objects.filter(restaurant_type="GR"))
+        (duration, sql, params, plan), = inspector.slow_queries
+        self.assertIn('FROM "core_restaurant"', sql)
+        self.assertTrue(plan and any(line.startswith(('SCAN', 'SEARCH')) for line in plan))
+
+    @override_settings(ROOT_URLCONF='core.tests.test_querylog', QUERY_INSPECTOR=INSPECTOR)
+    def test_middleware_fails_the_request_in_tests(self):
+        with self.assertRaisesRegex(QueryProblems, "GET /staff-counts"):
+            self.client.get('/staff-counts')
+
+    @override_settings(QUERY_INSPECTOR={**INSPECTOR, 'SLOW_QUERY_MS': 0})
+    def test_slow_queries_are_only_logged_in_tests(self):
+        with self.assertLogs('core.querylog', 'WARNING') as logs:
+            response = self.client.get(f'/core/restaurant/{self.restaurants[0].id}/staff/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Slow query", logs.output[0])
+        with self.assertLogs('core.querylog', 'WARNING'):
+            with inspect_queries(slow_query_ms=0):
+                list(Restaurant.objects.all())
+
+    @override_settings(ROOT_URLCONF='core.tests.test_querylog', QUERY_INSPECTOR={**INSPECTOR, 'RAISE': False})
+    def test_middleware_logs_outside_tests(self):
+        with self.assertLogs('core.querylog', 'WARNING') as logs:
+            response = self.client.get('/staff-counts')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Probable N+1: 8 queries", logs.output[0])
@@ -0,0 +1,161 @@
+import threading
+import time
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core import ratings
+from core.models import Restaurant, Rating, RestaurantRatingSummary
+from core.ratings import RatingBuffer
+
+
+class SubmitRatingBatchTest(APITestCase):
+    """
+    Test suite for batch rating submission and the write-behind buffer.
+    """
+
+    url = '/core/ratings/submit/batch/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="rater", password="pass12345")
+        self.client.force_authenticate(user=self.user)
+        self.r1, self.r2 = [
+            Restaurant.objects.create(
+                name=name, date_opened=date(2024, 1, 1), latitude=50.0, longitude=0.0,
+                restaurant_type=Restaurant.TypeChoices.INDIAN,
+            )
+            for name in ("One", "Two")
+        ]
+
+    def test_batch_is_stored_with_a_fixed_number_of_queries(self):
+        pairs = [{"restaurant_id": self.r1.id, "rating": 5}, {"restaurant_id": self.r2.id, "rating": 2}]
+        # restaurant lookup, savepoint, insert, one summary upsert, release
+        with self.assertNumQueries(5):
+            response = self.client.post(self.url, pairs, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(5):
+            response = self.client.post(self.url, pairs * 50, format='json')
+        self.assertEqual(response.data["created"], 100)
+
+        summary = RestaurantRatingSummary.objects.get(restaurant=self.r1)
+        self.assertEqual((summary.count, summary.total, summary.star_5), (51, 255, 51))
+        self.assertEqual(Rating.objects.filter(user=self.user).count(), 102)
+
+    def test_invalid_pairs_are_reported(self):
+        pairs = [
+            {"restaurant_id": self.r1.id, "rating": 4},
+            {"restaurant_id": 9999, "rating": 4},
+            {"restaurant_id": self.r2.id, "rating": 4.5},
+            "nope",
+            {"restaurant_id": True, "rating": 1},
+            # past the id column, must not reach the database
+            {"restaurant_id": 2 ** 70, "rating": 3},
+        ]
+        response = self.client.post(self.url, pairs, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [2, 3, 4, 5, 6])
+        self.assertEqual(response.data["errors"][0]["error"], "Invalid restaurant")
+        self.assertEqual(response.data["errors"][4], {"row": 6, "error": "Expected an integer restaurant_id"})
+        self.assertEqual(RestaurantRatingSummary.objects.get(restaurant=self.r1).count, 1)
+
+        response = self.client.post(self.url, pairs[1:], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.post(self.url, {"restaurant_id": 1, "rating": 3}, format='json').status_code, 400)
+        too_many = [{"restaurant_id": self.r1.id, "rating": 3}] * 1001
+        self.assertEqual(self.client.post(self.url, too_many, format='json').status_code, 400)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.post(self.url, [], format='json').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(RATING_WRITE_BEHIND={'ENABLED': True, 'FLUSH_INTERVAL': 60, 'MAX_BATCH': 1000})
+    def test_single_submissions_are_written_behind(self):
+        with mock.patch.object(ratings, '_buffer', None):
+            for value in (3, 4, 5):
+                response = self.client.post('/core/ratings/submit/', {"restaurant_id": self.r1.id, "rating": value}, format='json')
+                self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            response = self.client.post('/core/ratings/submit/', {"restaurant_id": 9999, "rating": 5}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            for restaurant_id in ("abc", "1.5", 2 ** 70):
+                response = self.client.post('/core/ratings/submit/', {"restaurant_id": restaurant_id, "rating": 5}, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertFalse(Rating.objects.exists())
+
+            buffer = ratings.rating_buffer()
+            # a restaurant deleted before the flush loses its queued ratings instead of failing the batch
+            buffer.add(self.user.id, self.r2.id, 1)
+            self.r2.delete()
+            # and so does a deleted user, without taking the other ratings with it
+            gone = User.objects.create_user(username="gone", password="pass12345")
+            buffer.add(gone.id, self.r1.id, 1)
+            gone.delete()
+            self.assertEqual(buffer.flush(), 3)
+            buffer.stop()
+
+        summary = RestaurantRatingSummary.objects.get(restaurant=self.r1)
+        self.assertEqual((summary.count, summary.total), (3, 12))
+
+
+class RatingBufferTest(SimpleTestCase):
+    """
+    Flush timing of the write-behind buffer, with the database write mocked out.
+    """
+
+    def setUp(self):
+        self.batches = []
+        self.flushed = threading.Event()
+
+        def submit(batch, **options):
+            self.batches.append(list(batch))
+            self.flushed.set()
+            return len(batch)
+
+        patcher = mock.patch.object(ratings, 'submit_ratings', side_effect=submit)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_flushes_within_the_interval(self):
+        buffer = RatingBuffer(flush_interval=0.05, max_batch=100)
+        started = time.monotonic()
+        buffer.add(1, 1, 5)
+        buffer.add(1, 2, 4)
+        self.assertTrue(self.flushed.wait(2))
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.batches, [[(1, 1, 5), (1, 2, 4)]])
+        buffer.stop()
+
+    def test_every_later_rating_flushes_within_the_interval(self):
+        buffer = RatingBuffer(flush_interval=0.05, max_batch=100)
+        buffer.add(1, 1, 5)
+        self.assertTrue(self.flushed.wait(2))
+        self.flushed.clear()
+        started = time.monotonic()
+        buffer.add(1, 2, 4)
+        self.assertTrue(self.flushed.wait(2))
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.batches, [[(1, 1, 5)], [(1, 2, 4)]])
+        buffer.stop()
+
+    def test_full_batch_flushes_early_and_stop_flushes_the_rest(self):
+        buffer = RatingBuffer(flush_interval=60, max_batch=3)
+        for restaurant_id in range(3):
+            buffer.add(1, restaurant_id, 5)
+        self.assertTrue(self.flushed.wait(2))
+        buffer.add(1, 9, 1)
+        buffer.stop()
+        self.assertEqual([len(batch) for batch in self.batches], [3, 1])
+        self.assertEqual(buffer.flushed, 4)
+
+    def test_backlog_is_flushed_by_the_caller(self):
+        buffer = RatingBuffer(flush_interval=60, max_batch=1000, max_pending=2)
+        with mock.patch.object(buffer, '_start'):
+            buffer.add(1, 1, 5)
+            self.assertEqual(self.batches, [])
+            buffer.add(1, 2, 5)
+        self.assertEqual(self.batches, [[(1, 1, 5), (1, 2, 5)]])
@@ -0,0 +1,96 @@
+import io
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import Restaurant, Rating, RestaurantRatingSummary
+
+
+class RatingSummaryTest(APITestCase):
+    """
+    Test suite for the incrementally maintained rating summary.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="rater", password="pass12345")
+        self.client.force_authenticate(user=self.user)
+        self.restaurant = Restaurant.objects.create(
+            name="Summary Grill", date_opened=date(2024, 2, 1), latitude=48.8, longitude=2.3,
+            restaurant_type=Restaurant.TypeChoices.GREEK,
+        )
+
+    def submit(self, value):
+        return self.client.post('/core/ratings/submit/', {"restaurant_id": self.restaurant.id, "rating": value}, format='json')
+
+    def summary_url(self):
+        return f'/core/restaurant/{self.restaurant.id}/ratings/summary/'
+
+    def test_submit_updates_summary(self):
+        for value in (5, 4, 4, 1):
+            self.assertEqual(self.submit(value).status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.summary_url())
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(response.data['total'], 14)
+        self.assertEqual(response.data['average'], 3.5)
+        self.assertEqual(response.data['histogram'], {"1": 1, "2": 0, "3": 0, "4": 2, "5": 1})
+
+    def test_invalid_rating_is_rejected(self):
+        self.assertEqual(self.submit(9).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.submit("great").status_code, status.HTTP_400_BAD_REQUEST)
+        # no silent truncation of 4.5 to 4, and true is not a 1
+        self.assertEqual(self.submit(4.5).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.submit(True).status_code, status.HTTP_400_BAD_REQUEST)
+        for restaurant_id in ("abc", "1.5", 2 ** 70):
+            response = self.client.post('/core/ratings/submit/', {"restaurant_id": restaurant_id, "rating": 4}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Rating.objects.exists())
+
+    def test_delete_and_edit_are_reflected(self):
+        first = Rating.objects.create(user=self.user, restaurant=self.restaurant, rating=2)
+        second = Rating.objects.create(user=self.user, restaurant=self.restaurant, rating=5)
+        second.rating = 3
+        second.save()
+        first.delete()
+
+        summary = RestaurantRatingSummary.objects.get(restaurant=self.restaurant)
+        self.assertEqual((summary.count, summary.total, summary.star_3, summary.star_5), (1, 3, 1, 0))
+
+        # cascades from the user remove their ratings from the summary too
+        self.user.delete()
+        summary.refresh_from_db()
+        self.assertEqual(summary.count, 0)
+        self.assertIsNone(summary.average)
+
+    def test_restaurant_without_ratings(self):
+        response = self.client.get(self.summary_url())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 0)
+        self.assertIsNone(response.data['average'])
+        self.assertEqual(self.client.get('/core/restaurant/9999/ratings/summary/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_optional_serializer_field(self):
+        self.submit(5)
+        response = self.client.get('/core/allrestaurants')
+        self.assertNotIn('rating_summary', response.data['results'][0])
+
+        # the counter for the total and the page, summaries joined in
+        with self.assertNumQueries(2):
+            response = self.client.get('/core/allrestaurants?include=rating_summary')
+        self.assertEqual(response.data['results'][0]['rating_summary']['average'], 5.0)
+
+        response = self.client.get('/core/allrestaurantsbytype?type=GR&include=rating_summary')
+        self.assertEqual(response.data[0]['rating_summary']['count'], 1)
+
+    def test_rebuild_command(self):
+        for value in (1, 2, 3):
+            self.submit(value)
+        RestaurantRatingSummary.objects.update(count=0, total=0, star_1=7)
+
+        call_command('rebuild_rating_summaries', stdout=io.StringIO())
+        summary = RestaurantRatingSummary.objects.get(restaurant=self.restaurant)
+        self.assertEqual((summary.count, summary.total, summary.star_1, summary.star_2), (3, 6, 1, 1))
@@ -0,0 +1,105 @@
+import json
+import unittest
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from core.models import Restaurant, Sale
+from core.renderers import MSGPACK_MEDIA_TYPE, ORJSON_MEDIA_TYPE, ORJSONRenderer, msgpack, orjson
+
+
+class RendererNegotiationTest(APITestCase):
+    """
+    Test suite for the orjson and MessagePack formats.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="binary", password="pass12345")
+        self.client.force_authenticate(user=self.user)
+        restaurant = Restaurant.objects.create(
+            name="Négociant", date_opened=date(2024, 1, 1), latitude=48.85, longitude=2.35,
+            restaurant_type=Restaurant.TypeChoices.OTHER,
+        )
+        for cents in (1, 250, 99999):
+            Sale.objects.create(
+                restaurant=restaurant, income=Decimal(cents) / 100,
+                datetime=datetime(2025, 3, 1, 12, 0, cents % 60, 5000, tzinfo=timezone.utc),
+            )
+
+    def test_default_json_is_unchanged(self):
+        default = self.client.get("/core/allsales")
+        explicit = self.client.get("/core/allsales", HTTP_ACCEPT="application/json")
+        self.assertEqual(default["Content-Type"], "application/json")
+        self.assertEqual(default.content, explicit.content)
+        self.assertEqual(self.client.get("/core/allsales", HTTP_ACCEPT="*/*").content, default.content)
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_orjson(self):
+        default = self.client.get("/core/allsales")
+        response = self.client.get("/core/allsales", HTTP_ACCEPT=ORJSON_MEDIA_TYPE)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], ORJSON_MEDIA_TYPE)
+        # compact, UTF-8 and the same value formatting: the same bytes as JSONRenderer
+        self.assertEqual(response.content, default.content)
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_orjson_native_types(self):
+        data = {"when": datetime(2025, 3, 1, 12, tzinfo=timezone.utc), "income": Decimal("1.50"), 1: None}
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), {"when": "2025-03-01T12:00:00Z", "income": 1.5, "1": None})
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_orjson_bytes_match_json_renderer(self):
+        data = {
+            "utc": datetime(2025, 3, 1, 12, 0, 0, 123456, tzinfo=timezone.utc),
+            "london": datetime(2025, 1, 1, 12, tzinfo=ZoneInfo("Europe/London")),
+            "offset": datetime(2025, 3, 1, 12, 0, 0, 5000, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+            "naive": datetime(2025, 3, 1, 12),
+            "day": date(2025, 3, 1),
+            "time": time(1, 2, 3, 4567),
+            "income": Decimal("1.50"),
+            "name": "Négociant",
+            "values": [1, 2.5, None, True],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(ORJSONRenderer().render({"x": float("nan")}), b'{"x":null}')
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack(self):
+        response = self.client.get("/core/allsales", HTTP_ACCEPT=MSGPACK_MEDIA_TYPE)
+        self.assertEqual(response["Content-Type"], MSGPACK_MEDIA_TYPE)
+        self.assertEqual(msgpack.unpackb(response.content), json.loads(self.client.get("/core/allsales").content))
+        self.assertEqual(self.client.get("/core/allsales?format=msgpack")["Content-Type"], MSGPACK_MEDIA_TYPE)
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack_requests(self):
+        rows = [{"name": "Packed", "date_opened": "2024-01-01", "latitude": 1.0, "longitude": 2.0, "restaurant_type": "IT"}]
+        response = self.client.post(
+            "/core/restaurants/bulk/", msgpack.packb(rows), content_type=MSGPACK_MEDIA_TYPE, HTTP_ACCEPT=MSGPACK_MEDIA_TYPE,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(msgpack.unpackb(response.content)["created"], 1)
+
+        restaurant = Restaurant.objects.get(name="Packed")
+        response = self.client.post(
+            "/core/ratings/submit/", msgpack.packb({"restaurant_id": restaurant.id, "rating": 4}), content_type=MSGPACK_MEDIA_TYPE,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(restaurant.ratings.get().rating, 4)
+
+        response = self.client.post("/core/ratings/submit/", b"\xc1", content_type=MSGPACK_MEDIA_TYPE)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_orjson_requests(self):
+        restaurant = Restaurant.objects.get()
+        body = orjson.dumps({"restaurant_id": restaurant.id, "rating": 5})
+        response = self.client.post("/core/ratings/submit/", body, content_type=ORJSON_MEDIA_TYPE)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(restaurant.ratings.get().rating, 5)
+        response = self.client.post("/core/ratings/submit/", b"{nope", content_type=ORJSON_MEDIA_TYPE)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
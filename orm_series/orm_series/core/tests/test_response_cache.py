@@ -0,0 +1,84 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.caching import table_versions
+from core.models import Restaurant
+
+
+class ResponseCacheTest(APITestCase):
+    """
+    Test suite for the version-keyed restaurant list cache.
+    """
+
+    def setUp(self):
+        caches['responses'].clear()
+        self.restaurant = self.create("Cached")
+
+    def create(self, name, kind=Restaurant.TypeChoices.GREEK):
+        return Restaurant.objects.create(
+            name=name, date_opened=date(2024, 1, 1), latitude=40.0, longitude=22.0, restaurant_type=kind,
+        )
+
+    def names(self, url):
+        data = self.client.get(url).data
+        return [row['name'] for row in (data['results'] if isinstance(data, dict) else data)]
+
+    def test_repeated_requests_only_read_the_version(self):
+        first = self.client.get('/core/allrestaurants').data
+        with self.assertNumQueries(1):
+            second = self.client.get('/core/allrestaurants').data
+        self.assertEqual(first, second)
+
+        # other parameters are other entries
+        self.assertEqual(self.names('/core/allrestaurants?ordering=date_opened'), ["Cached"])
+        self.assertEqual(self.names('/core/allrestaurantsbytype?type=GR'), ["Cached"])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.names('/core/allrestaurantsbytype?type=GR'), ["Cached"])
+        self.assertEqual(self.names('/core/allrestaurantsbytype?type=IT'), [])
+
+    def test_writes_invalidate(self):
+        self.assertEqual(self.names('/core/allrestaurantsbytype?type=GR'), ["Cached"])
+
+        added = self.create("Added")
+        self.assertEqual(self.names('/core/allrestaurantsbytype?type=GR'), ["Cached", "Added"])
+
+        added.name = "Renamed"
+        added.save()
+        self.assertEqual(self.names('/core/allrestaurantsbytype?type=GR'), ["Cached", "Renamed"])
+
+        added.delete()
+        self.assertEqual(self.names('/core/allrestaurantsbytype?type=GR'), ["Cached"])
+
+        user = User.objects.create_user(username="bulk", password="pass12345")
+        self.client.force_authenticate(user=user)
+        self.client.post('/core/restaurants/bulk/', [{
+            "name": "Bulk", "date_opened": "2024-01-01", "latitude": 40.0, "longitude": 22.0, "restaurant_type": "GR",
+        }], format='json')
+        self.assertEqual(self.names('/core/allrestaurantsbytype?type=GR'), ["Cached", "Bulk"])
+
+    def test_versions_are_bumped_once_per_write(self):
+        before = table_versions(Restaurant)['core_restaurant'][0]
+        self.create("One more")
+        self.assertEqual(table_versions(Restaurant)['core_restaurant'][0], before + 1)
+
+    def test_included_summaries_are_not_cached(self):
+        self.client.get('/core/allrestaurants?include=rating_summary')
+        # the counter for the total and the page, summaries joined in
+        with self.assertNumQueries(2):
+            self.client.get('/core/allrestaurants?include=rating_summary')
+
+    def test_stats(self):
+        for _ in range(3):
+            self.client.get('/core/allrestaurants')
+        self.client.get('/core/allrestaurantsbytype?type=GR')
+
+        self.assertEqual(self.client.get('/core/cache/stats').status_code, status.HTTP_401_UNAUTHORIZED)
+        admin = User.objects.create_user(username="ops", password="pass12345", is_staff=True)
+        self.client.force_authenticate(user=admin)
+        stats = self.client.get('/core/cache/stats').data
+        self.assertEqual(stats['restaurants'], {"hits": 2, "misses": 1, "hit_ratio": 0.6667})
+        self.assertEqual(stats['restaurants-by-type'], {"hits": 0, "misses": 1, "hit_ratio": 0.0})
@@ -0,0 +1,103 @@
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import transaction
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import Restaurant, RestaurantCount
+
+
+class RestaurantCountTest(APITestCase):
+    """
+    Test suite for the maintained restaurant counters.
+    """
+
+    def create(self, name, kind=Restaurant.TypeChoices.ITALIAN):
+        return Restaurant.objects.create(
+            name=name, date_opened=date(2024, 1, 1), latitude=41.9, longitude=12.5, restaurant_type=kind,
+        )
+
+    def assertCounts(self):
+        # the counters always agree with a recount of the table
+        stored = {key: count for key, count in RestaurantCount.objects.values_list('key', 'count') if count}
+        self.assertEqual(stored, {key: count for key, count in RestaurantCount.actual().items() if count})
+
+    def test_saves_and_deletes(self):
+        first = self.create("One")
+        self.create("Two")
+        self.create("Three", Restaurant.TypeChoices.GREEK)
+        self.assertEqual(RestaurantCount.total(), 3)
+        self.assertEqual(RestaurantCount.by_type(["IT", "GR", "IN"]), {"IT": 2, "GR": 1, "IN": 0})
+
+        first.restaurant_type = Restaurant.TypeChoices.INDIAN
+        first.save()
+        first.name = "Renamed"
+        first.save()
+        self.assertEqual(RestaurantCount.by_type(["IT", "IN"]), {"IT": 1, "IN": 1})
+        self.assertEqual(RestaurantCount.total(), 3)
+
+        first.delete()
+        Restaurant.objects.filter(restaurant_type="IT").delete()
+        self.assertEqual(RestaurantCount.total(), 1)
+        self.assertCounts()
+
+    def test_rolled_back_writes_leave_counters_alone(self):
+        self.create("Kept")
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.create("Lost")
+                Restaurant.objects.all().delete()
+                raise RuntimeError
+        self.assertEqual(RestaurantCount.total(), 1)
+        self.assertCounts()
+
+    def test_bulk_ingestion(self):
+        self.client.force_authenticate(user=User.objects.create_user(username="bulk", password="pass12345"))
+        rows = [
+            {"name": f"Bulk {i}", "date_opened": "2024-01-01", "latitude": 1.0, "longitude": 2.0, "restaurant_type": kind}
+            for i, kind in enumerate(["MX", "MX", "FF"])
+        ]
+        self.assertEqual(self.client.post('/core/restaurants/bulk/', rows, format='json').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(RestaurantCount.by_type(["MX", "FF"]), {"MX": 2, "FF": 1})
+        self.assertCounts()
+
+    def test_reconcile_repairs_drift(self):
+        self.create("Counted")
+        Restaurant.objects.bulk_create([
+            Restaurant(name="Raw", date_opened=date(2024, 1, 1), latitude=0, longitude=0, restaurant_type="CH"),
+        ])
+        RestaurantCount.objects.filter(key="IT").update(count=7)
+
+        out = StringIO()
+        call_command('reconcile_restaurant_counts', '--check', stdout=out)
+        self.assertIn("3 restaurant counters drifted", out.getvalue())
+        self.assertEqual(RestaurantCount.total(), 1)
+
+        call_command('reconcile_restaurant_counts', stdout=StringIO())
+        self.assertEqual(RestaurantCount.total(), 2)
+        self.assertCounts()
+        out = StringIO()
+        call_command('reconcile_restaurant_counts', stdout=out)
+        self.assertIn("in step", out.getvalue())
+
+    def test_count_endpoints_read_one_row(self):
+        self.create("A")
+        self.create("B", Restaurant.TypeChoices.OTHER)
+
+        with self.assertNumQueries(2):  # table version + counter
+            self.assertEqual(self.client.get('/core/counttotalrestaurants').data, 2)
+        response = self.client.get('/core/countrestaurantsbytype')
+        self.assertEqual(response.data, {"IN": 0, "CH": 0, "IT": 1, "GR": 0, "MX": 0, "FF": 0, "OT": 1})
+        self.assertEqual(self.client.get('/core/countrestaurantsbytype?type=OT').data, {"OT": 1})
+        self.assertEqual(self.client.get('/core/countrestaurantsbytype?type=XX').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_paginators_use_the_counter(self):
+        for i in range(12):
+            self.create(f"Paged {i}")
+        # a counter that disagrees with the table shows where the count came from
+        RestaurantCount.objects.filter(key=RestaurantCount.TOTAL).update(count=99)
+        self.assertEqual(self.client.get('/core/allrestaurants?count=exact').data['count'], 99)
+        self.assertEqual(self.client.get('/core/allrestaurants?page=1').data['count'], 99)
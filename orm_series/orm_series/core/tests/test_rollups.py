@@ -0,0 +1,122 @@
+import io
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import Restaurant, Sale, SalesRollup
+
+
+class SalesRollupTest(APITestCase):
+    """
+    Test suite for the incrementally maintained sales rollups.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="analyst", password="pass12345")
+        self.client.force_authenticate(user=self.user)
+        self.pizza, self.pasta, self.curry = [
+            Restaurant.objects.create(
+                name=name, date_opened=date(2024, 1, 1), latitude=45.0, longitude=9.0, restaurant_type=kind,
+            )
+            for name, kind in (
+                ("Pizza", Restaurant.TypeChoices.ITALIAN),
+                ("Pasta", Restaurant.TypeChoices.ITALIAN),
+                ("Curry", Restaurant.TypeChoices.INDIAN),
+            )
+        ]
+
+    def sale(self, restaurant, income, day, hour):
+        return Sale.objects.create(
+            restaurant=restaurant, income=income, datetime=datetime(2025, 6, day, hour, 15, tzinfo=timezone.utc)
+        )
+
+    def series(self, query):
+        response = self.client.get('/core/analytics/sales?start=2025-06-01&end=2025-06-03&' + query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(row['bucket'], row['sale_count'], row['income']) for row in response.data['buckets']]
+
+    def test_incremental_rollups(self):
+        self.sale(self.pizza, "10.00", 1, 12)
+        self.sale(self.pizza, "5.50", 1, 12)
+        self.sale(self.pasta, "7.25", 1, 18)
+        curry = self.sale(self.curry, "20.00", 2, 9)
+
+        self.assertEqual(self.series(f'restaurant={self.pizza.id}&granularity=hour'), [
+            ('2025-06-01T12:00:00Z', 2, '15.50'),
+        ])
+        self.assertEqual(self.series('type=IT'), [('2025-06-01T00:00:00Z', 3, '22.75')])
+        self.assertEqual(self.series(''), [
+            ('2025-06-01T00:00:00Z', 3, '22.75'),
+            ('2025-06-02T00:00:00Z', 1, '20.00'),
+        ])
+
+        # moving and deleting sales adjusts the buckets they left
+        curry.datetime = datetime(2025, 6, 1, 9, tzinfo=timezone.utc)
+        curry.save()
+        self.assertEqual(self.series('type=IN'), [('2025-06-01T00:00:00Z', 1, '20.00')])
+        curry.delete()
+        self.assertEqual(self.series('type=IN'), [])
+
+    def test_analytics_does_not_read_sales(self):
+        self.sale(self.pizza, "10.00", 1, 12)
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            self.series('')
+        self.assertFalse(any('core_sale"' in q['sql'] for q in queries.captured_queries))
+
+    def snapshot(self):
+        return {
+            (r.granularity, r.bucket, r.restaurant_id, r.restaurant_type): (r.sale_count, r.income)
+            for r in SalesRollup.objects.exclude(sale_count=0)
+        }
+
+    def test_rebuild_matches_incremental(self):
+        for day, hour, income in ((1, 1, "3.00"), (1, 23, "4.00"), (2, 0, "5.00")):
+            self.sale(self.pizza, income, day, hour)
+            self.sale(self.curry, income, day, hour)
+        incremental = self.snapshot()
+
+        call_command('rebuild_sales_rollups', '--start', '2025-06-01', '--end', '2025-06-02', stdout=io.StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_restaurant_type_change_and_delete(self):
+        for day, hour, income in ((1, 1, "3.00"), (1, 23, "4.00"), (2, 0, "5.00")):
+            self.sale(self.pizza, income, day, hour)
+            self.sale(self.pasta, income, day, hour)
+            self.sale(self.curry, income, day, hour)
+        self.pasta.restaurant_type = Restaurant.TypeChoices.GREEK
+        self.pasta.save()
+        self.curry.delete()
+        self.assertEqual(self.series('type=IN'), [])
+        self.assertEqual(self.series('type=GR'), [
+            ('2025-06-01T00:00:00Z', 2, '7.00'),
+            ('2025-06-02T00:00:00Z', 1, '5.00'),
+        ])
+        incremental = self.snapshot()
+
+        call_command('rebuild_sales_rollups', stdout=io.StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_rebuild_picks_up_bulk_inserts(self):
+        # bulk inserts skip the signals
+        Sale.objects.bulk_create([
+            Sale(restaurant=self.pasta, income=Decimal("1.00"), datetime=datetime(2025, 6, 2, 6, tzinfo=timezone.utc))
+        ])
+        self.assertEqual(self.series('type=IT'), [])
+
+        call_command('rebuild_sales_rollups', stdout=io.StringIO())
+        self.assertEqual(self.series('type=IT'), [('2025-06-02T00:00:00Z', 1, '1.00')])
+
+    def test_invalid_requests(self):
+        url = '/core/analytics/sales'
+        self.assertEqual(self.client.get(url + '?granularity=week').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url + '?type=XX').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url + '?restaurant=²').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url + '?start=2025-06-02&end=2025-06-01').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url + '?granularity=hour&start=2000-01-01&end=2025-01-01').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
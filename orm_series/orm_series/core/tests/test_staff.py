@@ -0,0 +1,66 @@
+from datetime import date
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import Restaurant, Staff
+from core.serializers import StaffSerializer
+
+
+class StaffRelationQueryCountTest(APITestCase):
+    """
+    The staff/restaurant endpoints must run a constant number of queries.
+    """
+
+    def setUp(self):
+        self.restaurants = [
+            Restaurant.objects.create(
+                name=f"Branch {i}", date_opened=date(2023, 6, 1), latitude=51.5, longitude=-0.1,
+                restaurant_type=Restaurant.TypeChoices.FASTFOOD,
+            )
+            for i in range(4)
+        ]
+        self.staff = []
+        for i in range(12):
+            member = Staff.objects.create(name=f"Staff {i}")
+            member.restaurant.set(self.restaurants[:1 + i % 4])
+            self.staff.append(member)
+
+    def test_restaurant_staff_query_count(self):
+        url = f'/core/restaurant/{self.restaurants[0].id}/staff/'
+        # version lookup for the ETag + staff join + one prefetch for every member's restaurants
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 12)
+        self.assertEqual(len(response.data[3]['restaurant']), 4)
+
+        # more staff must not mean more queries
+        extra = Staff.objects.create(name="Late hire")
+        extra.restaurant.set(self.restaurants)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data), 13)
+
+    def test_staff_restaurants_query_count(self):
+        # version lookup for the ETag + the join
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/core/staff/{self.staff[3].id}/restaurants/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data], [r.id for r in self.restaurants])
+
+    def test_missing_objects_return_404(self):
+        self.assertEqual(self.client.get('/core/restaurant/9999/staff/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/core/staff/9999/restaurants/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_empty_relations_are_not_404(self):
+        lonely = Staff.objects.create(name="Floater")
+        response = self.client.get(f'/core/staff/{lonely.id}/restaurants/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_serializer_eager_loading(self):
+        queryset = StaffSerializer.setup_eager_loading(Staff.objects.all())
+        with self.assertNumQueries(2):
+            data = StaffSerializer(queryset, many=True).data
+        self.assertEqual(len(data), 12)
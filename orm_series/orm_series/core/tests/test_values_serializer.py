@@ -0,0 +1,101 @@
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from core.models import Rating, Restaurant, Sale
+from core.pagination import RestaurantPagination
+from core.serializers import (
+    RatingSerializer, RestaurantSerializer, SaleSerializer, StaffSerializer, ValuesListSerializer,
+)
+from core.views import paginated_data, values_serializer
+
+
+class ValuesListSerializerTest(APITestCase):
+    """
+    The values() fast path must render byte for byte what the serializers do.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="fast", password="pass12345")
+        self.restaurants = [
+            Restaurant.objects.create(
+                name="Fast ünïcode", website="https://example.com/menu", date_opened=date(2021, 2, 28),
+                latitude=-33.8688197, longitude=151.2092955, restaurant_type=Restaurant.TypeChoices.MEXICAN,
+            ),
+            Restaurant.objects.create(
+                name="Plain", date_opened=date(1999, 12, 31), latitude=0.0, longitude=-0.5,
+                restaurant_type=Restaurant.TypeChoices.OTHER,
+            ),
+        ]
+        when = datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc)
+        for income in ("0.10", "999999.99", "12.00", "7.5"):
+            Sale.objects.create(restaurant=self.restaurants[0], income=income, datetime=when)
+        Sale.objects.create(restaurant=None, income="1", datetime=datetime(2025, 3, 2, tzinfo=dt_timezone.utc))
+        Rating.objects.create(user=self.user, restaurant=self.restaurants[1], rating=5)
+
+    def assertSameJSON(self, serializer_class, queryset, context=None):
+        fast = ValuesListSerializer(serializer_class, context)
+        expected = JSONRenderer().render(serializer_class(queryset, many=True, context=context or {}).data)
+        self.assertEqual(JSONRenderer().render(fast.to_representation(fast.values(queryset))), expected)
+
+    def test_byte_identical(self):
+        self.assertSameJSON(RestaurantSerializer, Restaurant.objects.order_by("id"))
+        self.assertSameJSON(SaleSerializer, Sale.objects.order_by("id"))
+        self.assertSameJSON(RatingSerializer, Rating.objects.order_by("id"))
+
+    def test_byte_identical_in_another_timezone(self):
+        with timezone.override("Asia/Kolkata"):
+            self.assertSameJSON(SaleSerializer, Sale.objects.order_by("id"))
+
+    def test_fields_that_need_instances_are_refused(self):
+        with self.assertRaises(TypeError):
+            ValuesListSerializer(RestaurantSerializer, {"include_rating_summary": True})
+        with self.assertRaises(TypeError):
+            ValuesListSerializer(StaffSerializer)
+
+        class Computed(serializers.ModelSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Restaurant
+                fields = ["id", "label"]
+
+        with self.assertRaises(TypeError):
+            ValuesListSerializer(Computed)
+
+        class Shouting(RestaurantSerializer):
+            def to_representation(self, instance):
+                data = super().to_representation(instance)
+                data["name"] = data["name"].upper()
+                return data
+
+        with self.assertRaises(TypeError):
+            ValuesListSerializer(Shouting)
+        self.assertIsNone(values_serializer(Shouting))
+
+    def test_fast_path_is_opt_in(self):
+        class Shouting(RestaurantSerializer):
+            def to_representation(self, instance):
+                data = super().to_representation(instance)
+                data["name"] = data["name"].upper()
+                return data
+
+        request = APIRequestFactory().get("/")
+        request.query_params = request.GET
+        queryset = Restaurant.objects.order_by("id")
+        for values in (False, True):
+            data = paginated_data(RestaurantPagination(), request, queryset, Shouting, values=values)
+            self.assertEqual([row["name"] for row in data], ["FAST ÜNÏCODE", "PLAIN"])
+
+    def test_list_endpoints_skip_model_instances(self):
+        self.client.force_authenticate(user=self.user)
+        expected = JSONRenderer().render(SaleSerializer(Sale.objects.order_by("-datetime", "-id"), many=True).data)
+        response = self.client.get("/core/allsales?page_size=100")
+        self.assertEqual(JSONRenderer().render(response.data["results"]), expected)
+
+        expected = RestaurantSerializer(Restaurant.objects.filter(restaurant_type="MX").order_by("id"), many=True).data
+        self.assertEqual(self.client.get("/core/allrestaurantsbytype?type=MX").content, JSONRenderer().render(expected))
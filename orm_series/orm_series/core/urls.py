@@ -7,14 +7,32 @@ from .views import (
     HomeView, 
     ListAllRestaurants, 
     ListAllSales, 
+    ExportData,
+    SalesAnalytics,
     ListAllRatings, 
     ListAllRestaurantsOfGivenType,
     CountTotalRestaurants,
+    CountRestaurantsByType,
+    NearbyRestaurants,
+    RestaurantClusters,
     StaffRestaurantListView, 
     RestaurantStaffListView,
     AddRestaurant,
+    BulkAddRestaurants,
     SubmitRating,  #  <-- Imported new view
+    SubmitRatingBatch,
     MyRatings,  
+    RestaurantRatingSummaryView,
+    ResponseCacheStats,
+    )
+
+from .async_views import (
+    AsyncListAllRestaurants,
+    AsyncListAllRestaurantsOfGivenType,
+    AsyncCountTotalRestaurants,
+    AsyncStaffRestaurantListView,
+    AsyncRestaurantStaffListView,
+    AsyncMyRatings,
     )
 
 from rest_framework import permissions
@@ -26,15 +44,33 @@ urlpatterns = [
     path('allrestaurants', ListAllRestaurants.as_view()),
     path('allrestaurantsbytype', ListAllRestaurantsOfGivenType.as_view()),
     path('allsales', ListAllSales.as_view()),
+    path('export/<str:dataset>', ExportData.as_view(), name='export-data'),
+    path('analytics/sales', SalesAnalytics.as_view(), name='sales-analytics'),
     path('counttotalrestaurants', CountTotalRestaurants.as_view()),
+    path('countrestaurantsbytype', CountRestaurantsByType.as_view(), name='count-restaurants-by-type'),
 
     path('allratings', ListAllRatings.as_view()),
     path('ratings/submit/', SubmitRating.as_view(), name='submit-rating'),
+    path('ratings/submit/batch/', SubmitRatingBatch.as_view(), name='submit-rating-batch'),
     path('ratings/my-ratings/', MyRatings.as_view(), name='my-ratings'),
+    path('restaurant/<int:pk>/ratings/summary/', RestaurantRatingSummaryView.as_view(), name='restaurant-rating-summary'),
 
     # Many to Many Relationship
     path('staff/<int:pk>/restaurants/', StaffRestaurantListView.as_view(), name='staff-restaurants'),
     path('restaurant/<int:pk>/staff/', RestaurantStaffListView.as_view(), name='restaurant-staff'),
 
     path('restaurants/add/', AddRestaurant.as_view(), name='add-restaurant'),
+    path('restaurants/bulk/', BulkAddRestaurants.as_view(), name='bulk-add-restaurants'),
+    path('restaurants/nearby', NearbyRestaurants.as_view(), name='nearby-restaurants'),
+    path('restaurants/clusters', RestaurantClusters.as_view(), name='restaurant-clusters'),
+
+    path('cache/stats', ResponseCacheStats.as_view(), name='response-cache-stats'),
+
+    # Async variants of the read endpoints, for ASGI deployments
+    path('async/allrestaurants', AsyncListAllRestaurants.as_view(), name='async-all-restaurants'),
+    path('async/allrestaurantsbytype', AsyncListAllRestaurantsOfGivenType.as_view(), name='async-restaurants-by-type'),
+    path('async/counttotalrestaurants', AsyncCountTotalRestaurants.as_view(), name='async-count-total-restaurants'),
+    path('async/staff/<int:pk>/restaurants/', AsyncStaffRestaurantListView.as_view(), name='async-staff-restaurants'),
+    path('async/restaurant/<int:pk>/staff/', AsyncRestaurantStaffListView.as_view(), name='async-restaurant-staff'),
+    path('async/ratings/my-ratings/', AsyncMyRatings.as_view(), name='async-my-ratings'),
 ]
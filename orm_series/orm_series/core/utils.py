@@ -0,0 +1,59 @@
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+
+def increment_or_create(model, lookup, defaults=None, create=True, **deltas):
+    """
+    Add ``deltas`` to the counter columns of the row matching ``lookup``.
+
+    Runs a single ``UPDATE ... SET col = col + delta`` so concurrent writers do
+    not lose increments. A missing row is created (with ``defaults`` for its
+    other columns) unless ``create`` is false, which callers pass for removals:
+    a decrement of a row that no longer exists (e.g. during a cascade) is a no-op.
+    """
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    if not create:
+        return
+    try:
+        # savepoint so a concurrent insert of the same row does not break the outer transaction
+        with transaction.atomic():
+            model.objects.create(**lookup, **(defaults or {}), **deltas)
+    except IntegrityError:
+        model.objects.filter(**lookup).update(**updates)
+
+
+def bulk_increment_or_create(model, key_fields, rows, batch_size=500):
+    """
+    ``increment_or_create`` for many rows, as one upsert statement per row
+    sent with ``executemany``:
+    ``INSERT ... ON CONFLICT (key) DO UPDATE SET col = col + excluded.col``.
+
+    ``rows`` maps tuples of ``key_fields`` values (which must match a unique
+    constraint) to dicts of deltas. Every row carries the same delta fields and
+    together with the key they must cover every NOT NULL column. Backends
+    without ``ON CONFLICT`` fall back to one ``increment_or_create`` per row.
+    """
+    if not rows:
+        return
+    delta_fields = list(next(iter(rows.values())))
+    if not connection.features.supports_update_conflicts_with_target:
+        for key, deltas in rows.items():
+            increment_or_create(model, dict(zip(key_fields, key)), **deltas)
+        return
+
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    keys = [quote(model._meta.get_field(name).column) for name in key_fields]
+    counters = [quote(model._meta.get_field(name).column) for name in delta_fields]
+    sql = (
+        f"INSERT INTO {table} ({', '.join(keys + counters)}) "
+        f"VALUES ({', '.join(['%s'] * (len(keys) + len(counters)))}) "
+        f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET "
+        + ", ".join(f"{column} = {table}.{column} + excluded.{column}" for column in counters)
+    )
+    params = [list(key) + [deltas[name] for name in delta_fields] for key, deltas in rows.items()]
+    with connection.cursor() as cursor:
+        for start in range(0, len(params), batch_size):
+            cursor.executemany(sql, params[start:start + batch_size])
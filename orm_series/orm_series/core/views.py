@@ -1,12 +1,33 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.http import StreamingHttpResponse
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
 # import the models:
-from .models import Restaurant, Sale, Rating, Staff
+from .models import Restaurant, Sale, Rating, Staff, RestaurantRatingSummary, RestaurantCount
 
 # import serializers:
-from .serializers import RestaurantSerializer, SaleSerializer, RatingSerializer, StaffSerializer
+from .serializers import (
+    RestaurantSerializer,
+    SaleSerializer,
+    RatingSerializer,
+    StaffSerializer,
+    RestaurantRatingSummarySerializer,
+    SalesRollupBucketSerializer,
+    ValuesListSerializer,
+)
+
+# Rollups:
+from .models import SalesRollup
+from .rollups import bucket_count, query_rollups, start_of_today
+
+# Location search:
+from . import geo
+from . import clusters
 
 # drf-spectacular:
 from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter
@@ -15,7 +36,111 @@ from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParamete
 from rest_framework.permissions import IsAuthenticated
 
 # Pagination:
-from rest_framework.pagination import PageNumberPagination
+from .pagination import LegacyRestaurantPagination, RestaurantPagination, SalePagination, RatingPagination
+
+# Filters:
+from .filters import filter_date_range, filter_restaurant, parse_bound, parse_id, restaurant_param
+
+# Exports:
+from .exports import EXPORT_DATASETS, EXPORT_FORMATS, export_stream
+
+# Response cache:
+from rest_framework.permissions import IsAdminUser
+from .caching import cache_stats, cached_data
+
+# Conditional requests:
+from .conditional import conditional_get
+
+# Batched ratings:
+from .ratings import existing_restaurants, rating_buffer, submit_ratings
+
+# Bulk ingestion:
+from rest_framework.parsers import JSONParser
+from .parsers import MessagePackParser, NDJSONParser, ORJSONParser
+from .ingest import ingest_restaurants
+
+
+# query parameters shared by the paginated list endpoints:
+PAGINATION_PARAMETERS = [
+    OpenApiParameter(name="cursor", type=str, required=False, description="Opaque cursor taken from `next` or `previous`"),
+    OpenApiParameter(name="page_size", type=int, required=False, description="Results per page (max 100)"),
+    OpenApiParameter(name="count", type=str, required=False, enum=["none", "exact", "estimate"], description="How to compute the total count"),
+]
+
+RESTAURANT_FILTER_PARAMETER = OpenApiParameter(name="restaurant", type=int, required=False, description="Only rows for this restaurant id")
+
+DATE_RANGE_PARAMETERS = [
+    OpenApiParameter(name="start", type=str, required=False, description="ISO date/datetime, inclusive"),
+    OpenApiParameter(name="end", type=str, required=False, description="ISO date/datetime, exclusive (a bare date includes that day)"),
+]
+
+
+INCLUDE_PARAMETER = OpenApiParameter(
+    name="include", type=str, required=False, enum=["rating_summary"],
+    description="Embed each restaurant's rating summary",
+)
+
+
+def restaurant_list_context(request, queryset):
+    """
+    Serializer context and queryset for restaurant lists, joining the rating
+    summary in the same query when ``?include=rating_summary`` is asked for.
+    """
+    include_summary = request.query_params.get("include") == "rating_summary"
+    if include_summary:
+        queryset = queryset.select_related("rating_summary")
+    return {"include_rating_summary": include_summary}, queryset
+
+
+def values_serializer(serializer_class, context=None):
+    """
+    ValuesListSerializer for ``serializer_class``, or None when it cannot
+    mirror it (fields or a ``to_representation`` that need model instances).
+    """
+    try:
+        return ValuesListSerializer(serializer_class, context)
+    except TypeError:
+        return None
+
+
+def paginated_data(paginator, request, queryset, serializer_class, context=None, values=False):
+    """
+    Serialized rows of one page. Views opt in to the ``values()`` fast path
+    with ``values_fast_path = True`` and pass it as ``values``: the page is then
+    rendered by ValuesListSerializer without model instances, whenever it can
+    mirror the serializer. Otherwise the serializer runs as usual.
+    """
+    fast = values_serializer(serializer_class, context) if values else None
+    if fast is None:
+        page = paginator.paginate_queryset(queryset, request)
+        return serializer_class(page, many=True, context=context or {}).data
+    return fast.to_representation(paginator.paginate_queryset(fast.values(queryset), request))
+
+
+async def apaginated_data(paginator, request, queryset, serializer_class, context=None, values=False):
+    """
+    ``paginated_data`` for the async views, with the async ORM.
+    """
+    fast = values_serializer(serializer_class, context) if values else None
+    if fast is None:
+        page = await paginator.apaginate_queryset(queryset, request)
+        return serializer_class(page, many=True, context=context or {}).data
+    return fast.to_representation(await paginator.apaginate_queryset(fast.values(queryset), request))
+
+
+def parse_rating(value):
+    """
+    Return the rating as an int from 1 to 5, or None if it is not one.
+    """
+    if isinstance(value, bool):
+        return None
+    try:
+        rating = int(value)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(value, float) and value != rating:
+        return None
+    return rating if 1 <= rating <= 5 else None
 
 
 # related to core home:
@@ -60,41 +185,70 @@ class HomeView(APIView):
 # Restaurant related:
 class ListAllRestaurants(APIView):
     """
-    List all restaurants with optional filtering and pagination.
+    List all restaurants with keyset (cursor) pagination.
     """
+    # list pages are rendered from values() rows, see paginated_data()
+    values_fast_path = True
+
     @extend_schema(
         summary="List all restaurants",
-        description="Retrieves a paginated list of all restaurants. Supports filtering by type and platform.",
+        description=(
+            "Retrieves a cursor-paginated list of all restaurants ordered by `id` or `(date_opened, id)`. "
+            "Follow the `next`/`previous` links to move between pages. "
+            "The legacy `page` parameter is still accepted for old clients."
+        ),
         responses={200: RestaurantSerializer(many=True)},
-        parameters=[
-            OpenApiParameter(name="type", type=str, required=False, description="Filter by restaurant type"),
-            OpenApiParameter(name="platform", type=str, required=False, description="Filter by platform"),
+        parameters=PAGINATION_PARAMETERS + [
+            OpenApiParameter(name="ordering", type=str, required=False, enum=["id", "date_opened"], description="Sort key"),
+            OpenApiParameter(name="page", type=int, required=False, description="Legacy page number pagination"),
+            INCLUDE_PARAMETER,
         ],
         examples=[
             OpenApiExample(
                 "Success Response Example",
-                value=[
-                    {"id": 1, "name": "Pizza Palace", "type": "Italian", "platform": "UberEats"},
-                    {"id": 2, "name": "Sushi Spot", "type": "Japanese", "platform": "DoorDash"},
-                ],
+                value={
+                    "count": None,
+                    "next": "http://testserver/core/allrestaurants?cursor=eyJvIjoiaWQiLCJwIjpbMTBdfQ%3D%3D",
+                    "previous": None,
+                    "results": [
+                        {"id": 1, "name": "Pizza Palace", "restaurant_type": "IT"},
+                        {"id": 2, "name": "Sushi Spot", "restaurant_type": "OT"},
+                    ],
+                },
                 response_only=True,
             )
         ],
         tags=["Restaurants"]
     )
+    @conditional_get(Restaurant, bypass=["include"])
     def get(self, request):
-        queryset = Restaurant.objects.all()
-        paginator = PageNumberPagination()
-        paginator.page_size = 10
-        paginated_queryset = paginator.paginate_queryset(queryset, request)
-        serializer = RestaurantSerializer(paginated_queryset, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        # rating summaries change with every rating, so only the plain list is cached
+        if "include" in request.query_params:
+            return Response(self.list_data(request))
+        return Response(cached_data(
+            "restaurants", request, [Restaurant], lambda: self.list_data(request), versions=request.table_versions,
+        ))
+
+    def list_data(self, request):
+        context, queryset = restaurant_list_context(request, Restaurant.objects.all())
+
+        # old clients still send ?page=N, keep them working on a stable ordering
+        if "page" in request.query_params:
+            paginator = LegacyRestaurantPagination()
+            queryset = queryset.order_by("id")
+        else:
+            paginator = RestaurantPagination()
+
+        data = paginated_data(paginator, request, queryset, RestaurantSerializer, context, values=self.values_fast_path)
+        return paginator.get_paginated_response(data).data
 
 
 class ListAllRestaurantsOfGivenType(APIView):
     """
     List restaurants filtered by a specific type.
     """
+    values_fast_path = True
+
     @extend_schema(
         summary="List restaurants by type",
         description="Returns all restaurants filtered by the given restaurant type.",
@@ -105,17 +259,137 @@ class ListAllRestaurantsOfGivenType(APIView):
                 required=True,
                 type=str,
             ),
+            INCLUDE_PARAMETER,
         ],
         responses={200: RestaurantSerializer(many=True)},
         tags=["Restaurants"]
     )
+    @conditional_get(Restaurant, bypass=["include"])
     def get(self, request):
         type_code = request.query_params.get("type")
         if not type_code:
             return Response({"error": "Query parameter 'type' is required."}, status=status.HTTP_400_BAD_REQUEST)
-        restaurants = Restaurant.objects.filter(restaurant_type=type_code)
-        serializer = RestaurantSerializer(restaurants, many=True)
-        return Response(serializer.data)
+
+        def list_data():
+            context, restaurants = restaurant_list_context(request, Restaurant.objects.filter(restaurant_type=type_code).order_by("id"))
+            fast = values_serializer(RestaurantSerializer, context) if self.values_fast_path else None
+            if fast is None:
+                return RestaurantSerializer(restaurants, many=True, context=context).data
+            return fast.to_representation(fast.values(restaurants))
+
+        if "include" in request.query_params:
+            return Response(list_data())
+        return Response(cached_data(
+            "restaurants-by-type", request, [Restaurant], list_data, versions=request.table_versions,
+        ))
+
+
+class NearbyRestaurants(APIView):
+    """
+    Restaurants nearest to a point, closest first.
+    """
+    default_radius_km = 5.0
+    max_radius_km = 500.0
+    default_k = 10
+    max_k = 100
+
+    @extend_schema(
+        summary="Find nearby restaurants",
+        description=(
+            "Returns up to `k` restaurants within `radius_km` of (`lat`, `lon`), sorted by "
+            "haversine distance. Uses the grid cell index instead of scanning every restaurant."
+        ),
+        parameters=[
+            OpenApiParameter(name="lat", type=float, required=True, description="Latitude (-90 to 90)"),
+            OpenApiParameter(name="lon", type=float, required=True, description="Longitude (-180 to 180)"),
+            OpenApiParameter(name="radius_km", type=float, required=False, description="Search radius in km (default 5, max 500)"),
+            OpenApiParameter(name="k", type=int, required=False, description="Maximum number of results (default 10, max 100)"),
+        ],
+        responses={200: RestaurantSerializer(many=True)},
+        tags=["Restaurants"]
+    )
+    @conditional_get(Restaurant)
+    def get(self, request):
+        params = request.query_params
+        try:
+            lat = float(params["lat"])
+            lon = float(params["lon"])
+            radius_km = float(params.get("radius_km", self.default_radius_km))
+            k = int(params.get("k", self.default_k))
+        except KeyError:
+            return Response({"error": "Query parameters 'lat' and 'lon' are required."}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({"error": "'lat', 'lon' and 'radius_km' must be numbers and 'k' an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return Response({"error": "Coordinates are out of range."}, status=status.HTTP_400_BAD_REQUEST)
+        if not (0 < radius_km <= self.max_radius_km):
+            return Response({"error": f"'radius_km' must be above 0 and at most {self.max_radius_km:g}."}, status=status.HTTP_400_BAD_REQUEST)
+        if not (1 <= k <= self.max_k):
+            return Response({"error": f"'k' must be between 1 and {self.max_k}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        found = geo.search(Restaurant.objects.all(), lat, lon, radius_km, k)
+        restaurants = Restaurant.objects.in_bulk([pk for _, pk in found])
+
+        data = []
+        for distance, pk in found:
+            # deleted since the search
+            if pk not in restaurants:
+                continue
+            row = RestaurantSerializer(restaurants[pk]).data
+            row["distance_km"] = distance
+            data.append(row)
+        return Response(data)
+
+
+class RestaurantClusters(APIView):
+    """
+    Restaurant counts per map grid cell inside a viewport.
+    """
+    @extend_schema(
+        summary="Map clusters",
+        description=(
+            "Returns one cluster (count and centroid) per non-empty grid cell of the viewport at the "
+            "given zoom, optionally split by restaurant type. Read from precomputed aggregates, so the "
+            "payload depends on the number of cells, not on the number of restaurants. "
+            "A viewport with min_lon > max_lon crosses the antimeridian."
+        ),
+        parameters=[
+            OpenApiParameter(name="min_lat", type=float, required=True),
+            OpenApiParameter(name="min_lon", type=float, required=True),
+            OpenApiParameter(name="max_lat", type=float, required=True),
+            OpenApiParameter(name="max_lon", type=float, required=True),
+            OpenApiParameter(name="zoom", type=int, required=True, description=f"0 to {clusters.MAX_ZOOM}; the map has 2^zoom x 2^zoom cells"),
+            OpenApiParameter(name="by_type", type=bool, required=False, description="Split clusters by restaurant type"),
+        ],
+        responses={200: {"type": "object"}},
+        tags=["Restaurants"]
+    )
+    @conditional_get(Restaurant)
+    def get(self, request):
+        params = request.query_params
+        try:
+            min_lat, min_lon = float(params["min_lat"]), float(params["min_lon"])
+            max_lat, max_lon = float(params["max_lat"]), float(params["max_lon"])
+            zoom = int(params["zoom"])
+        except KeyError:
+            return Response({"error": "min_lat, min_lon, max_lat, max_lon and zoom are required."}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({"error": "Coordinates must be numbers and zoom an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+            return Response({"error": "Viewport is out of range."}, status=status.HTTP_400_BAD_REQUEST)
+        if not (0 <= zoom <= clusters.MAX_ZOOM):
+            return Response({"error": f"'zoom' must be between 0 and {clusters.MAX_ZOOM}."}, status=status.HTTP_400_BAD_REQUEST)
+        if clusters.viewport_cell_count(min_lat, min_lon, max_lat, max_lon, zoom) > clusters.MAX_VIEWPORT_CELLS:
+            return Response({"error": "Viewport covers too many cells, use a lower zoom."}, status=status.HTTP_400_BAD_REQUEST)
+
+        by_type = params.get("by_type") in ("1", "true")
+        return Response({
+            "zoom": zoom,
+            "cell_size": {"longitude": 360 / 2 ** zoom, "latitude": 180 / 2 ** zoom},
+            "clusters": clusters.viewport_clusters(min_lat, min_lon, max_lat, max_lon, zoom, by_type=by_type),
+        })
 
 
 class CountTotalRestaurants(APIView):
@@ -124,12 +398,43 @@ class CountTotalRestaurants(APIView):
     """
     @extend_schema(
         summary="Count total restaurants",
-        description="Returns the total number of restaurants in the database.",
+        description="Returns the total number of restaurants, read from a maintained counter instead of a COUNT(*).",
         responses={200: int},
         tags=["Restaurants"]
     )
+    @conditional_get(Restaurant)
     def get(self, request):
-        return Response(Restaurant.objects.count())
+        return Response(RestaurantCount.total())
+
+
+class CountRestaurantsByType(APIView):
+    """
+    Count the restaurants of each type.
+    """
+    @extend_schema(
+        summary="Count restaurants by type",
+        description="Returns the number of restaurants per type code, read from maintained counters.",
+        parameters=[
+            OpenApiParameter(name="type", type=str, required=False, description="Only this restaurant type code"),
+        ],
+        responses={200: {"type": "object", "additionalProperties": {"type": "integer"}}},
+        examples=[
+            OpenApiExample(
+                "Success Response Example",
+                value={"IN": 4, "CH": 2, "IT": 7, "GR": 0, "MX": 1, "FF": 3, "OT": 0},
+                response_only=True,
+            )
+        ],
+        tags=["Restaurants"]
+    )
+    @conditional_get(Restaurant)
+    def get(self, request):
+        type_code = request.query_params.get("type")
+        if type_code is None:
+            return Response(RestaurantCount.by_type())
+        if type_code not in Restaurant.TypeChoices.values:
+            return Response({"error": f"Unknown restaurant type '{type_code}'."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(RestaurantCount.by_type([type_code]))
 
 
 class AddRestaurant(APIView):
@@ -178,23 +483,211 @@ class AddRestaurant(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class BulkAddRestaurants(APIView):
+    """
+    Add many restaurants in one request.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [ORJSONParser, JSONParser, NDJSONParser, MessagePackParser]
+    batch_size = 1000
+
+    @extend_schema(
+        summary="Bulk add restaurants",
+        description=(
+            "Creates restaurants from a JSON array (`application/json`) or one restaurant per line "
+            "(`application/x-ndjson`). Rows are validated and inserted in batches. In the default "
+            "`atomic` mode nothing is created unless every row is valid; in `partial` mode valid rows "
+            "are created and invalid ones reported. Errors are listed per row number (the line number "
+            "for NDJSON). Authentication required."
+        ),
+        request=RestaurantSerializer(many=True),
+        parameters=[
+            OpenApiParameter(name="mode", type=str, required=False, enum=["atomic", "partial"], description="All-or-nothing (default) or keep the valid rows"),
+        ],
+        responses={
+            201: {"description": "Every row was created"},
+            207: {"description": "Partial mode: some rows were created, some were rejected"},
+            400: {"description": "Nothing was created"},
+        },
+        examples=[
+            OpenApiExample(
+                "Partial Success Response Example",
+                value={
+                    "created": 2,
+                    "failed": 1,
+                    "errors": [{"row": 2, "errors": {"latitude": ["Ensure this value is less than or equal to 90."]}}],
+                    "errors_truncated": False,
+                },
+                response_only=True,
+            ),
+        ],
+        tags=["Restaurants"]
+    )
+    def post(self, request):
+        mode = request.query_params.get("mode", "atomic")
+        if mode not in ("atomic", "partial"):
+            return Response({"error": "Mode must be 'atomic' or 'partial'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = request.data
+        if isinstance(data, list):
+            rows = ((number, row, None) for number, row in enumerate(data, 1))
+        elif request.content_type.split(";")[0].strip() == NDJSONParser.media_type and not isinstance(data, dict):
+            rows = data
+        else:
+            return Response({"error": "Expected a JSON array or NDJSON."}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = ingest_restaurants(rows, atomic=mode == "atomic", batch_size=self.batch_size)
+        if not result["failed"]:
+            code = status.HTTP_201_CREATED
+        elif result["created"]:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response(result, status=code)
+
+
 # Sale related:
 class ListAllSales(APIView):
     """
     List all sales records.
     """
     permission_classes = [IsAuthenticated]
+    values_fast_path = True
 
     @extend_schema(
         summary="List all sales",
-        description="Retrieves all sales transactions recorded in the system. Authentication required.",
+        description=(
+            "Retrieves sales transactions newest first, cursor-paginated. "
+            "Can be narrowed to a restaurant and a date range. Authentication required."
+        ),
+        parameters=PAGINATION_PARAMETERS + DATE_RANGE_PARAMETERS + [RESTAURANT_FILTER_PARAMETER],
         responses={200: SaleSerializer(many=True)},
         tags=["Sales"]
     )
     def get(self, request):
         queryset = Sale.objects.all()
-        serializer = SaleSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = filter_restaurant(queryset, request)
+        queryset = filter_date_range(queryset, request, "datetime")
+
+        paginator = SalePagination()
+        return paginator.get_paginated_response(paginated_data(
+            paginator, request, queryset, SaleSerializer, values=self.values_fast_path,
+        ))
+
+
+class SalesAnalytics(APIView):
+    """
+    Sales count and income per hour or day, answered from the rollup tables.
+    """
+    permission_classes = [IsAuthenticated]
+
+    # longest series a single request may ask for
+    max_buckets = 24 * 400
+
+    @extend_schema(
+        summary="Sales time series",
+        description=(
+            "Returns sale count and income per hour or day bucket for one restaurant, "
+            "one restaurant type or all restaurants. Defaults to the last 30 days. Authentication required."
+        ),
+        parameters=DATE_RANGE_PARAMETERS + [
+            RESTAURANT_FILTER_PARAMETER,
+            OpenApiParameter(name="granularity", type=str, required=False, enum=["hour", "day"], description="Bucket size (default day)"),
+            OpenApiParameter(name="type", type=str, required=False, enum=list(Restaurant.TypeChoices.values), description="Restaurant type code"),
+        ],
+        responses={200: SalesRollupBucketSerializer(many=True)},
+        tags=["Sales"]
+    )
+    def get(self, request):
+        granularities = {"hour": SalesRollup.Granularity.HOUR, "day": SalesRollup.Granularity.DAY}
+        granularity = granularities.get(request.query_params.get("granularity", "day"))
+        if granularity is None:
+            return Response({"error": "Granularity must be 'hour' or 'day'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        restaurant_type = request.query_params.get("type")
+        if restaurant_type is not None and restaurant_type not in Restaurant.TypeChoices.values:
+            return Response({"error": "Unknown restaurant type."}, status=status.HTTP_400_BAD_REQUEST)
+
+        restaurant_id = restaurant_param(request)
+
+        end = request.query_params.get("end")
+        end = parse_bound(end, "end", end=True) if end else start_of_today() + timedelta(days=1)
+        start = request.query_params.get("start")
+        start = parse_bound(start, "start") if start else end - timedelta(days=30)
+        if start >= end:
+            return Response({"error": "'start' must be before 'end'."}, status=status.HTTP_400_BAD_REQUEST)
+        if bucket_count(granularity, start, end) > self.max_buckets:
+            return Response({"error": "Requested range is too long for this granularity."}, status=status.HTTP_400_BAD_REQUEST)
+
+        buckets = query_rollups(
+            granularity, start, end,
+            restaurant_id=restaurant_id,
+            restaurant_type=restaurant_type,
+        )
+        return Response({
+            "granularity": granularity.label.lower(),
+            "start": start,
+            "end": end,
+            "buckets": SalesRollupBucketSerializer(buckets, many=True).data,
+        })
+
+
+class ExportData(APIView):
+    """
+    Stream every sale or rating as NDJSON or CSV.
+    """
+    permission_classes = [IsAuthenticated]
+    # a full dump: check the account is still active rather than trusting the token
+    require_database_user = True
+
+    @extend_schema(
+        summary="Export sales or ratings",
+        description=(
+            "Streams all rows of the `sales` or `ratings` dataset without loading them into memory. "
+            "Sales can be limited to a date range. Authentication required."
+        ),
+        parameters=DATE_RANGE_PARAMETERS + [
+            RESTAURANT_FILTER_PARAMETER,
+            OpenApiParameter(name="dataset", location=OpenApiParameter.PATH, type=str, enum=list(EXPORT_DATASETS), description="What to export"),
+            OpenApiParameter(name="output", type=str, required=False, enum=list(EXPORT_FORMATS), description="Output format (default ndjson)"),
+            OpenApiParameter(name="gzip", type=bool, required=False, description="Gzip the stream"),
+        ],
+        responses={200: {"type": "string", "format": "binary"}},
+        tags=["Exports"]
+    )
+    def get(self, request, dataset):
+        if dataset not in EXPORT_DATASETS:
+            return Response({"error": "Unknown dataset"}, status=status.HTTP_404_NOT_FOUND)
+
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            return Response({"error": f"Output must be one of: {', '.join(EXPORT_FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        date_field = EXPORT_DATASETS[dataset][2]
+        start = request.query_params.get("start")
+        end = request.query_params.get("end")
+        if (start or end) and date_field is None:
+            return Response({"error": f"The {dataset} export has no date range filter."}, status=status.HTTP_400_BAD_REQUEST)
+
+        restaurant_id = restaurant_param(request)
+
+        compress = request.query_params.get("gzip") in ("1", "true")
+        stream = export_stream(
+            dataset,
+            output=output,
+            compress=compress,
+            start=parse_bound(start, "start") if start else None,
+            end=parse_bound(end, "end", end=True) if end else None,
+            restaurant_id=restaurant_id,
+        )
+
+        filename = f"{dataset}.{output}" + (".gz" if compress else "")
+        response = StreamingHttpResponse(
+            stream,
+            content_type="application/gzip" if compress else EXPORT_FORMATS[output],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
 
 
 class ListAllRatings(APIView):
@@ -202,17 +695,22 @@ class ListAllRatings(APIView):
     List all customer ratings.
     """
     permission_classes = [IsAuthenticated]
+    values_fast_path = True
 
     @extend_schema(
         summary="List all ratings",
-        description="Retrieves all customer ratings. Authentication required.",
+        description="Retrieves customer ratings, cursor-paginated. Authentication required.",
+        parameters=PAGINATION_PARAMETERS + [RESTAURANT_FILTER_PARAMETER],
         responses={200: RatingSerializer(many=True)},
         tags=["Ratings"]
     )
     def get(self, request):
-        queryset = Rating.objects.all()
-        serializer = RatingSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = filter_restaurant(Rating.objects.all(), request)
+
+        paginator = RatingPagination()
+        return paginator.get_paginated_response(paginated_data(
+            paginator, request, queryset, RatingSerializer, values=self.values_fast_path,
+        ))
 
 
 class SubmitRating(APIView):
@@ -220,6 +718,8 @@ class SubmitRating(APIView):
     Submit a new customer rating for a restaurant.
     """
     permission_classes = [IsAuthenticated]
+    # the rating row points at the user, so a deleted user must not pass
+    require_database_user = True
 
     @extend_schema(
         summary="Submit a rating",
@@ -228,19 +728,19 @@ class SubmitRating(APIView):
             "type": "object",
             "properties": {
                 "restaurant_id": {"type": "integer"},
-                "rating": {"type": "number", "format": "float"},
+                "rating": {"type": "integer", "minimum": 1, "maximum": 5},
             },
             "required": ["restaurant_id", "rating"],
         },
         responses={
             200: {"type": "object", "properties": {"message": {"type": "string"}}},
-            400: {"description": "Missing data"},
+            400: {"description": "Missing data or rating outside 1-5"},
             404: {"description": "Invalid restaurant"},
         },
         examples=[
             OpenApiExample(
                 "Request Example",
-                value={"restaurant_id": 1, "rating": 4.5},
+                value={"restaurant_id": 1, "rating": 4},
                 request_only=True,
                 media_type="application/json"
             ),
@@ -260,31 +760,160 @@ class SubmitRating(APIView):
         if not (restaurant_id and rating_value):
             return Response({"error": "Missing data"}, status=400)
 
+        restaurant_id = parse_id(restaurant_id)
+        if restaurant_id is None:
+            return Response({"error": "Expected an integer restaurant_id"}, status=400)
+
+        rating_value = parse_rating(rating_value)
+        if rating_value is None:
+            return Response({"error": "Rating must be a whole number from 1 to 5"}, status=400)
+
+        buffer = rating_buffer()
+        if buffer is not None:
+            # write-behind: checked now, written with the next batch
+            if not Restaurant.objects.filter(id=restaurant_id).exists():
+                return Response({"error": "Invalid restaurant"}, status=404)
+            buffer.add(request.user.id, restaurant_id, rating_value)
+            return Response({"message": "Rating accepted"}, status=status.HTTP_202_ACCEPTED)
+
         try:
             restaurant = Restaurant.objects.get(id=restaurant_id)
         except Restaurant.DoesNotExist:
             return Response({"error": "Invalid restaurant"}, status=404)
 
-        rating = Rating.objects.create(user=request.user, restaurant=restaurant, rating=rating_value)
+        # the rating and its restaurant summary are written together or not at all
+        with transaction.atomic():
+            Rating.objects.create(user_id=request.user.id, restaurant=restaurant, rating=rating_value)
         return Response({"message": "Rating submitted successfully"})
 
 
+class SubmitRatingBatch(APIView):
+    """
+    Submit many ratings in one request.
+    """
+    permission_classes = [IsAuthenticated]
+    # the rating row points at the user, so a deleted user must not pass
+    require_database_user = True
+    max_ratings = 1000
+
+    @extend_schema(
+        summary="Submit ratings in a batch",
+        description=(
+            "Stores up to 1000 `{restaurant_id, rating}` pairs for the current user with one query "
+            "to check the restaurants and one bulk insert. Invalid pairs are reported by their "
+            "position (from 1) and the valid ones are stored."
+        ),
+        request={
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"restaurant_id": {"type": "integer"}, "rating": {"type": "integer"}},
+                "required": ["restaurant_id", "rating"],
+            },
+        },
+        responses={
+            201: {"description": "Every rating was stored"},
+            207: {"description": "Some ratings were stored, some were rejected"},
+            400: {"description": "Nothing was stored"},
+        },
+        examples=[
+            OpenApiExample(
+                "Request Example",
+                value=[{"restaurant_id": 1, "rating": 5}, {"restaurant_id": 2, "rating": 3}],
+                request_only=True,
+                media_type="application/json"
+            ),
+            OpenApiExample(
+                "Partial Success Response Example",
+                value={"created": 1, "failed": 1, "errors": [{"row": 2, "error": "Invalid restaurant"}]},
+                response_only=True,
+                media_type="application/json"
+            ),
+        ],
+        tags=["Ratings"]
+    )
+    def post(self, request):
+        pairs = request.data
+        if not isinstance(pairs, list):
+            return Response({"error": "Expected a list of ratings."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(pairs) > self.max_ratings:
+            return Response({"error": f"At most {self.max_ratings} ratings per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        errors, parsed = [], []
+        for number, pair in enumerate(pairs, 1):
+            restaurant_id = pair.get("restaurant_id") if isinstance(pair, dict) else None
+            rating = parse_rating(pair.get("rating")) if isinstance(pair, dict) else None
+            # JSON numbers only, within the range of the id column
+            restaurant_id = parse_id(restaurant_id) if isinstance(restaurant_id, int) else None
+            if restaurant_id is None:
+                errors.append({"row": number, "error": "Expected an integer restaurant_id"})
+            elif rating is None:
+                errors.append({"row": number, "error": "Rating must be a whole number from 1 to 5"})
+            else:
+                parsed.append((number, restaurant_id, rating))
+
+        known = existing_restaurants(restaurant_id for _, restaurant_id, _ in parsed)
+        errors.extend({"row": number, "error": "Invalid restaurant"} for number, restaurant_id, _ in parsed if restaurant_id not in known)
+        errors.sort(key=lambda error: error["row"])
+
+        created = submit_ratings(
+            ((request.user.id, restaurant_id, rating) for _, restaurant_id, rating in parsed),
+            known=known,
+        )
+        if not errors:
+            code = status.HTTP_201_CREATED
+        elif created:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response({"created": created, "failed": len(errors), "errors": errors}, status=code)
+
+
+class RestaurantRatingSummaryView(APIView):
+    """
+    Rating count, average and per-star histogram of one restaurant.
+    """
+    @extend_schema(
+        summary="Restaurant rating summary",
+        description="Returns the precomputed rating summary of a restaurant with a single-row lookup.",
+        parameters=[
+            OpenApiParameter(name="pk", description="Restaurant ID", required=True, type=int, location=OpenApiParameter.PATH),
+        ],
+        responses={200: RestaurantRatingSummarySerializer, 404: {"description": "Restaurant not found"}},
+        tags=["Ratings"]
+    )
+    def get(self, request, pk):
+        summary = RestaurantRatingSummary.objects.filter(restaurant_id=pk).first()
+        if summary is None:
+            # restaurants without ratings have no summary row yet
+            if not Restaurant.objects.filter(id=pk).exists():
+                return Response({"error": "Restaurant not found"}, status=status.HTTP_404_NOT_FOUND)
+            summary = RestaurantRatingSummary(restaurant_id=pk)
+        return Response(RestaurantRatingSummarySerializer(summary).data)
+
+
 class MyRatings(APIView):
     """
     List all ratings submitted by the authenticated user.
     """
     permission_classes = [IsAuthenticated]
+    values_fast_path = True
 
     @extend_schema(
         summary="Get my ratings",
-        description="Returns all ratings submitted by the authenticated user.",
+        description="Returns the ratings submitted by the authenticated user, cursor-paginated.",
+        parameters=PAGINATION_PARAMETERS + [RESTAURANT_FILTER_PARAMETER],
         responses={200: RatingSerializer(many=True)},
         tags=["Ratings"]
     )
     def get(self, request):
-        ratings = Rating.objects.filter(user=request.user)
-        serializer = RatingSerializer(ratings, many=True)
-        return Response(serializer.data)
+        # request.user is usually a ClaimsUser built from the token, see auth/authentication.py
+        ratings = filter_restaurant(Rating.objects.filter(user_id=request.user.id), request)
+
+        paginator = RatingPagination()
+        return paginator.get_paginated_response(paginated_data(
+            paginator, request, ratings, RatingSerializer, values=self.values_fast_path,
+        ))
 
 
 # Staff related:
@@ -301,13 +930,14 @@ class StaffRestaurantListView(APIView):
         ],
         tags=["Staff"]
     )
+    @conditional_get(Staff, Restaurant)
     def get(self, request, pk):
-        try:
-            staff = Staff.objects.get(id=pk)
-        except Staff.DoesNotExist:
+        # one join through the staff_restaurant table, the existence check
+        # only runs when there is nothing to show
+        staff_restaurants = list(Restaurant.objects.filter(staff__id=pk).order_by("id"))
+        if not staff_restaurants and not Staff.objects.filter(id=pk).exists():
             return Response({"error": "Staff member not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        staff_restaurants = staff.restaurant.all()
         serializer = RestaurantSerializer(staff_restaurants, many=True)
         return Response(serializer.data)
 
@@ -325,12 +955,39 @@ class RestaurantStaffListView(APIView):
         ],
         tags=["Staff"]
     )
+    @conditional_get(Staff, Restaurant)
     def get(self, request, pk):
-        try:
-            restaurant = Restaurant.objects.get(id=pk)
-        except Restaurant.DoesNotExist:
+        # staff plus all of their restaurants in two queries, however many staff there are
+        restaurant_staff = list(
+            StaffSerializer.setup_eager_loading(Staff.objects.filter(restaurant__id=pk).order_by("id"))
+        )
+        if not restaurant_staff and not Restaurant.objects.filter(id=pk).exists():
             return Response({"error": "Restaurant not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        restaurant_staff = restaurant.staff_set.all()
         serializer = StaffSerializer(restaurant_staff, many=True)
         return Response(serializer.data)
+
+
+class ResponseCacheStats(APIView):
+    """
+    Hit/miss counters of the response cache.
+    """
+    permission_classes = [IsAdminUser]
+    # is_staff from the database, not the claim issued at login
+    require_database_user = True
+
+    @extend_schema(
+        summary="Response cache statistics",
+        description="Hits, misses and hit ratio per cached view since the cache was last cleared. Staff only.",
+        responses={200: {"type": "object"}},
+        examples=[
+            OpenApiExample(
+                "Success Response Example",
+                value={"restaurants": {"hits": 950, "misses": 50, "hit_ratio": 0.95}},
+                response_only=True,
+            )
+        ],
+        tags=["Monitoring"]
+    )
+    def get(self, request):
+        return Response(cache_stats())
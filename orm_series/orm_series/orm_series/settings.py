@@ -1,4 +1,5 @@
 import logging
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -30,9 +31,8 @@ INSTALLED_APPS = [
     'django_extensions',
     'rest_framework',
     'rest_framework_simplejwt',
-    'drf_yasg',
+    'rest_framework_simplejwt.token_blacklist',
     'drf_spectacular',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
@@ -43,10 +43,16 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
     'core.middleware.RequestTimerMiddleware',
+    'core.middleware.QueryInspectorMiddleware',
 ]
 
+# django-debug-toolbar is a development tool: only loaded with DEBUG, and only
+# when installed. QueryInspectorMiddleware covers N+1 detection everywhere else.
+if DEBUG and find_spec('debug_toolbar'):
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.insert(MIDDLEWARE.index('core.middleware.RequestTimerMiddleware'), 'debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'orm_series.urls'
 
 TEMPLATES = [
@@ -78,6 +84,24 @@ DATABASES = {
 }
 
 
+# PBKDF2 hashing runs on a bounded thread pool (auth/hashing.py) instead of the
+# request thread. It keeps the pbkdf2_sha256 algorithm name and replaces
+# Django's PBKDF2PasswordHasher, which would otherwise verify those hashes.
+PASSWORD_HASHERS = [
+    'auth.hashing.PooledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Hashes run WORKERS at a time; once MAX_QUEUE more are waiting, login and
+# registration answer 503 instead of queueing.
+PASSWORD_HASHING_POOL = {
+    'WORKERS': 2,
+    'MAX_QUEUE': 32,
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -123,7 +147,7 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'auth.authentication.CachedJWTAuthentication',
     ],
 
     'DEFAULT_PERMISSION_CLASSES': [
@@ -132,6 +156,24 @@ REST_FRAMEWORK = {
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,  # Number of records per page
+
+    # JSONRenderer stays the default for plain application/json and */*; the
+    # orjson and MessagePack formats (core/renderers.py) are only chosen when
+    # the Accept header asks for them, and only offered when installed
+    'DEFAULT_RENDERER_CLASSES': [
+        *(['core.renderers.ORJSONRenderer'] if find_spec('orjson') else []),
+        'rest_framework.renderers.JSONRenderer',
+        *(['core.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # the orjson parser must come first: JSONParser also matches its media type
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.JSONParser',
+        'core.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 SPECTACULAR_SETTINGS = {
@@ -142,6 +184,80 @@ SPECTACULAR_SETTINGS = {
     # OTHER SETTINGS
 }
 
+# /schema/ is generated once per process (core/openapi.py). With a PATH, it is
+# read from that gzipped file, which `manage.py build_openapi_schema` writes on
+# deploy; the first request writes it when it is missing.
+OPENAPI_SCHEMA = {
+    'PATH': None,
+}
+
+# Cached restaurant lists (core/caching.py) are stored in the "responses" cache.
+# Entries never expire; a write to a table makes them unreachable instead. Any
+# Django backend works, e.g. FileBasedCache or DatabaseCache to share it between
+# worker processes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 10_000},
+    },
+}
+RESPONSE_CACHE_ALIAS = 'responses'
+
+# Verified access tokens kept per process by auth.authentication.CachedJWTAuthentication,
+# each until its exp. A repeated token skips the signature check and, when it
+# carries the login claims, the user query.
+JWT_TOKEN_CACHE = {
+    'MAX_ENTRIES': 10_000,
+}
+
+# Bloom filter of blacklisted refresh tokens (auth/blacklist.py). Memory grows
+# with CAPACITY and with a lower FALSE_POSITIVE_RATE (about 180 KiB for 100k
+# tokens at 0.1%); the filter doubles its capacity when it fills up. Tokens
+# blacklisted by another worker are picked up within SYNC_INTERVAL seconds.
+JWT_BLACKLIST_FILTER = {
+    'CAPACITY': 100_000,
+    'FALSE_POSITIVE_RATE': 0.001,
+    'SYNC_INTERVAL': 30,
+}
+
+# Request metrics served at /metrics (core/metrics.py). Each worker process keeps
+# its own; with several workers set DIR to a directory they all can write, and
+# each flushes a snapshot there every FLUSH_INTERVAL seconds for /metrics to add up.
+METRICS = {
+    'DIR': None,
+    'FLUSH_INTERVAL': 5.0,
+}
+
+# Probable N+1 queries and slow queries, with their EXPLAIN QUERY PLAN
+# (core/querylog.py). A query fingerprint repeated more than REPEAT_THRESHOLD
+# times in one request, or a query slower than SLOW_QUERY_MS, is logged to the
+# core.querylog logger. Cheap enough for staging; the test runner below turns
+# RAISE on so a request with a probable N+1 fails its test (slow queries are
+# still only logged).
+QUERY_INSPECTOR = {
+    'ENABLED': DEBUG,
+    'REPEAT_THRESHOLD': 10,
+    'SLOW_QUERY_MS': 100,
+    'EXPLAIN': True,
+    'RAISE': False,
+}
+
+TEST_RUNNER = 'core.testing.QueryInspectingTestRunner'
+
+# Coalesce single rating submissions into periodic bulk inserts (core/ratings.py).
+# SubmitRating then answers 202 and the rating is stored within FLUSH_INTERVAL seconds.
+RATING_WRITE_BEHIND = {
+    'ENABLED': False,
+    'FLUSH_INTERVAL': 1.0,
+    'MAX_BATCH': 500,
+    'MAX_PENDING': 10_000,
+}
+
 
 
 
@@ -167,5 +283,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'core.querylog': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
@@ -14,23 +14,32 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 
-from debug_toolbar.toolbar import debug_toolbar_urls
-
 # drf spectacular
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
+
+from core.metrics import metrics_view
+from core.openapi import schema_view
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('core/', include('core.urls')),  # Link to your app,
     path('auth/', include('auth.urls')),         # Auth routes
+    path('metrics', metrics_view, name='metrics'),  # Prometheus scrape target
 
     # YOUR PATTERNS
-    path('schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('schema/', schema_view, name='schema'),  # generated once, see core/openapi.py
     # Optional UI:
     path('schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
 ]
+
+# only in development, see INSTALLED_APPS in settings.py
+if 'debug_toolbar' in settings.INSTALLED_APPS:
+    from debug_toolbar.toolbar import debug_toolbar_urls
+
+    urlpatterns += debug_toolbar_urls()